@@ -0,0 +1,131 @@
+"""
+Benchmark: energy aligner vs Whisper ASR
+
+Without arguments, checks the aligners offline (no Whisper) against the
+narration fixture in benchmarks/fixtures, whose exact word timings are
+known: alignWithEnergy on the whole narration and per sentence cue, and
+alignFromCharacters on its TTS character timestamps. Reports the time
+each takes and how far its word timings are from the reference, and
+exits non-zero when one is off by more than its tolerance.
+
+With a voiceover and its script, aligns them with the energy-based
+aligner and with Whisper, and reports the time each takes and how far
+apart their word timings are.
+
+Run from the repository root:
+    python -m benchmarks.bench_alignment
+    python -m benchmarks.bench_alignment voiceover.mp3 script.txt [whisper_model]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from video.alignment import alignFromCharacters, alignWithEnergy
+from video.video import compactTranscription, getWhisperModel, transcribeWithWhisper
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_AUDIO = os.path.join(FIXTURE_DIR, "narration.mp3")
+FIXTURE_SCRIPT = os.path.join(FIXTURE_DIR, "narration.txt")
+FIXTURE_TIMINGS = os.path.join(FIXTURE_DIR, "narration.json")
+# Largest acceptable (median, p90) word start error in seconds
+TOLERANCES = {
+    "energy": (0.15, 0.4),
+    "energy, sentence cues": (0.15, 0.4),
+    "tts characters": (0.01, 0.01),
+}
+
+
+def wordStarts(transcription):
+    return [word["start"] for segment in transcription["segments"] for word in segment.get("words", [])]
+
+
+def sentenceCues(words):
+    """Cues like chunked TTS gives: one per sentence, padded into the pauses around it"""
+    cues, current = [], []
+    for word in words:
+        current.append(word)
+        if re.search(r"[.!?]$", word["word"]):
+            cues.append(current)
+            current = []
+    return [{"start": max(0.0, cue[0]["start"] - 0.2), "end": cue[-1]["end"] + 0.2,
+             "text": " ".join(word["word"] for word in cue)} for cue in cues]
+
+
+def checkFixture():
+    with open(FIXTURE_SCRIPT, encoding="utf-8") as f:
+        script = f.read()
+    with open(FIXTURE_TIMINGS, encoding="utf-8") as f:
+        reference = json.load(f)
+    reference_starts = np.array([word["start"] for word in reference["words"]])
+    characters = reference["alignment"]
+
+    aligners = {
+        "energy": lambda: alignWithEnergy(FIXTURE_AUDIO, script),
+        "energy, sentence cues": lambda: alignWithEnergy(FIXTURE_AUDIO, script, sentenceCues(reference["words"])),
+        "tts characters": lambda: alignFromCharacters(
+            characters["characters"], characters["character_start_times_seconds"], characters["character_end_times_seconds"]),
+    }
+    print(f"{len(reference_starts)} words, reference timings from {os.path.relpath(FIXTURE_TIMINGS)}")
+    print("aligner                 seconds  words  median error  p90 error  max error")
+    failed = []
+    for name, align in aligners.items():
+        start = time.perf_counter()
+        starts = wordStarts(align())
+        elapsed = time.perf_counter() - start
+        if len(starts) != len(reference_starts):
+            print(f"{name:<22} {elapsed:>8.3f}  {len(starts):>5}  word count differs from the reference")
+            failed.append(name)
+            continue
+        errors = np.abs(np.array(starts) - reference_starts)
+        median, p90 = np.median(errors), np.percentile(errors, 90)
+        max_median, max_p90 = TOLERANCES[name]
+        ok = median <= max_median and p90 <= max_p90
+        print(f"{name:<22} {elapsed:>8.3f}  {len(starts):>5}  {median:>11.3f}s {p90:>9.3f}s {errors.max():>9.3f}s  "
+              f"{'ok' if ok else f'over tolerance ({max_median}s / {max_p90}s)'}")
+        if not ok:
+            failed.append(name)
+    if failed:
+        print(f"❌ Alignment off the reference: {', '.join(failed)}")
+        sys.exit(1)
+
+
+def compareWithWhisper(audio_path, script_path, model_size):
+    with open(script_path, encoding="utf-8") as f:
+        script = f.read()
+
+    start = time.perf_counter()
+    energy = alignWithEnergy(audio_path, script)
+    energy_elapsed = time.perf_counter() - start
+
+    getWhisperModel(model_size)  # exclude model load from the comparison
+    start = time.perf_counter()
+    whisper_result = compactTranscription(transcribeWithWhisper(audio_path, model_size))
+    whisper_elapsed = time.perf_counter() - start
+
+    energy_starts, whisper_starts = wordStarts(energy), wordStarts(whisper_result)
+    n = min(len(energy_starts), len(whisper_starts))
+    offsets = np.abs(np.array(energy_starts[:n]) - np.array(whisper_starts[:n]))
+
+    print(f"energy aligner: {energy_elapsed:.3f}s, {len(energy_starts)} words")
+    print(f"whisper:        {whisper_elapsed:.3f}s, {len(whisper_starts)} words")
+    if n:
+        print(f"word start offset vs whisper: median {np.median(offsets):.3f}s, p90 {np.percentile(offsets, 90):.3f}s")
+
+
+def main():
+    if len(sys.argv) == 1:
+        checkFixture()
+    elif len(sys.argv) >= 3:
+        compareWithWhisper(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        print("usage: python -m benchmarks.bench_alignment [<voiceover.mp3> <script.txt> [whisper_model]]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Benchmark: async script/voiceover nodes on pooled clients vs the sync nodes
+
+Starts local mock servers for the OpenAI chat completions API (streamed
+script tokens) and the ElevenLabs text-to-speech API (silent MP3s). Both
+add latency and answer a share of requests with 429 (some with
+Retry-After), and each runs in its own process so its threads don't count
+against the pipeline's. The real SDKs talk to them through
+providers.providers' pooled, rate-limited and retrying clients
+(OPENAI_BASE_URL / ELEVENLABS_BASE_URL).
+
+RUNS runs of generate_script + generate_voiceover are then made three ways:
+the sync nodes on as many threads as the LangGraph server's default
+executor has, the sync nodes on one thread per run, and the async nodes
+all on one event loop. For each it reports wall time, peak thread count,
+failed runs, requests, connections and 429s seen by the mocks, and the
+busiest second of requests against the configured rate limit. (The OpenAI
+SDK closes a stream as soon as it reads [DONE], so streamed script calls
+don't get their connection back into the pool; ElevenLabs calls do.)
+
+Run from the repository root:
+    python -m benchmarks.bench_async_clients
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import urlopen
+
+
+def freePort():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+OPENAI_PORT, ELEVENLABS_PORT = freePort(), freePort()
+_scratch = tempfile.mkdtemp(prefix="kitty-bench-")
+os.environ.update({
+    "OPENAI_API_KEY": "mock",
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{OPENAI_PORT}/v1",
+    "ELEVENLABS_API_KEY": "mock",
+    "ELEVENLABS_BASE_URL": f"http://127.0.0.1:{ELEVENLABS_PORT}",
+    "KITTY_FAKE_LLM": "0",
+    "KITTY_FAKE_TTS": "0",
+    "KITTY_CACHE": "off",  # every run does the full work
+    "KITTY_METRICS": "off",
+    "KITTY_WORKSPACE_DIR": os.path.join(_scratch, "runs"),
+    "ALIGNMENT_MODE": "energy",
+    # Let the provider limits, not the scheduler's stage limits, bound the runs
+    "KITTY_LLM_CONCURRENCY": "1000",
+    "KITTY_TTS_CONCURRENCY": "1000",
+    "KITTY_OPENAI_RPS": os.getenv("KITTY_OPENAI_RPS", "20"),
+    "KITTY_ELEVENLABS_RPS": os.getenv("KITTY_ELEVENLABS_RPS", "40"),
+    "KITTY_RETRY_BASE_SECONDS": "0.2",
+})
+
+import main
+from providers.providers import ELEVENLABS, OPENAI, RATE_LIMITS, providerStats
+from script.fake_llm import FakeChatModel
+from voiceover.fake_tts import WORDS_PER_SECOND, silentMp3
+
+RUNS = 32
+DURATION = "30s"
+SERVER_THREADS = min(32, (os.cpu_count() or 1) + 4)  # ThreadPoolExecutor's default, which runs sync nodes
+LLM_FIRST_TOKEN_SECONDS = 0.5
+LLM_SECONDS_PER_CHUNK = 0.02  # ~50 tokens/s, about what gpt-4o streams at
+TTS_SECONDS = 0.4
+REJECT_RATE = 0.15  # share of requests answered with 429
+RETRY_AFTER_RATE = 0.25  # share of 429s that carry Retry-After
+
+NOTES = """Topic: Binary Search
+- Efficient algorithm for finding an item in a sorted list
+- Works by repeatedly dividing the search interval in half
+- Time complexity: O(log n); the list must be sorted
+"""
+
+
+class MockStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.rejected = 0
+        self.connections = 0
+        self.times = []
+
+    def snapshot(self):
+        window, busiest = deque(), 0
+        for t in sorted(self.times):
+            window.append(t)
+            while window[0] <= t - 1.0:
+                window.popleft()
+            busiest = max(busiest, len(window))
+        return {"requests": self.requests, "rejected": self.rejected, "connections": self.connections,
+                "busiest_second": busiest}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows
+    stats = None
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            pass  # a client dropping a pooled connection
+
+
+    def do_GET(self):
+        with self.stats.lock:
+            body = json.dumps(self.stats.snapshot()).encode()
+            if self.path.endswith("?reset=1"):
+                self.stats.reset()
+        self.sendBody(200, "application/json", body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.stats.lock:
+            self.stats.requests += 1
+            if not getattr(self, "counted", False):
+                self.counted = True  # one handler per connection: its first request
+                self.stats.connections += 1
+            self.stats.times.append(time.monotonic())
+            rejected = random.random() < REJECT_RATE
+            self.stats.rejected += rejected
+        if rejected:
+            headers = {"Retry-After": "1"} if random.random() < RETRY_AFTER_RATE else {}
+            body = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}).encode()
+            return self.sendBody(429, "application/json", body, headers)
+        self.respond(request)
+
+    def sendBody(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def sendChunked(self, content_type, pieces):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in pieces:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class OpenAIHandler(MockHandler):
+    """/v1/chat/completions with stream=true: the fake model's reply, word by word"""
+
+    def respond(self, request):
+        prompt = "\n".join(message["content"] for message in request["messages"])
+        text = FakeChatModel()._respond(prompt)
+        words = text.split(" ")
+
+        def events():
+            time.sleep(LLM_FIRST_TOKEN_SECONDS)
+            for index, word in enumerate(words):
+                time.sleep(LLM_SECONDS_PER_CHUNK)
+                delta = {"content": word if index == 0 else " " + word}
+                yield self.event({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            yield self.event({"choices": [], "usage": {
+                "prompt_tokens": len(prompt) // 4, "completion_tokens": len(words),
+                "total_tokens": len(prompt) // 4 + len(words)}})
+            yield b"data: [DONE]\n\n"
+
+        self.sendChunked("text/event-stream", events())
+
+    @staticmethod
+    def event(data):
+        data = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o", **data}
+        return f"data: {json.dumps(data)}\n\n".encode()
+
+
+class ElevenLabsHandler(MockHandler):
+    """/v1/text-to-speech/{voice_id}[/stream]: silent MP3 as long as the text takes to say"""
+
+    def respond(self, request):
+        time.sleep(TTS_SECONDS)
+        audio = silentMp3(len(request["text"].split()) / WORDS_PER_SECOND)
+        self.sendChunked("audio/mpeg", (audio[i:i + 16384] for i in range(0, len(audio), 16384)))
+
+
+def serve(handler, port):
+    handler.stats = MockStats()
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def mockStats(port, reset=False):
+    with urlopen(f"http://127.0.0.1:{port}/stats{'?reset=1' if reset else ''}") as response:
+        return json.load(response)
+
+
+class ThreadPeak:
+    """Highest thread count of this process while the block runs"""
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(0.005):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def runSync(_):
+    state = main.pipeline_input(NOTES, duration=DURATION)
+    state = main.generate_script(state)
+    return main.generate_voiceover(state)
+
+
+async def runAsync():
+    state = main.pipeline_input(NOTES, duration=DURATION)
+    state = await main.generate_script_async(state)
+    return await main.generate_voiceover_async(state)
+
+
+def measured(name, run):
+    for port in (OPENAI_PORT, ELEVENLABS_PORT):
+        mockStats(port, reset=True)
+    with ThreadPeak() as threads:
+        start = time.perf_counter()
+        results = run()
+        seconds = time.perf_counter() - start
+    failed = sum(1 for result in results if result.get("error") or not result.get("audio_path"))
+    return name, seconds, threads.peak, failed, mockStats(OPENAI_PORT), mockStats(ELEVENLABS_PORT)
+
+
+def main_():
+    context = multiprocessing.get_context("spawn")
+    servers = [context.Process(target=serve, args=(OpenAIHandler, OPENAI_PORT), daemon=True),
+               context.Process(target=serve, args=(ElevenLabsHandler, ELEVENLABS_PORT), daemon=True)]
+    for server in servers:
+        server.start()
+    for port in (OPENAI_PORT, ELEVENLABS_PORT):
+        for _ in range(100):
+            try:
+                mockStats(port)
+                break
+            except OSError:
+                time.sleep(0.1)
+
+    # Import the SDKs and open the pools outside the measurement
+    runSync(None)
+    asyncio.run(runAsync())
+
+    async def allAsync():
+        return await asyncio.gather(*(runAsync() for _ in range(RUNS)))
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=SERVER_THREADS) as pool:
+        rows.append(measured(f"sync nodes, {SERVER_THREADS} threads", lambda: list(pool.map(runSync, range(RUNS)))))
+    with ThreadPoolExecutor(max_workers=RUNS) as pool:
+        rows.append(measured(f"sync nodes, {RUNS} threads", lambda: list(pool.map(runSync, range(RUNS)))))
+    rows.append(measured("async nodes, 1 event loop", lambda: asyncio.run(allAsync())))
+
+    print(f"\n{RUNS} runs of generate_script + generate_voiceover against mock servers "
+          f"({REJECT_RATE:.0%} 429s, LLM first token {LLM_FIRST_TOKEN_SECONDS}s, TTS {TTS_SECONDS}s per request)")
+    print(f"rate limits: OpenAI {RATE_LIMITS[OPENAI]:.0f}/s, ElevenLabs {RATE_LIMITS[ELEVENLABS]:.0f}/s "
+          f"(token buckets: a full bucket plus a second's refill, at most twice that, in any one second)")
+    print("mode                          seconds  runs/min  peak threads  failed  "
+          "LLM req/conn/429  TTS req/conn/429  busiest s LLM/TTS")
+    for name, seconds, threads, failed, llm, tts in rows:
+        print(f"{name:<28} {seconds:>8.1f}s {RUNS / seconds * 60:>9.0f} {threads:>13} {failed:>7}  "
+              f"{llm['requests']:>5}/{llm['connections']:>3}/{llm['rejected']:>4}  "
+              f"{tts['requests']:>5}/{tts['connections']:>3}/{tts['rejected']:>4}  "
+              f"{llm['busiest_second']:>9}/{tts['busiest_second']}")
+    for provider, stats in providerStats().items():
+        print(f"{provider}: {stats['attempts']} attempts, {stats['retries']} retries ({stats['rate_limited']} after a 429), "
+              f"{stats['wait_seconds']:.1f}s waiting for the rate limiter, {stats['backoff_seconds']:.1f}s backing off")
+    for server in servers:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main_()
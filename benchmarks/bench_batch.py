@@ -0,0 +1,47 @@
+"""
+Benchmark: run_batch vs sequential run_pipeline calls
+
+Makes the same videos offline (fake LLM and TTS, as in
+bench_pipeline_e2e) once as one run_pipeline call after another and once
+with run_batch, and reports videos/hour for both. The batch also gets an
+item that cannot be read, to check it fails on its own without stopping
+the rest.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch
+"""
+
+import time
+
+from benchmarks.bench_pipeline_e2e import NOTES  # sets up the offline environment first
+import main
+
+VIDEOS = 4
+DURATION = "30s"
+
+
+def main_():
+    # Start the render workers and import everything outside the measurement
+    main.run_pipeline(NOTES, duration=DURATION)
+
+    start = time.perf_counter()
+    sequential = [main.run_pipeline(NOTES, duration=DURATION) for _ in range(VIDEOS)]
+    sequential_seconds = time.perf_counter() - start
+    assert all(result.get("video_path") and not result.get("error") for result in sequential)
+
+    start = time.perf_counter()
+    batch = main.run_batch([NOTES] * VIDEOS + [{"path": "missing-lecture.pdf"}], duration=DURATION)
+    batch_seconds = time.perf_counter() - start
+    assert all(result.get("video_path") and not result.get("error") for result in batch[:VIDEOS])
+    assert batch[-1]["error"], batch[-1]
+
+    print(f"\n{VIDEOS} x {DURATION} videos")
+    print(f"sequential run_pipeline: {sequential_seconds:>7.1f}s  {VIDEOS / sequential_seconds * 3600:>5.0f} videos/hour")
+    print(f"run_batch (x{main.BATCH_CONCURRENCY}):          {batch_seconds:>7.1f}s  {VIDEOS / batch_seconds * 3600:>5.0f} videos/hour"
+          f"  ({sequential_seconds / batch_seconds:.2f}x)")
+    print(f"failing item: {batch[-1]['error']}")
+    main.getScheduler().shutdown()
+
+
+if __name__ == "__main__":
+    main_()
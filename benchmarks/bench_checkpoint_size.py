@@ -0,0 +1,103 @@
+"""
+Benchmark: checkpoint size and serialization time, base64 upload vs file ref
+
+Runs the graph (external services stubbed out, as in bench_pipeline_dag)
+with an in-memory checkpointer whose serializer records the size and time
+of everything it writes, for uploads sent inline as base64 (file_data)
+and uploaded to the blob store first (file_ref). With file_data every
+checkpoint until parse_notes carries the base64 string; with file_ref no
+checkpoint grows with the file.
+
+Run from the repository root:
+    python -m benchmarks.bench_checkpoint_size
+"""
+
+import base64
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+# Keep the benchmark's workspaces and uploads out of output/
+_scratch = tempfile.mkdtemp(prefix="kitty-bench-")
+os.environ.setdefault("KITTY_WORKSPACE_DIR", os.path.join(_scratch, "runs"))
+os.environ.setdefault("KITTY_BLOB_DIR", os.path.join(_scratch, "uploads"))
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+import main
+from blobstore.blobstore import getBlobStore
+
+FILE_SIZES_MB = [1, 10, 50]
+
+
+class TimedSerializer(JsonPlusSerializer):
+    """Records bytes written and seconds spent per serialized object"""
+
+    def __init__(self):
+        super().__init__()
+        self.sizes = []
+        self.seconds = []
+
+    def dumps_typed(self, obj):
+        start = time.perf_counter()
+        kind, data = super().dumps_typed(obj)
+        self.seconds.append(time.perf_counter() - start)
+        self.sizes.append(len(data))
+        return kind, data
+
+
+def stubNodes():
+    def stub(updates):
+        def node(state):
+            state.update(updates)
+            return state
+        return node
+
+    return {
+        "extract_text_from_pdf_bytes": lambda file_bytes: "Binary search halves the interval. " * 100,
+        "generate_script": stub({"pure_script": "Kitty!", "script_with_scenes": "[Scene 1] Kitty!"}),
+        "generate_voiceover": stub({"audio_path": "voiceover.mp3"}),
+        "save_script_to_file": stub({}),
+        "prepare_assets": stub({}),
+        "generate_video": stub({"video_path": "kitty_explains.mp4"}),
+    }
+
+
+def runGraph(graph, serde, file_input):
+    serde.sizes.clear()
+    serde.seconds.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # node progress output
+        result = graph.invoke(
+            {"notes": "", "file_type": "pdf", "duration": "30s", "error": "", **file_input},
+            {"configurable": {"thread_id": os.urandom(8).hex()}},
+        )
+    elapsed = time.perf_counter() - start
+    assert result.get("video_path") and not result.get("error"), result
+    return sum(serde.sizes), max(serde.sizes), sum(serde.seconds), len(serde.sizes), elapsed
+
+
+def main_():
+    for name, node in stubNodes().items():
+        setattr(main, name, node)
+    serde = TimedSerializer()
+    graph = main.create_pipeline(checkpointer=InMemorySaver(serde=serde))
+
+    print("file MB  input      checkpoint MB total / largest   serialize ms (writes)   run s")
+    for size_mb in FILE_SIZES_MB:
+        file_bytes = os.urandom(size_mb * 1024 ** 2)
+        inputs = {
+            "file_data": {"file_data": base64.b64encode(file_bytes).decode("ascii"), "file_ref": ""},
+            "file_ref": {"file_data": "", "file_ref": getBlobStore().put(file_bytes)},
+        }
+        for label, file_input in inputs.items():
+            total, largest, seconds, writes, elapsed = runGraph(graph, serde, file_input)
+            print(f"{size_mb:<8} {label:<10} {total / 1024 ** 2:>10.2f} / {largest / 1024 ** 2:<10.2f}"
+                  f" {seconds * 1000:>10.1f} ({writes})       {elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,65 @@
+"""
+Benchmark: ffmpeg two-frame compositor vs MoviePy callback
+
+Checks that the compositor produces exactly the frames MoviePy would
+(frame-by-frame MD5 of the RGB frames) on synthetic word timelines, then
+times how long each renderer takes to produce the raw frames.
+
+Run from the repository root:
+    python -m benchmarks.bench_compositor
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+
+from imageio_ffmpeg import get_ffmpeg_exe
+from moviepy.editor import VideoClip
+
+from benchmarks.bench_make_frame import syntheticWordTimes
+from video.video import (
+    FPS, buildMouthTimeline, concatInputArgs, fetchStaticImages,
+    make_frame_from_timeline, verifyCompositor, writeConcatList, writeStillFrames,
+)
+
+CLOSED_PNG = "video/cat-closed.png"
+OPEN_PNG = "video/cat-open.png"
+FLAP_INTERVAL = 0.1
+DURATIONS = [30.0, 90.0]
+
+
+def timeMoviePy(frame_closed, frame_open, timeline, duration):
+    video = VideoClip(lambda t: make_frame_from_timeline(frame_closed, frame_open, timeline, FPS, t), duration=duration)
+    start = time.perf_counter()
+    for frame in video.iter_frames(fps=FPS, dtype="uint8"):
+        frame.tobytes()  # what saveSinglePass pushes down the pipe
+    return time.perf_counter() - start
+
+
+def timeCompositor(frame_closed, frame_open, timeline, duration, work_dir):
+    still_paths = writeStillFrames(frame_closed, frame_open, work_dir)
+    list_file = os.path.join(work_dir, "frames.ffconcat")
+    writeConcatList(list_file, *still_paths, timeline)
+    start = time.perf_counter()
+    subprocess.run([
+        get_ffmpeg_exe(), "-loglevel", "error", *concatInputArgs(list_file),
+        "-vf", f"fps={FPS}", "-frames:v", str(int(duration * FPS)), "-f", "null", "-"
+    ], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    frame_closed, frame_open = fetchStaticImages(CLOSED_PNG, OPEN_PNG)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for duration in DURATIONS:
+            timeline = buildMouthTimeline(syntheticWordTimes(duration), FLAP_INTERVAL, duration, FPS)
+            mismatches = verifyCompositor(CLOSED_PNG, OPEN_PNG, timeline, duration, work_dir)
+            moviepy_elapsed = timeMoviePy(frame_closed, frame_open, timeline, duration)
+            compositor_elapsed = timeCompositor(frame_closed, frame_open, timeline, duration, work_dir)
+            print(f"{duration:.0f}s: mismatched frames={len(mismatches)} "
+                  f"moviepy={moviepy_elapsed:.2f}s compositor={compositor_elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
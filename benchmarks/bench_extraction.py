@@ -0,0 +1,88 @@
+"""
+Benchmark: page extraction throughput on large generated PDFs
+
+Generates text PDFs with a few hundred pages and extracts them with
+extraction.iterPages on one worker process and on several, reporting
+pages/sec and peak memory. Each run happens in a fresh process (so the
+workers start cold) so peak RSS (parent + workers) is measured per run.
+
+Run from the repository root:
+    python -m benchmarks.bench_extraction
+"""
+
+import multiprocessing
+import os
+import resource
+import time
+
+PAGE_COUNTS = [200, 500]
+LINES_PER_PAGE = 45
+WORD = "kitty"
+
+
+def makePdf(n_pages, lines_per_page=LINES_PER_PAGE):
+    """A minimal valid PDF with n_pages pages of Helvetica text"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(n_pages):
+        lines = [f"Page {page + 1} line {line}: " + " ".join([WORD] * 10) for line in range(lines_per_page)]
+        text_ops = "BT /F1 10 Tf 40 800 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = text_ops.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % n_pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def measure(n_pages, workers, results):
+    from extraction.extraction import getWorkerPool, iterPages
+
+    file_bytes = makePdf(n_pages)
+    start = time.perf_counter()
+    pages = chars = 0
+    for page in iterPages("pdf", file_bytes, workers=workers):
+        pages += 1
+        chars += len(page.text)
+    elapsed = time.perf_counter() - start
+    getWorkerPool().shutdown()  # the workers outlive the call; reap them to count their peak RSS
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_peak_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    results.put((pages, chars, elapsed, peak_kb / 1024, children_peak_kb / 1024))
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    worker_counts = sorted({1, os.cpu_count() or 1, 4})
+    print(f"{os.cpu_count()} CPU(s)")
+    print("pages  workers  pages/sec  seconds  peak RSS MB (parent / largest worker)")
+    for n_pages in PAGE_COUNTS:
+        for workers in worker_counts:
+            # A plain (non-daemon) process: pool workers may not start pools of their own
+            results = context.Queue()
+            runner = context.Process(target=measure, args=(n_pages, workers, results))
+            runner.start()
+            pages, chars, elapsed, peak_mb, children_mb = results.get()
+            runner.join()
+            print(f"{pages:<6} {workers:<8} {pages / elapsed:>9.1f}  {elapsed:>7.2f}  {peak_mb:>6.1f} / {children_mb:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: import time of the pipeline entry points, with a budget
+
+Imports each module in a fresh interpreter under `python -X importtime`
+(best of a few runs) and prints the total and the slowest top-level
+packages. Fails (exit code 1) when a module goes over its budget or pulls
+in one of the heavy dependencies that must only load on first use
+(Whisper/torch, MoviePy, the ElevenLabs SDK, langchain_openai), so it can
+run as a regression check.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time
+"""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+RUNS = 3
+# Budgets in milliseconds; LangGraph itself is most of main's
+BUDGETS_MS = {
+    "main": float(os.getenv("KITTY_IMPORT_BUDGET_MS", "2000")),
+    "video.video": 500.0,
+    "voiceover.voiceover": 200.0,
+    "video_server": 1000.0,
+}
+LAZY_MODULES = ["whisper", "torch", "moviepy", "elevenlabs", "langchain_openai"]
+TOP_PACKAGES = 8
+
+
+def importTimes(module=None):
+    """{module name: cumulative microseconds} for one cold import of `module`
+    (without one: what the interpreter imports at startup)"""
+    # Importing main starts the render workers; only the import is timed here
+    env = {**os.environ, "WHISPER_WARMUP": "false"}
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        capture_output=True, text=True, check=True, env=env,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def byPackage(times, startup):
+    """Cumulative time per top-level package, taking the outermost import"""
+    packages = defaultdict(int)
+    for name, cumulative in times.items():
+        if name in startup:
+            continue
+        root = name.split(".")[0]
+        packages[root] = max(packages[root], cumulative)
+    return packages
+
+
+def main():
+    failures = []
+    startup = importTimes()
+    for module, budget_ms in BUDGETS_MS.items():
+        runs = [importTimes(module) for _ in range(RUNS)]
+        times = min(runs, key=lambda run: run[module])
+        total_ms = times[module] / 1000
+        loaded = sorted({name.split(".")[0] for name in times} & set(LAZY_MODULES))
+
+        status = "ok" if total_ms <= budget_ms and not loaded else "FAIL"
+        print(f"{module:<20} {total_ms:>7.0f}ms  (budget {budget_ms:.0f}ms)  {status}")
+        packages = byPackage(times, startup)
+        packages.pop(module.split(".")[0], None)
+        for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:TOP_PACKAGES]:
+            print(f"    {name:<24} {cumulative / 1000:>7.0f}ms")
+
+        if total_ms > budget_ms:
+            failures.append(f"{module} took {total_ms:.0f}ms (budget {budget_ms:.0f}ms)")
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} eagerly")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: re-rendering after a one-sentence edit to the script
+
+Makes a video offline (fake LLM and TTS, as in bench_pipeline_e2e), edits
+one sentence of its pure_script and runs it again with the same run_id, so
+only the changed sentence is voiced, aligned and encoded
+(KITTY_INCREMENTAL). The same edited script is also rendered from scratch
+with KITTY_INCREMENTAL off, which is what every edit used to cost. Reports
+the wall time, TTS requests and encoded segments of each, and checks that
+the incremental video is as long as its voiceover. (The fake LLM's script
+repeats sentences, so even the first render reuses some of its own.)
+
+Run from the repository root:
+    python -m benchmarks.bench_incremental_render
+"""
+
+import re
+import subprocess
+import time
+import uuid
+from unittest import mock
+
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from benchmarks.bench_pipeline_e2e import NOTES  # sets up the offline environment first
+import main
+from voiceover.voiceover import getElevenLabs, splitSentences
+
+DURATION = "60s"
+
+
+def mediaSeconds(path):
+    """(video, audio) stream durations of an MP4, from ffmpeg's frame counter"""
+    seconds = []
+    for stream in ("0:v", "0:a"):
+        stderr = subprocess.run([get_ffmpeg_exe(), "-i", path, "-map", stream, "-f", "null", "-"],
+                                capture_output=True, text=True).stderr
+        times = re.findall(r"time=(\d+):(\d+):([\d.]+)", stderr)
+        hours, minutes, secs = times[-1]
+        seconds.append(int(hours) * 3600 + int(minutes) * 60 + float(secs))
+    return tuple(seconds)
+
+
+def attempt(run_id, pure_script=""):
+    """Run the pipeline; returns (final state, seconds, TTS requests, render stats)"""
+    scheduler = main.getScheduler()
+    render = scheduler.render
+    stats = {}
+
+    def recorded_render(*args, **kwargs):
+        stats.update(render(*args, **kwargs) or {})
+        return stats
+
+    requests_before = len(getElevenLabs().text_to_speech.requests)
+    with mock.patch.object(scheduler, "render", recorded_render):
+        start = time.perf_counter()
+        result = main.run_pipeline(NOTES, run_id=run_id, duration=DURATION, pure_script=pure_script)
+        seconds = time.perf_counter() - start
+    assert result.get("video_path") and not result.get("error"), result.get("error")
+    return result, seconds, len(getElevenLabs().text_to_speech.requests) - requests_before, stats
+
+
+def main_():
+    # Start the render workers and import everything outside the measurement
+    main.run_pipeline(NOTES, duration=DURATION)
+
+    run_id = f"bench-{uuid.uuid4().hex[:12]}"
+    first, first_seconds, first_requests, first_stats = attempt(run_id)
+
+    sentences = splitSentences(first["pure_script"])
+    middle = len(sentences) // 2
+    sentences[middle] = sentences[middle].rstrip(".!?") + ", and Kitty is very proud of that."
+    edited_script = " ".join(sentences)
+
+    edited, edited_seconds, edited_requests, edited_stats = attempt(run_id, edited_script)
+    video_seconds, audio_seconds = mediaSeconds(edited["video_path"])
+
+    with mock.patch.object(main, "INCREMENTAL_RENDER", False):
+        _, full_seconds, full_requests, full_stats = attempt(f"bench-{uuid.uuid4().hex[:12]}", edited_script)
+
+    print(f"\n{DURATION} video, {len(sentences)} sentences, sentence {middle + 1} edited")
+    print("run                              seconds  render s  TTS requests  segments encoded")
+    for name, seconds, requests, stats in [
+        ("first render", first_seconds, first_requests, first_stats),
+        ("edited, incremental", edited_seconds, edited_requests, edited_stats),
+        ("edited, from scratch", full_seconds, full_requests, full_stats),
+    ]:
+        encoded = f"{stats['segments_encoded']}/{stats['segments']}" if stats.get("segments") else "whole video"
+        print(f"{name:<30} {seconds:>8.1f}s {stats['seconds']:>8.1f}s  {requests:>12}  {encoded:>16}")
+    print(f"\nincremental re-render: {full_seconds / edited_seconds:.1f}x faster than from scratch")
+    print(f"edited video: {video_seconds:.2f}s of video, {audio_seconds:.2f}s of audio")
+    main.getScheduler().shutdown()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,68 @@
+"""
+Benchmark: per-frame mouth-state lookup
+
+Compares the original make_frame (linear scan of combined_times on every
+frame) against the precomputed per-frame timeline on synthetic 10-minute
+word timelines.
+
+Run from the repository root:
+    python -m benchmarks.bench_make_frame
+"""
+
+import time
+import numpy as np
+
+from video.video import FPS, make_frame, buildMouthTimeline, make_frame_from_timeline
+
+FLAP_INTERVAL = 0.1
+DURATION = 600.0  # 10 minutes
+
+
+def syntheticWordTimes(duration, seed=0):
+    """Generate a speech-like (start, end) list: short words with short pauses"""
+    rng = np.random.default_rng(seed)
+    times = []
+    t = 0.2
+    while t < duration - 1:
+        word = rng.uniform(0.15, 0.6)
+        gap = rng.choice([0.02, 0.08, 0.3, 0.8], p=[0.4, 0.4, 0.15, 0.05])
+        times.append((t, min(t + word, duration)))
+        t += word + gap
+    return times
+
+
+def benchmark(combined_times):
+    frame_closed = np.zeros((4, 4, 3), dtype=np.uint8)
+    frame_open = np.ones((4, 4, 3), dtype=np.uint8)
+    n_frames = int(DURATION * FPS)
+    frame_times = [i / FPS for i in range(n_frames)]
+
+    start = time.perf_counter()
+    old_frames = [make_frame(frame_closed, frame_open, FLAP_INTERVAL, combined_times, t) for t in frame_times]
+    old_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    timeline = buildMouthTimeline(combined_times, FLAP_INTERVAL, DURATION, FPS)
+    build_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_frames = [make_frame_from_timeline(frame_closed, frame_open, timeline, FPS, t) for t in frame_times]
+    new_elapsed = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(old_frames, new_frames) if a is not b)
+    return n_frames, old_elapsed, build_elapsed, new_elapsed, mismatches
+
+
+def main():
+    for seed in range(3):
+        combined_times = syntheticWordTimes(DURATION, seed)
+        n_frames, old_elapsed, build_elapsed, new_elapsed, mismatches = benchmark(combined_times)
+        print(f"seed={seed} intervals={len(combined_times)} frames={n_frames}")
+        print(f"  linear scan:  {old_elapsed:.3f}s ({old_elapsed / n_frames * 1e6:.1f} us/frame)")
+        print(f"  timeline:     {build_elapsed * 1000:.2f}ms build + {new_elapsed:.3f}s lookup "
+              f"({new_elapsed / n_frames * 1e6:.2f} us/frame)")
+        print(f"  speedup:      {old_elapsed / (build_elapsed + new_elapsed):.0f}x, mismatched frames: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
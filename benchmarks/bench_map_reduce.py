@@ -0,0 +1,74 @@
+"""
+Benchmark: single-prompt vs map-reduce script generation on long notes
+
+Generates lecture notes of increasing length (in the "--- Page N ---" form
+parse_notes produces) and writes a 60s script with the offline
+FakeChatModel, once with the whole notes in one prompt and once through
+condenseNotes at several summary concurrencies. Reports LLM calls, total
+prompt/completion tokens and end-to-end latency. The fake model charges
+latency per prompt and completion token, like a real one.
+
+Run from the repository root:
+    python -m benchmarks.bench_map_reduce
+"""
+
+import contextlib
+import io
+import os
+import time
+
+os.environ.setdefault("KITTY_FAKE_LLM", "1")
+
+import main
+from script.fake_llm import FakeChatModel
+from script.summarize import callLLM, condenseNotes, countTokens
+
+PAGE_COUNTS = [50, 200, 400]
+CONCURRENCY = [1, 4, 8]
+CONTEXT_LIMIT_TOKENS = 128000  # gpt-4o
+SENTENCE = "Binary search compares the target with the middle element and discards half of the sorted list. "
+
+
+def makeNotes(n_pages, sentences_per_page=30):
+    return "\n\n".join(f"--- Page {page} ---\n" + SENTENCE * sentences_per_page for page in range(1, n_pages + 1))
+
+
+def fakeLLM():
+    return FakeChatModel(first_token_delay=0.3, seconds_per_prompt_token=0.00002, seconds_per_token=0.002)
+
+
+def direct(notes):
+    start = time.perf_counter()
+    _, call = callLLM(fakeLLM(), main.build_script_prompt(notes, "300 words"), "script")
+    return [call], time.perf_counter() - start
+
+
+def mapReduce(notes, concurrency):
+    start = time.perf_counter()
+    condensed, calls = condenseNotes(fakeLLM(), notes, concurrency=concurrency)
+    _, call = callLLM(fakeLLM(), main.build_script_prompt(condensed, "300 words"), "script")
+    return calls + [call], time.perf_counter() - start
+
+
+def report(label, calls, seconds):
+    prompt_tokens = sum(call["prompt_tokens"] for call in calls)
+    completion_tokens = sum(call["completion_tokens"] for call in calls)
+    largest_prompt = max(call["prompt_tokens"] for call in calls)
+    note = "  exceeds gpt-4o context" if largest_prompt > CONTEXT_LIMIT_TOKENS else ""
+    print(f"   {label:<18} {len(calls):>5}  {prompt_tokens:>9} / {completion_tokens:<7}  {largest_prompt:>9}  {seconds:>7.2f}s{note}")
+
+
+def main_():
+    for n_pages in PAGE_COUNTS:
+        notes = makeNotes(n_pages)
+        print(f"{n_pages} pages, ~{countTokens(notes)} tokens")
+        print("   mode               calls  prompt / completion tokens  largest prompt  latency")
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = [("single prompt", *direct(notes))]
+            results += [(f"map-reduce x{c}", *mapReduce(notes, c)) for c in CONCURRENCY]
+        for label, calls, seconds in results:
+            report(label, calls, seconds)
+
+
+if __name__ == "__main__":
+    main_()
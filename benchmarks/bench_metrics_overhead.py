@@ -0,0 +1,52 @@
+"""
+Benchmark: cost of measuring a stage
+
+Times metrics.measure around an empty block (wall, CPU and the histogram
+update) with a realistic number of stages in the histograms, one snapshot
+save (done in the background, at most once a second), and the /metrics
+rendering of the merged snapshots. A run records ~15 spans, so the
+per-span cost is what each run pays.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics_overhead
+"""
+
+import tempfile
+import time
+
+from metrics import metrics
+from metrics.metrics import Metrics, collectSnapshots, measure, prometheusText
+
+SPANS = 2000
+STAGES = [
+    "parse_notes", "prepare_assets", "generate_script", "synthesize_voiceover", "generate_voiceover",
+    "save_script_to_file", "generate_video", "output_result", "video.load_audio", "video.load_images",
+    "video.align.whisper", "video.timeline", "video.subtitles", "video.render.ffmpeg", "video.hls",
+]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        metrics._metrics = Metrics(directory)
+
+        start = time.perf_counter()
+        for index in range(SPANS):
+            with measure(STAGES[index % len(STAGES)]):
+                pass
+        per_span = (time.perf_counter() - start) / SPANS
+
+        start = time.perf_counter()
+        metrics._metrics.flush()
+        flush = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text = prometheusText(*collectSnapshots(directory))
+        scrape = time.perf_counter() - start
+
+    print(f"measure(): {per_span * 1e6:.0f}µs per span ({per_span * len(STAGES) * 1e3:.2f}ms per run of {len(STAGES)} stages)")
+    print(f"snapshot:  {flush * 1e3:.2f}ms per background save")
+    print(f"/metrics:  {scrape * 1e3:.2f}ms to merge and render {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    main()
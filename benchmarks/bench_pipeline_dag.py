@@ -0,0 +1,90 @@
+"""
+Benchmark: linear vs parallel create_pipeline
+
+Builds the graph both ways with every external service stubbed out by
+sleeps that stand in for its latency, runs it, and reports end-to-end
+latency. In the linear graph the render warm-up (image decoding, Whisper
+load) happens inside generate_video; in the DAG it overlaps the LLM call.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline_dag
+"""
+
+import threading
+import time
+
+import main
+
+LATENCY = {
+    "parse_notes": 0.05,
+    "generate_script": 1.5,    # LLM call
+    "generate_voiceover": 1.0,  # TTS call
+    "save_script_to_file": 0.2,
+    "warm_up": 1.2,             # image decode + Whisper load
+    "generate_video": 2.0,      # alignment + encode
+}
+RUNS = 3
+
+
+def stubNodes():
+    warmed = threading.Event()
+    warm_up_started = threading.Event()
+
+    def stub(name, updates):
+        def node(state):
+            time.sleep(LATENCY[name])
+            state.update(updates)
+            return state
+        return node
+
+    def warmUp():
+        time.sleep(LATENCY["warm_up"])
+        warmed.set()
+
+    def prepare_assets(state):
+        # Like the real node: start warming up in the background and return
+        warm_up_started.set()
+        threading.Thread(target=warmUp, daemon=True).start()
+        return state
+
+    def generate_video(state):
+        if not warm_up_started.is_set():
+            warmUp()
+        warmed.wait()
+        time.sleep(LATENCY["generate_video"])
+        state["video_path"] = "output/kitty_explains.mp4"
+        return state
+
+    return {
+        "parse_notes": stub("parse_notes", {"run_id": "bench"}),
+        "generate_script": stub("generate_script", {"pure_script": "Kitty!", "script_with_scenes": "[Scene 1] Kitty!"}),
+        "generate_voiceover": stub("generate_voiceover", {"audio_path": "output/voiceover.mp3"}),
+        "save_script_to_file": stub("save_script_to_file", {}),
+        "prepare_assets": prepare_assets,
+        "generate_video": generate_video,
+        "output_result": lambda state: state,
+    }
+
+
+def timeGraph(parallel):
+    elapsed = []
+    for _ in range(RUNS):
+        for name, node in stubNodes().items():
+            setattr(main, name, node)
+        graph = main.create_pipeline(parallel=parallel)
+        start = time.perf_counter()
+        result = graph.invoke({"notes": "benchmark notes", "duration": "30s", "error": ""})
+        elapsed.append(time.perf_counter() - start)
+        assert result.get("video_path") and not result.get("error"), result
+    return min(elapsed)
+
+
+def main_():
+    linear = timeGraph(parallel=False)
+    dag = timeGraph(parallel=True)
+    print(f"linear: {linear:.2f}s")
+    print(f"dag:    {dag:.2f}s ({(1 - dag / linear) * 100:.0f}% lower)")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,249 @@
+"""
+Benchmark: the whole pipeline end to end, offline
+
+Runs graph.invoke with offline fakes for every external service:
+script/fake_llm.py stands in for ChatOpenAI (KITTY_FAKE_LLM) and
+voiceover/fake_tts.py for ElevenLabs (KITTY_FAKE_TTS), with realistic
+latencies and speech audio (the narration fixture's frames, repeated).
+Extraction, alignment and rendering are the real thing. The matrix covers
+every duration (30s/60s/90s) × input (text notes, a generated PDF, a
+generated PPTX) × alignment mode (whisper and energy, or energy alone
+when Whisper is not installed), each at several concurrency levels (that
+many runs started together).
+
+For every cell it reports total latency (p50/p95/max), throughput
+(videos/minute), per-stage wall and CPU time (from the runs' traces) and
+peak RSS of the pipeline and render worker processes. Everything is
+written to a JSON file named after the commit, and --compare prints the
+changes against an earlier file:
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline_e2e
+    python -m benchmarks.bench_pipeline_e2e --durations 30s --inputs text,pdf --concurrency 1,2
+    python -m benchmarks.bench_pipeline_e2e --alignment whisper,tts,energy
+    python -m benchmarks.bench_pipeline_e2e --compare output/benchmarks/e2e-<commit>.json
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+_scratch = tempfile.mkdtemp(prefix="kitty-bench-")
+os.environ.update({
+    "KITTY_FAKE_LLM": "1",
+    "KITTY_FAKE_TTS": "1",
+    "KITTY_TRACE": "on",
+    "KITTY_CACHE": "off",  # every run does the full work
+    "KITTY_WORKSPACE_DIR": os.path.join(_scratch, "runs"),
+    "KITTY_BLOB_DIR": os.path.join(_scratch, "uploads"),
+    "KITTY_METRICS_DIR": os.path.join(_scratch, "metrics"),
+})
+WHISPER_INSTALLED = importlib.util.find_spec("whisper") is not None
+if not WHISPER_INSTALLED:
+    # Read by the render workers too: they load Whisper up front in whisper mode
+    os.environ.setdefault("ALIGNMENT_MODE", "energy")
+
+import main
+from benchmarks.bench_extraction import makePdf
+from blobstore.blobstore import getBlobStore
+from scheduler.scheduler import RENDER_WORKERS, getScheduler
+from video.video import ALIGN_ENERGY, ALIGN_WHISPER
+
+DURATIONS = ["30s", "60s", "90s"]
+INPUTS = ["text", "pdf", "pptx"]
+ALIGNMENTS = [ALIGN_WHISPER, ALIGN_ENERGY] if WHISPER_INSTALLED else [ALIGN_ENERGY]
+CONCURRENCY = [1, 2, 4]
+PAGES = 12  # of the generated PDF / PPTX
+OUTPUT_DIR = "output/benchmarks"
+
+NOTES = """Topic: Binary Search
+- Efficient algorithm for finding an item in a sorted list
+- Works by repeatedly dividing the search interval in half
+- Time complexity: O(log n); the list must be sorted
+- Compare the target with the middle element, then keep the half that can contain it
+- Much faster than linear search for large datasets, like finding a word in a dictionary
+"""
+
+
+def makePptx(n_slides):
+    from pptx import Presentation
+
+    presentation = Presentation()
+    for slide_number in range(n_slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = f"Binary search, part {slide_number + 1}"
+        slide.placeholders[1].text = NOTES
+    out = io.BytesIO()
+    presentation.save(out)
+    return out.getvalue()
+
+
+def gitCommit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def runOnce(duration, input_type, alignment_mode, file_refs):
+    inputs = {
+        "run_id": f"bench-{uuid.uuid4().hex[:12]}",
+        "duration": duration,
+        "notes": NOTES if input_type == "text" else "",
+        "file_type": input_type,
+        "file_ref": file_refs.get(input_type, ""),
+        "alignment_mode": alignment_mode,
+        "error": "",
+    }
+    start = time.perf_counter()
+    result = main.graph.invoke(inputs)
+    return {
+        "seconds": time.perf_counter() - start,
+        "error": result.get("error") or ("" if result.get("video_path") else "no video"),
+        "spans": result.get("trace") or [],
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def summarize(runs, wall_seconds):
+    ok = [run for run in runs if not run["error"]]
+    seconds = [run["seconds"] for run in ok]
+    stages = defaultdict(lambda: {"wall": [], "cpu": []})
+    peak_rss = {"pipeline": 0, "render_worker": 0}
+    for run in ok:
+        for span in run["spans"]:
+            stages[span["stage"]]["wall"].append(span["wall_seconds"])
+            stages[span["stage"]]["cpu"].append(span["cpu_seconds"])
+            process = "render_worker" if span["stage"].startswith("video.") else "pipeline"
+            peak_rss[process] = max(peak_rss[process], span.get("process_peak_rss_bytes") or 0)
+    return {
+        "runs": len(runs),
+        "errors": [run["error"] for run in runs if run["error"]],
+        "total_seconds": {
+            "p50": statistics.median(seconds) if seconds else None,
+            "p95": percentile(seconds, 0.95) if seconds else None,
+            "max": max(seconds, default=None),
+        },
+        "videos_per_minute": len(ok) / wall_seconds * 60,
+        "stages": {
+            stage: {"wall_seconds": statistics.mean(values["wall"]), "cpu_seconds": statistics.mean(values["cpu"])}
+            for stage, values in sorted(stages.items())
+        },
+        "peak_rss_mb": {process: peak / 2 ** 20 for process, peak in peak_rss.items()},
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    # Older files ran every cell in the one alignment mode of their config
+    default_alignment = baseline["config"].get("alignment_mode")
+    before = {(cell["duration"], cell["input"], cell.get("alignment", default_alignment), cell["concurrency"]): cell
+              for cell in baseline["cells"]}
+    print(f"\nvs {baseline['commit']} ({baseline_path}):")
+    print("cell                         p50 total            videos/min           stages changed by >10%")
+    for cell in results["cells"]:
+        old = before.get((cell["duration"], cell["input"], cell["alignment"], cell["concurrency"]))
+        if old is None or not old["total_seconds"]["p50"] or not cell["total_seconds"]["p50"]:
+            continue
+        changed = []
+        for stage, stats in cell["stages"].items():
+            old_stage = old["stages"].get(stage)
+            if old_stage and old_stage["wall_seconds"] > 0.05:
+                change = stats["wall_seconds"] / old_stage["wall_seconds"] - 1
+                if abs(change) > 0.1:
+                    changed.append(f"{stage} {change:+.0%}")
+        p50, old_p50 = cell["total_seconds"]["p50"], old["total_seconds"]["p50"]
+        rate, old_rate = cell["videos_per_minute"], old["videos_per_minute"]
+        print(f"{cell['duration']:<4} {cell['input']:<5} {cell['alignment']:<7} x{cell['concurrency']:<8} "
+              f"{old_p50:>6.1f}s → {p50:>6.1f}s {p50 / old_p50 - 1:>+5.0%}  "
+              f"{old_rate:>5.2f} → {rate:>5.2f} {rate / old_rate - 1:>+5.0%}  {', '.join(changed)}")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--durations", default=",".join(DURATIONS))
+    parser.add_argument("--inputs", default=",".join(INPUTS))
+    parser.add_argument("--alignment", default=",".join(ALIGNMENTS), help="alignment modes (whisper, tts, energy)")
+    parser.add_argument("--concurrency", default=",".join(map(str, CONCURRENCY)))
+    parser.add_argument("--repeat", type=int, default=1, help="batches per cell (runs per cell = concurrency x repeat)")
+    parser.add_argument("--output", help=f"results file (default: {OUTPUT_DIR}/e2e-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    durations = args.durations.split(",")
+    inputs = args.inputs.split(",")
+    alignments = args.alignment.split(",")
+    if ALIGN_WHISPER in alignments and not WHISPER_INSTALLED:
+        parser.error("whisper alignment needs openai-whisper installed")
+    concurrency_levels = [int(level) for level in args.concurrency.split(",")]
+    file_refs = {
+        "pdf": getBlobStore().put(makePdf(PAGES)),
+        "pptx": getBlobStore().put(makePptx(PAGES)),
+    }
+
+    commit = gitCommit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {"alignments": alignments, "render_workers": RENDER_WORKERS, "repeat": args.repeat, "pages": PAGES},
+        "cells": [],
+    }
+
+    # Starts the render workers and imports everything once, outside the measurements
+    warm_up = runOnce("30s", "text", alignments[0], file_refs)
+    results["warm_up_seconds"] = warm_up["seconds"]
+    print(f"warm-up run: {warm_up['seconds']:.1f}s {warm_up['error']}")
+
+    print("duration input  alignment  concurrency  p50      p95      max      videos/min  errors  slowest stages (mean wall)")
+    for duration in durations:
+        for input_type in inputs:
+            for alignment in alignments:
+                for concurrency in concurrency_levels:
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        runs = list(pool.map(
+                            lambda _: runOnce(duration, input_type, alignment, file_refs),
+                            range(concurrency * args.repeat),
+                        ))
+                    cell = {"duration": duration, "input": input_type, "alignment": alignment, "concurrency": concurrency,
+                            **summarize(runs, time.perf_counter() - start)}
+                    results["cells"].append(cell)
+
+                    total = cell["total_seconds"]
+                    slowest = sorted(cell["stages"].items(), key=lambda item: -item[1]["wall_seconds"])[:3]
+                    print(f"{duration:<8} {input_type:<7} {alignment:<10} {concurrency:<12} "
+                          + "  ".join(f"{value:>6.1f}s" if value is not None else "      -" for value in total.values())
+                          + f"  {cell['videos_per_minute']:>10.2f}  {len(cell['errors']):>6}  "
+                          + ", ".join(f"{stage} {stats['wall_seconds']:.1f}s" for stage, stats in slowest))
+
+    output = args.output or os.path.join(OUTPUT_DIR, f"e2e-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    getScheduler().shutdown()
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,113 @@
+"""
+Benchmark: how soon playback can start on a slow network
+
+Renders talking-kitty videos of each length with the ffmpeg compositor
+(synthetic word timings, a sine tone as the voiceover) and compares what a
+player must download before the first frame:
+  mp4 (moov at end)  default muxing: the index comes last, so everything
+  mp4 (faststart)    the index, then the first segment's worth of media
+  hls                the playlist and the first segment
+and how long that takes at classroom-network bandwidths. Also times the
+HLS remux.
+
+Run from the repository root:
+    python -m benchmarks.bench_progressive_playback
+"""
+
+import os
+import struct
+import subprocess
+import tempfile
+import time
+
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from benchmarks.bench_make_frame import syntheticWordTimes
+from video.video import (
+    FPS, HLS_SEGMENT_SECONDS, buildMouthTimeline, fetchStaticImages, saveWithCompositor,
+    writeConcatList, writeHls, writeStillFrames, writeToSrtFile,
+)
+from workspace.workspace import HLS_PLAYLIST
+
+CLOSED_PNG = "video/cat-closed.png"
+OPEN_PNG = "video/cat-open.png"
+FLAP_INTERVAL = 0.1
+DURATIONS = [30.0, 90.0, 180.0]
+BANDWIDTHS_MBIT = [1, 4]
+
+
+def topLevelBoxes(data):
+    """[(type, start, end)] of the top-level MP4 boxes"""
+    boxes = []
+    position = 0
+    while position + 8 <= len(data):
+        size, kind = struct.unpack(">I4s", data[position:position + 8])
+        if size == 1:
+            size = struct.unpack(">Q", data[position + 8:position + 16])[0]
+        elif size == 0:
+            size = len(data) - position
+        boxes.append((kind.decode("latin-1"), position, position + size))
+        position += size
+    return boxes
+
+
+def bytesBeforeFirstFrame(mp4_file, duration):
+    """Everything up to the end of the moov box, plus the first segment's
+    worth of media data if the moov comes first"""
+    data = open(mp4_file, "rb").read()
+    boxes = {kind: (start, end) for kind, start, end in topLevelBoxes(data)}
+    moov_end = boxes["moov"][1]
+    mdat_start, mdat_end = boxes["mdat"]
+    if moov_end > mdat_start:
+        return len(data)
+    return moov_end + int((mdat_end - mdat_start) * min(1.0, HLS_SEGMENT_SECONDS / duration))
+
+
+def renderVideo(duration, work_dir):
+    audio_path = os.path.join(work_dir, "voiceover.mp3")
+    subprocess.run([get_ffmpeg_exe(), "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=frequency=220:duration={duration}",
+                    "-c:a", "libmp3lame", audio_path], check=True)
+    word_times = syntheticWordTimes(duration)
+    srt_file = os.path.join(work_dir, "subs.srt")
+    writeToSrtFile(srt_file, [
+        (start, min(duration, start + 3.0), "Kitty explains binary search")
+        for start in range(0, int(duration), 3)
+    ])
+    timeline = buildMouthTimeline(word_times, FLAP_INTERVAL, duration, FPS)
+    list_file = os.path.join(work_dir, "frames.ffconcat")
+    writeConcatList(list_file, *writeStillFrames(*fetchStaticImages(CLOSED_PNG, OPEN_PNG), work_dir), timeline)
+    output_file = os.path.join(work_dir, f"kitty-{duration:.0f}.mp4")
+    saveWithCompositor(list_file, int(duration * FPS), audio_path, srt_file, output_file)
+    return output_file
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        header = "".join(f"  @{mbit} Mbit/s" for mbit in BANDWIDTHS_MBIT)
+        print(f"video  output              size MB  before 1st frame MB{header}")
+        for duration in DURATIONS:
+            faststart = renderVideo(duration, work_dir)
+            # Same streams with the default muxing (moov written last)
+            moov_last = faststart.replace(".mp4", "-moov-last.mp4")
+            subprocess.run([get_ffmpeg_exe(), "-y", "-loglevel", "error", "-i", faststart, "-c", "copy", moov_last], check=True)
+
+            hls_start = time.perf_counter()
+            playlist = writeHls(faststart, os.path.join(work_dir, f"hls-{duration:.0f}"))
+            hls_seconds = time.perf_counter() - hls_start
+            hls_dir = os.path.dirname(playlist)
+            first_segment = sorted(name for name in os.listdir(hls_dir) if name != HLS_PLAYLIST)[0]
+            hls_size = sum(os.path.getsize(os.path.join(hls_dir, name)) for name in os.listdir(hls_dir))
+
+            rows = [
+                ("mp4 (moov at end)", os.path.getsize(moov_last), bytesBeforeFirstFrame(moov_last, duration)),
+                ("mp4 (faststart)", os.path.getsize(faststart), bytesBeforeFirstFrame(faststart, duration)),
+                (f"hls (remux {hls_seconds:.2f}s)", hls_size,
+                 os.path.getsize(playlist) + os.path.getsize(os.path.join(hls_dir, first_segment))),
+            ]
+            for name, size, startup in rows:
+                waits = "".join(f"  {startup * 8 / (mbit * 1e6):>9.2f}s" for mbit in BANDWIDTHS_MBIT)
+                print(f"{duration:>4.0f}s  {name:<19} {size / 1e6:>7.2f}  {startup / 1e6:>19.3f}{waits}")
+
+
+if __name__ == "__main__":
+    main()
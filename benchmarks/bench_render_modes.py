@@ -0,0 +1,39 @@
+"""
+Benchmark: two-pass vs single-pass rendering
+
+Renders the same voiceover with both generateVideo render modes and reports
+wall-clock render time and bytes written for each.
+
+Run from the repository root:
+    python -m benchmarks.bench_render_modes path/to/voiceover.mp3
+"""
+
+import os
+import sys
+
+from video.video import generateVideo, RENDER_TWO_PASS, RENDER_SINGLE_PASS
+
+CLOSED_PNG = "video/cat-closed.png"
+OPEN_PNG = "video/cat-open.png"
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m benchmarks.bench_render_modes <voiceover.mp3>")
+        sys.exit(1)
+    audio_path = sys.argv[1]
+    os.makedirs("output", exist_ok=True)
+
+    results = []
+    for mode in (RENDER_TWO_PASS, RENDER_SINGLE_PASS):
+        output_file = f"output/bench_{mode}.mp4"
+        results.append(generateVideo(CLOSED_PNG, OPEN_PNG, "output/bench_intermediate.mp4", output_file, audio_path, render_mode=mode))
+        os.remove(output_file)
+
+    print("\nmode          seconds   bytes written")
+    for stats in results:
+        print(f"{stats['mode']:<12}  {stats['seconds']:>7.2f}   {stats['bytes_written']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: what a retried run pays after a failure
+
+Runs the pipeline offline (fake LLM and TTS, as in bench_pipeline_e2e)
+with a fault injected into one stage: the LLM call, the TTS call, or the
+render. It then retries with the same run_id, which continues from the
+completion markers left in the workspace. For each case it reports how
+long the retry took and the LLM tokens and TTS characters it paid for,
+next to a fresh run. It also retries a run that already succeeded, which
+should reuse everything.
+
+Run from the repository root:
+    python -m benchmarks.bench_resume
+"""
+
+import time
+import uuid
+from contextlib import contextmanager
+from unittest import mock
+
+from benchmarks.bench_pipeline_e2e import NOTES  # sets up the offline environment first
+import main
+
+DURATION = "30s"
+
+
+class InjectedFault(RuntimeError):
+    pass
+
+
+def fail(*args, **kwargs):
+    raise InjectedFault("injected fault")
+
+
+@contextmanager
+def fault(stage):
+    """Make `stage` ("script", "voiceover" or "video") fail"""
+    if stage == "script":
+        target = mock.patch.object(main, "streamLLM", side_effect=fail)
+    elif stage == "voiceover":
+        target = mock.patch.object(main, "generateSpeechChunked", side_effect=fail)
+    else:
+        target = mock.patch.object(main.getScheduler(), "render", side_effect=fail)
+    with target:
+        yield
+
+
+@contextmanager
+def metered():
+    """Count what the LLM and TTS calls inside the block would cost"""
+    cost = {"llm_calls": 0, "llm_tokens": 0, "tts_calls": 0, "tts_characters": 0}
+    stream_llm, speech = main.streamLLM, main.generateSpeechChunked
+
+    def counted_llm(*args, **kwargs):
+        script, call = stream_llm(*args, **kwargs)
+        cost["llm_calls"] += 1
+        cost["llm_tokens"] += call["prompt_tokens"] + call["completion_tokens"]
+        return script, call
+
+    def counted_speech(text, *args, **kwargs):
+        cost["tts_calls"] += 1
+        cost["tts_characters"] += len(text)
+        return speech(text, *args, **kwargs)
+
+    with mock.patch.object(main, "streamLLM", counted_llm), mock.patch.object(main, "generateSpeechChunked", counted_speech):
+        yield cost
+
+
+def attempt(run_id):
+    with metered() as cost:
+        start = time.perf_counter()
+        result = main.run_pipeline(NOTES, run_id=run_id, duration=DURATION)
+        seconds = time.perf_counter() - start
+    return result, seconds, cost
+
+
+def main_():
+    # Start the render workers and import everything outside the measurement
+    main.run_pipeline(NOTES, duration=DURATION)
+
+    rows = []
+    fresh_id = f"bench-{uuid.uuid4().hex[:12]}"
+    result, seconds, cost = attempt(fresh_id)
+    assert result.get("video_path"), result.get("error")
+    rows.append(("fresh run", seconds, cost))
+
+    for stage in ["script", "voiceover", "video"]:
+        run_id = f"bench-{uuid.uuid4().hex[:12]}"
+        with fault(stage):
+            failed, _, _ = attempt(run_id)
+        assert failed.get("error"), f"the {stage} fault didn't fail the run"
+        result, seconds, cost = attempt(run_id)
+        assert result.get("video_path") and not result.get("error"), result.get("error")
+        rows.append((f"retry after {stage} failed", seconds, cost))
+
+    result, seconds, cost = attempt(fresh_id)
+    assert result.get("video_path"), result.get("error")
+    rows.append(("retry of a finished run", seconds, cost))
+
+    fresh_seconds = rows[0][1]
+    print(f"\n{DURATION} video, ALIGNMENT_MODE={main.ALIGNMENT_MODE}")
+    print("case                          seconds   vs fresh  LLM calls  LLM tokens  TTS calls  TTS chars")
+    for name, seconds, cost in rows:
+        print(f"{name:<28} {seconds:>8.1f}s  {seconds / fresh_seconds:>8.0%}  {cost['llm_calls']:>9}  "
+              f"{cost['llm_tokens']:>10}  {cost['tts_calls']:>9}  {cost['tts_characters']:>9}")
+    main.getScheduler().shutdown()
+
+
+if __name__ == "__main__":
+    main_()
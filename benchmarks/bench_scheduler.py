@@ -0,0 +1,70 @@
+"""
+Load test: JobScheduler throughput vs render worker count
+
+Pushes a burst of synthetic jobs through the scheduler. Each job sleeps in
+the "llm" and "tts" stages (stubbed network calls) and then burns CPU in a
+render worker. Reports throughput, queue wait times and rejections for
+several worker counts. Throughput scales with workers up to the number of
+CPU cores.
+
+Run from the repository root:
+    python -m benchmarks.bench_scheduler
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler.scheduler import JobScheduler, QueueFullError
+
+JOBS = 24
+LLM_SECONDS = 0.3
+TTS_SECONDS = 0.2
+RENDER_SECONDS = 0.5
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def fakeRender(seconds):
+    # CPU-bound stand-in for Whisper + x264
+    deadline = time.process_time() + seconds
+    total = 0
+    while time.process_time() < deadline:
+        total += sum(range(1000))
+    return total
+
+
+def runJob(scheduler):
+    try:
+        scheduler.admit()
+        with scheduler.stage("llm"):
+            time.sleep(LLM_SECONDS)
+        with scheduler.stage("tts"):
+            time.sleep(TTS_SECONDS)
+        scheduler.render(fakeRender, RENDER_SECONDS)
+        return True
+    except QueueFullError:
+        return False
+
+
+def main():
+    print(f"{os.cpu_count()} CPU(s), {JOBS} jobs: llm {LLM_SECONDS}s, tts {TTS_SECONDS}s, render {RENDER_SECONDS}s CPU")
+    print("workers  jobs/min  done  rejected  render wait avg/max   llm wait avg")
+    for workers in WORKER_COUNTS:
+        scheduler = JobScheduler(render_workers=workers, render_queue_size=JOBS, stage_limits={"llm": 8, "tts": 4})
+        scheduler.render(fakeRender, 0.01)  # start the pool outside the measurement
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=JOBS) as clients:
+            results = list(clients.map(lambda _: runJob(scheduler), range(JOBS)))
+        elapsed = time.perf_counter() - start
+
+        metrics = scheduler.metrics()
+        scheduler.shutdown()
+        done = sum(results)
+        print(f"{workers:<8} {done / elapsed * 60:>8.1f}  {done:>4}  {metrics['render']['rejected']:>8}  "
+              f"{metrics['render']['wait_seconds_avg']:>8.2f}s/{metrics['render']['wait_seconds_max']:.2f}s"
+              f"   {metrics['llm']['wait_seconds_avg']:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: streamed script generation and early voiceover
+
+Writes scripts of each length with the offline FakeChatModel (streamed)
+and voices them with FakeElevenLabs. Reports time to first token, time
+until the ---PURE SCRIPT--- section is complete and when the voiceover is
+ready: after the whole reply (blocking call, then TTS) vs started as soon
+as the pure script is parsed (what generate_script does).
+
+Run from the repository root:
+    python -m benchmarks.bench_script_stream
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from script.fake_llm import FakeChatModel
+from script.streaming import ScriptStreamParser, splitScript, streamLLM
+from voiceover.fake_tts import FakeElevenLabs
+from voiceover.voiceover import generateSpeech
+
+LENGTHS = ["150 words", "300 words", "450 words"]
+PROMPT = """Write a script for a 'Kitty Explains' video on the following topic: binary search
+The script must be around {words}
+Format your response exactly like this:
+---PURE SCRIPT---
+---SCRIPT WITH SCENES---"""
+
+
+def fakeLLM():
+    return FakeChatModel(first_token_delay=0.5, seconds_per_token=0.012)  # ~80 tokens/s
+
+
+def fakeTTS():
+    return FakeElevenLabs(first_byte_delay=0.4, chunk_delay=0.02)
+
+
+def blocking(prompt, audio_path):
+    start = time.perf_counter()
+    text = fakeLLM().invoke(prompt).content
+    script_seconds = time.perf_counter() - start
+    generateSpeech(splitScript(text)[0], audio_path, client=fakeTTS())
+    return script_seconds, time.perf_counter() - start
+
+
+def streamed(prompt, audio_path):
+    start = time.perf_counter()
+    parser = ScriptStreamParser()
+    marks = {}
+    voiceover = []
+
+    def on_token(token):
+        _, pure_script = parser.feed(token)
+        if pure_script is not None:
+            marks["pure_script"] = time.perf_counter() - start
+            thread = threading.Thread(target=generateSpeech, args=(pure_script, audio_path), kwargs={"client": fakeTTS()})
+            thread.start()
+            voiceover.append(thread)
+
+    _, stats = streamLLM(fakeLLM(), prompt, "script", on_token=on_token)
+    script_seconds = time.perf_counter() - start
+    for thread in voiceover:
+        thread.join()
+    return stats["first_token_seconds"], marks["pure_script"], script_seconds, time.perf_counter() - start
+
+
+def main():
+    audio_path = os.path.join(tempfile.mkdtemp(prefix="kitty-bench-"), "voiceover.mp3")
+    print("length      blocking: script / voiceover ready   streamed: first token / pure script / script / voiceover ready")
+    for words in LENGTHS:
+        prompt = PROMPT.format(words=words)
+        script_seconds, ready_seconds = blocking(prompt, audio_path)
+        first_token, pure_script, streamed_script, streamed_ready = streamed(prompt, audio_path)
+        print(f"{words:<11} {script_seconds:>14.2f}s / {ready_seconds:.2f}s"
+              f"{first_token:>27.2f}s / {pure_script:.2f}s / {streamed_script:.2f}s / {streamed_ready:.2f}s"
+              f"  ({(1 - streamed_ready / ready_seconds) * 100:.0f}% sooner)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: one TTS request vs sentence-chunked concurrent synthesis
+
+Voices scripts of each length with the offline FakeElevenLabs client, whose
+requests cost a fixed latency plus synthesis time proportional to the audio
+produced. Compares a single generateSpeech(stream=False) request with
+generateSpeechChunked at several concurrencies, and checks that the
+joined MP3 has the summed duration of its parts.
+
+Run from the repository root:
+    python -m benchmarks.bench_tts_chunked
+"""
+
+import os
+import tempfile
+
+from voiceover.fake_tts import FakeElevenLabs
+from voiceover.mp3 import audioFrames, duration
+from voiceover.voiceover import generateSpeech, generateSpeechChunked
+
+WORD_COUNTS = [150, 300, 450]
+CONCURRENCY = [1, 2, 4, 8]
+SENTENCE = "Kitty jumps to the middle box and checks whether the toy is there."
+
+
+def makeScript(n_words):
+    words_per_sentence = len(SENTENCE.split())
+    return " ".join([SENTENCE] * max(1, n_words // words_per_sentence))
+
+
+def fakeTTS():
+    # 0.4s per request, then ~5x faster than real time
+    return FakeElevenLabs(first_byte_delay=0.4, chunk_delay=0.05, chunk_size=4096)
+
+
+def main():
+    audio_path = os.path.join(tempfile.mkdtemp(prefix="kitty-bench-"), "voiceover.mp3")
+    print("words  mode             requests  first audio  total   audio")
+    for n_words in WORD_COUNTS:
+        script = makeScript(n_words)
+        stats = generateSpeech(script, audio_path, stream=False, client=fakeTTS())
+        print(f"{n_words:<6} {'single request':<16} {1:>8}  {stats['first_chunk_seconds']:>10.2f}s  {stats['seconds']:>5.2f}s"
+              f"  {duration(audioFrames(open(audio_path, 'rb').read())):.1f}s")
+        for concurrency in CONCURRENCY:
+            stats = generateSpeechChunked(script, audio_path, client=fakeTTS(), concurrency=concurrency)
+            audio_seconds = duration(audioFrames(open(audio_path, "rb").read()))
+            assert abs(audio_seconds - stats["cues"][-1]["end"]) < 1e-6
+            print(f"{'':<6} {f'chunked x{concurrency}':<16} {stats['requests']:>8}  {stats['first_chunk_seconds']:>10.2f}s"
+                  f"  {stats['seconds']:>5.2f}s  {audio_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark: buffered vs streaming voiceover writes
+
+Runs generateSpeech against the offline FakeElevenLabs client for several
+script lengths and reports time-to-first-byte on disk and peak RSS for the
+buffered (join then write) and streaming (write per chunk) modes. Each
+measurement runs in a fresh process so peak RSS is not shared.
+
+Run from the repository root:
+    python -m benchmarks.bench_tts_stream
+"""
+
+import multiprocessing
+import os
+import resource
+import tempfile
+
+from voiceover.fake_tts import FakeElevenLabs
+
+SCRIPT_WORDS = [150, 450, 5000, 40000]
+
+
+def measure(words, stream):
+    from voiceover.voiceover import generateSpeech
+
+    client = FakeElevenLabs(first_byte_delay=0.3, chunk_delay=0.0005, chunk_size=4096)
+    text = " ".join(["kitty"] * words)
+    with tempfile.TemporaryDirectory() as work_dir:
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats = generateSpeech(text, os.path.join(work_dir, "voiceover.mp3"), stream=stream, client=client)
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return stats, (peak_rss - baseline_rss) / 1024
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    print("words   mode       first byte   total     audio MB   RSS growth MB")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for words in SCRIPT_WORDS:
+            for stream in (False, True):
+                stats, rss_growth = pool.apply(measure, (words, stream))
+                print(f"{words:<7} {'stream' if stream else 'buffered':<10} {stats['first_chunk_seconds']:>9.3f}s "
+                      f"{stats['seconds']:>8.3f}s {stats['bytes'] / 2**20:>9.1f} {rss_growth:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: peak memory of generateVideo for long narrations
+
+Renders silent voiceovers of increasing length with generateVideo, each in a
+fresh process (peak RSS is a high-water mark for the whole process), after a
+one-second warm-up render there so imports and the decoded cat images are
+not counted. Whisper alignment is fed a stand-in result shaped like
+model.transcribe(..., word_timestamps=True) output (segments with tokens,
+log-probabilities and per-word probabilities, ~2.5 words/s), since the
+audio is silent; energy alignment is the real thing.
+
+For every duration it reports the process's peak RSS before and during the
+render, the peak RSS of its ffmpeg children, and what the word timings
+take once aligned: the raw Whisper result, the compact transcription that
+is cached, and the WordTimeline that is kept while the video renders
+(Python allocations, measured with tracemalloc).
+
+Run from the repository root:
+    python -m benchmarks.bench_video_memory
+    python -m benchmarks.bench_video_memory --durations 60,600 --modes whisper
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import tempfile
+import tracemalloc
+from unittest import mock
+
+os.environ.setdefault("KITTY_METRICS", "off")
+
+import video.video as video
+from voiceover.fake_tts import silentMp3
+
+CLOSED_PNG = "video/cat-closed.png"
+OPEN_PNG = "video/cat-open.png"
+DURATIONS = [60, 300, 600]
+MODES = [video.ALIGN_WHISPER, video.ALIGN_ENERGY]
+WORDS_PER_SECOND = 2.5
+WORDS_PER_SEGMENT = 12
+WORDS = "kitty explains how binary search halves the sorted list every single step".split()
+
+
+def whisperResult(duration, seed=0):
+    """What Whisper returns for `duration` seconds of narration, every field included"""
+    rng = random.Random(seed)
+    segments, words, t = [], [], 0.0
+    while t < duration - 0.5:
+        word = " " + rng.choice(WORDS)
+        end = min(duration, t + rng.uniform(0.2, 0.5))
+        words.append({"word": word, "start": round(t, 2), "end": round(end, 2), "probability": rng.random()})
+        t = end + rng.uniform(0.0, 2 * (1 / WORDS_PER_SECOND - 0.35))
+        if len(words) == WORDS_PER_SEGMENT or t >= duration - 0.5:
+            text = "".join(w["word"] for w in words)
+            segments.append({
+                "id": len(segments), "seek": int(words[0]["start"] * 100) // 3000 * 3000,
+                "start": words[0]["start"], "end": words[-1]["end"], "text": text,
+                "tokens": [rng.randrange(50257) for _ in range(len(words) * 4 // 3)],
+                "temperature": 0.0, "avg_logprob": -rng.random(), "compression_ratio": 1 + rng.random(),
+                "no_speech_prob": rng.random() / 10, "words": words,
+            })
+            words = []
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": "en"}
+
+
+def retainedBytes(build):
+    """Python memory held by what `build()` returns"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return held
+
+
+def peakRss(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def render(duration, mode, work_dir):
+    audio_path = os.path.join(work_dir, f"voiceover-{duration}.mp3")
+    with open(audio_path, "wb") as f:
+        f.write(silentMp3(duration))
+    script = " ".join(WORDS[i % len(WORDS)] for i in range(int(duration * WORDS_PER_SECOND)))
+    output_file = os.path.join(work_dir, f"kitty-{duration}.mp4")
+    with mock.patch.object(video, "transcribeWithWhisper", lambda path, model_size: whisperResult(duration)):
+        stats = video.generateVideo(CLOSED_PNG, OPEN_PNG, os.path.join(work_dir, "intermediate.mp4"), output_file,
+                                    audio_path, alignment_mode=mode, script=script)
+    os.remove(output_file)
+    return stats
+
+
+def measureRender(duration, mode, results):
+    """Run in a fresh process: peak RSS of one generateVideo call"""
+    with tempfile.TemporaryDirectory(prefix="kitty-bench-") as work_dir:
+        render(1, mode, work_dir)
+        gc.collect()
+        before = peakRss()
+        stats = render(duration, mode, work_dir)
+        results.put({"before": before, "peak": peakRss(), "ffmpeg": peakRss(resource.RUSAGE_CHILDREN),
+                     "seconds": stats["seconds"], "align_seconds": stats["transcribe_seconds"]})
+
+
+def collect(process, results):
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"render process exited with code {process.exitcode}")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", default=",".join(map(str, DURATIONS)), help="narration lengths in seconds")
+    parser.add_argument("--modes", default=",".join(MODES), help="alignment modes")
+    args = parser.parse_args()
+    durations = [int(d) for d in args.durations.split(",")]
+    modes = args.modes.split(",")
+
+    print("word timings held after alignment (Python allocations)")
+    print("narration  words  whisper result  compact transcription  WordTimeline")
+    for duration in durations:
+        raw = whisperResult(duration)
+        n_words = sum(len(segment["words"]) for segment in raw["segments"])
+        compact = video.compactTranscription(raw)
+        print(f"{duration:>8}s {n_words:>6} {retainedBytes(lambda: whisperResult(duration)) / 2 ** 20:>13.2f}MB "
+              f"{retainedBytes(lambda: video.compactTranscription(raw)) / 2 ** 20:>20.2f}MB "
+              f"{retainedBytes(lambda: video.WordTimeline.fromTranscription(compact)) / 2 ** 20:>12.2f}MB")
+
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for mode in modes:
+        for duration in durations:
+            results = context.Queue()
+            process = context.Process(target=measureRender, args=(duration, mode, results))
+            process.start()
+            result = collect(process, results)
+            process.join()
+            rows.append((mode, duration, result))
+
+    print("\npeak RSS of generateVideo (fresh process per row, after a 1s warm-up render)")
+    print("alignment  narration  RSS before  peak RSS  growth  ffmpeg peak  align s  render s")
+    for mode, duration, r in rows:
+        print(f"{mode:<9} {duration:>9}s {r['before'] / 2 ** 20:>9.0f}MB {r['peak'] / 2 ** 20:>7.0f}MB "
+              f"{(r['peak'] - r['before']) / 2 ** 20:>5.0f}MB {r['ffmpeg'] / 2 ** 20:>10.0f}MB "
+              f"{r['align_seconds']:>8.2f} {r['seconds']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main_()
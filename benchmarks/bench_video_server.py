@@ -0,0 +1,100 @@
+"""
+Load test: video_server under seek-heavy and repeat-load access patterns
+
+Starts video_server.py with uvicorn on a local port, serving a generated
+video from a temporary workspace, and runs several clients (keep-alive
+connections, one thread each) through these patterns:
+  seek (range)      random 512 KiB Range requests, like scrubbing a <video>
+  seek (full file)  the same seeks when every one re-downloads the file
+  reload (full)     plain repeat loads
+  reload (ETag)     repeat loads revalidated with If-None-Match (304s)
+Reports requests/s, bytes transferred, throughput and status codes.
+
+Run from the repository root:
+    python -m benchmarks.bench_video_server
+"""
+
+import http.client
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+VIDEO_MB = 20
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 40
+SEEK_BYTES = 512 * 1024
+
+_workspaces = tempfile.mkdtemp(prefix="kitty-bench-")
+os.environ["KITTY_WORKSPACE_DIR"] = _workspaces
+
+import uvicorn
+
+import video_server
+from workspace.workspace import OUTPUT_FILE, createWorkspace
+
+
+def freePort():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def startServer(port):
+    server = uvicorn.Server(uvicorn.Config(video_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def runClient(port, url, size, pattern, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    statuses = Counter()
+    transferred = 0
+    etag = None
+    for _ in range(REQUESTS_PER_CLIENT):
+        headers = {}
+        if pattern == "seek (range)":
+            start = rng.randrange(0, size - SEEK_BYTES)
+            headers["Range"] = f"bytes={start}-{start + SEEK_BYTES - 1}"
+        elif pattern == "reload (ETag)" and etag:
+            headers["If-None-Match"] = etag
+        connection.request("GET", url, headers=headers)
+        response = connection.getresponse()
+        transferred += len(response.read())
+        etag = response.getheader("ETag") or etag
+        statuses[response.status] += 1
+    connection.close()
+    return statuses, transferred
+
+
+def main():
+    run_id, workspace = createWorkspace("bench")
+    with open(os.path.join(workspace, OUTPUT_FILE), "wb") as f:
+        f.write(os.urandom(VIDEO_MB * 1024 ** 2))
+    size = VIDEO_MB * 1024 ** 2
+    url = f"/video/{run_id}"
+
+    port = freePort()
+    server = startServer(port)
+    print(f"{VIDEO_MB} MB video, {CLIENTS} clients x {REQUESTS_PER_CLIENT} requests")
+    print("pattern            req/s   transferred MB   MB/s    statuses")
+    for pattern in ["seek (range)", "seek (full file)", "reload (full)", "reload (ETag)"]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+            results = list(pool.map(lambda seed: runClient(port, url, size, pattern, seed), range(CLIENTS)))
+        elapsed = time.perf_counter() - start
+        statuses = sum((result[0] for result in results), Counter())
+        transferred = sum(result[1] for result in results) / 1024 ** 2
+        print(f"{pattern:<17} {CLIENTS * REQUESTS_PER_CLIENT / elapsed:>6.0f}   {transferred:>14.1f}  {transferred / elapsed:>6.0f}    {dict(statuses)}")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Regenerates the narration fixture used by bench_alignment and the fake TTS.
+
+narration.mp3 is a short voiceover of narration.txt: voiced syllables (a
+glottal pulse train with pitch jitter and declination, shaped by vowel
+formants) with consonant noise onsets, joined into words with short gaps
+and longer pauses at commas and sentence ends, over a faint room tone.
+Every word's sound is placed by this script, so narration.json holds its
+exact start and end times, plus the character timestamps a TTS provider
+would return for it (the shape ElevenLabs' convert_with_timestamps gives).
+
+The MP3 is 44.1 kHz mono CBR 128 kbps without a bit reservoir or header
+frames, so any run of its frames decodes on its own and can be joined
+with the silent frames of voiceover/fake_tts.py.
+
+Run from the repository root (the output is deterministic):
+    python -m benchmarks.fixtures.make_narration
+"""
+
+import json
+import os
+import re
+import subprocess
+
+import numpy as np
+from imageio_ffmpeg import get_ffmpeg_exe
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_RATE = 22050
+
+SCRIPT = (
+    "Kitty is here to explain binary search. "
+    "You start in the middle of a sorted list, and throw away the half that cannot hold your item. "
+    "Every step halves the list, so even a million items take only twenty steps!"
+)
+
+# (F1, F2, F3) in Hz for a few vowels
+VOWELS = [(730, 1090, 2440), (270, 2290, 3010), (530, 1840, 2480), (570, 840, 2410), (300, 870, 2240), (660, 1720, 2410)]
+LEADING_SILENCE = 0.3
+TRAILING_SILENCE = 0.4
+WORD_GAP = (0.03, 0.09)
+COMMA_PAUSE = 0.25
+SENTENCE_PAUSE = 0.5
+
+
+def syllableCount(word):
+    return max(1, len(re.findall(r"[aeiouy]+", word.lower())))
+
+
+def resonator(frequency, bandwidth, n=1024):
+    """Impulse response of a two-pole resonator"""
+    r = np.exp(-np.pi * bandwidth / SAMPLE_RATE)
+    a1, a2 = 2 * r * np.cos(2 * np.pi * frequency / SAMPLE_RATE), -r * r
+    response = np.zeros(n)
+    response[0] = 1.0
+    response[1] = a1
+    for i in range(2, n):
+        response[i] = a1 * response[i - 1] + a2 * response[i - 2]
+    return response * (1 - r)
+
+
+def envelope(n, attack, release):
+    attack, release = min(attack, n // 2), min(release, n // 2)
+    shape = np.ones(n)
+    shape[:attack] = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, attack))
+    shape[n - release:] = 0.5 + 0.5 * np.cos(np.linspace(0, np.pi, release))
+    return shape
+
+
+def syllable(rng, pitch, seconds, onset):
+    """One syllable: an optional noise onset, then a formant-shaped vowel"""
+    parts = []
+    if onset:
+        n = int(rng.uniform(0.03, 0.06) * SAMPLE_RATE)
+        noise = np.diff(rng.standard_normal(n + 1))  # brighter than white, like a fricative
+        parts.append(0.04 * noise * envelope(n, n // 4, n // 2))
+
+    n = int(seconds * SAMPLE_RATE)
+    excitation = np.zeros(n)
+    t = 0.0
+    while t < n:
+        excitation[int(t)] = 1.0
+        t += SAMPLE_RATE / (pitch * rng.uniform(0.97, 1.03))
+    ir = np.ones(1)
+    for formant, bandwidth in zip(VOWELS[rng.integers(len(VOWELS))], (80, 100, 140)):
+        ir = np.convolve(ir, resonator(formant, bandwidth))[:2048]
+    vowel = np.convolve(excitation, ir)[:n]
+    vowel *= envelope(n, int(0.015 * SAMPLE_RATE), int(0.03 * SAMPLE_RATE)) / (np.abs(vowel).max() + 1e-9)
+    parts.append(0.5 * vowel)
+    return np.concatenate(parts)
+
+
+def synthesize(script, seed=7):
+    """(samples, [(word, start, end)]) for `script`"""
+    rng = np.random.default_rng(seed)
+    words = script.split()
+    pieces = [np.zeros(int(LEADING_SILENCE * SAMPLE_RATE))]
+    position = len(pieces[0])
+    timings = []
+    sentence_start = 0
+    for index, word in enumerate(words):
+        # Pitch falls over each sentence, as in read speech
+        pitch = 135 - 25 * (index - sentence_start) / 12
+        sounds = [syllable(rng, pitch * rng.uniform(0.95, 1.05), rng.uniform(0.12, 0.2), rng.random() < 0.7)
+                  for _ in range(syllableCount(word))]
+        audio = np.concatenate(sounds)
+        pieces.append(audio)
+        timings.append((word, position / SAMPLE_RATE, (position + len(audio)) / SAMPLE_RATE))
+        position += len(audio)
+
+        if re.search(r"[.!?]$", word):
+            gap = SENTENCE_PAUSE
+            sentence_start = index + 1
+        elif word.endswith(","):
+            gap = COMMA_PAUSE
+        else:
+            gap = rng.uniform(*WORD_GAP)
+        if index == len(words) - 1:
+            gap = TRAILING_SILENCE
+        pieces.append(np.zeros(int(gap * SAMPLE_RATE)))
+        position += len(pieces[-1])
+
+    samples = np.concatenate(pieces)
+    samples += 10 ** (-55 / 20) * rng.standard_normal(len(samples))  # room tone
+    return samples, timings
+
+
+def characterTimestamps(script, timings):
+    """Character timestamps for `script`: each word's characters spread over
+    the word, spaces over the gap before the next one"""
+    characters, starts, ends = [], [], []
+    for index, (word, start, end) in enumerate(timings):
+        step = (end - start) / len(word)
+        for i, char in enumerate(word):
+            characters.append(char)
+            starts.append(round(start + i * step, 4))
+            ends.append(round(start + (i + 1) * step, 4))
+        if index < len(timings) - 1:
+            characters.append(" ")
+            starts.append(round(end, 4))
+            ends.append(round(timings[index + 1][1], 4))
+    assert "".join(characters) == " ".join(script.split())
+    return {"characters": characters, "character_start_times_seconds": starts, "character_end_times_seconds": ends}
+
+
+def main():
+    samples, timings = synthesize(SCRIPT)
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+    subprocess.run([
+        get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "-i", "-",
+        "-ar", "44100", "-c:a", "libmp3lame", "-b:a", "128k", "-reservoir", "0",
+        "-write_xing", "0", "-id3v2_version", "0", "-fflags", "+bitexact",
+        os.path.join(FIXTURE_DIR, "narration.mp3"),
+    ], input=pcm, check=True)
+    with open(os.path.join(FIXTURE_DIR, "narration.txt"), "w", encoding="utf-8") as f:
+        f.write(SCRIPT + "\n")
+    with open(os.path.join(FIXTURE_DIR, "narration.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "words": [{"word": word, "start": round(start, 4), "end": round(end, 4)} for word, start, end in timings],
+            "alignment": characterTimestamps(SCRIPT, timings),
+        }, f, indent=1)
+    print(f"{len(timings)} words, {len(samples) / SAMPLE_RATE:.2f}s → {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
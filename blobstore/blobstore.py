@@ -0,0 +1,154 @@
+"""
+Content-addressed store for uploaded files.
+
+Uploads are written once to <root>/<ref[:2]>/<ref>, where ref is the sha256
+of the file, and only the ref travels through the LangGraph State. Node
+hand-offs and checkpoints then stay the same size however large the upload
+is, and uploading the same file twice stores it once.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLOB_DIR = os.path.join(BASE_DIR, os.getenv("KITTY_BLOB_DIR", os.path.join("output", "uploads")))  # relative: to BASE_DIR
+BLOB_MAX_AGE_SECONDS = int(os.getenv("KITTY_UPLOAD_MAX_AGE", str(24 * 3600)))
+UPLOAD_MAX_BYTES = int(os.getenv("KITTY_UPLOAD_MAX_BYTES", str(100 * 1024 ** 2)))
+
+REF_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobTooLargeError(ValueError):
+    """Raised when an upload is bigger than the store accepts"""
+
+
+class BlobWriter:
+    """Hashes and writes a blob chunk by chunk; commit() moves it into place"""
+
+    def __init__(self, store, max_bytes):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        os.makedirs(store.root, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=store.root, prefix=".upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.abort()
+            raise BlobTooLargeError(f"Upload exceeds {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self):
+        """Returns the blob's ref"""
+        self._file.close()
+        ref = self._hash.hexdigest()
+        path = self.store.path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._temp_path, path)  # atomic; an identical blob is simply replaced
+        return ref
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+class BlobStore:
+    def __init__(self, root=BLOB_DIR, max_bytes=UPLOAD_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, ref):
+        # refs come from clients, so never let one escape the store
+        if not REF_PATTERN.match(ref or ""):
+            raise ValueError(f"Invalid blob ref: {ref!r}")
+        return os.path.join(self.root, ref[:2], ref)
+
+    def exists(self, ref):
+        return os.path.exists(self.path(ref))
+
+    def writer(self):
+        return BlobWriter(self, self.max_bytes)
+
+    def put(self, data):
+        writer = self.writer()
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def putStream(self, chunks):
+        """Store an iterable of byte chunks without holding the whole file"""
+        writer = self.writer()
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def read(self, ref):
+        """Raises FileNotFoundError for an unknown (or expired) ref"""
+        path = self.path(ref)
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # keep blobs in use away from cleanup
+        return data
+
+    def cleanup(self, max_age_seconds=BLOB_MAX_AGE_SECONDS):
+        """Remove blobs (and abandoned partial uploads) older than max_age_seconds"""
+        if not os.path.isdir(self.root):
+            return []
+        cutoff = time.time() - max_age_seconds
+        removed = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed.append(name)
+                except FileNotFoundError:
+                    continue
+        return removed
+
+    def startCleanupThread(self, interval_seconds=3600, max_age_seconds=BLOB_MAX_AGE_SECONDS):
+        """Periodically clean old blobs on a daemon thread"""
+        stop = threading.Event()
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    removed = self.cleanup(max_age_seconds)
+                    if removed:
+                        print(f"🧹 Removed {len(removed)} stale upload(s)")
+                except Exception as e:
+                    print(f"⚠️ Upload cleanup failed: {e}")
+                stop.wait(interval_seconds)
+
+        threading.Thread(target=loop, name="blob-cleanup", daemon=True).start()
+        return stop
+
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def getBlobStore():
+    """Process-wide blob store shared by the upload endpoint and the graph"""
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore()
+        return _blob_store
@@ -0,0 +1,172 @@
+"""
+Content-addressed on-disk cache for expensive pipeline artifacts
+(LLM scripts, TTS audio, transcriptions).
+
+Entries live at <root>/<namespace>/<key[:2]>/<key> where the key is a hash
+of everything that determines the artifact. Reads refresh an entry's mtime
+and the least recently used entries are evicted once the cache grows past
+max_bytes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# A relative KITTY_CACHE_DIR is taken from the repository root, like the default
+CACHE_DIR = os.path.join(BASE_DIR, os.getenv("KITTY_CACHE_DIR", os.path.join(".cache", "kitty")))
+CACHE_MAX_BYTES = int(os.getenv("KITTY_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+CACHE_ENABLED = os.getenv("KITTY_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+
+def hashFile(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def makeKey(*parts):
+    """Stable sha256 over JSON-serialisable parts (bytes are hashed first)"""
+    normalised = [hashlib.sha256(part).hexdigest() if isinstance(part, bytes) else part for part in parts]
+    return hashlib.sha256(json.dumps(normalised, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self._lock = threading.Lock()
+        self._size = None  # computed lazily on first write
+
+    def _path(self, namespace, key):
+        return os.path.join(self.root, namespace, key[:2], key)
+
+    def _lookup(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses[namespace] += 1
+            return None
+        with self._lock:
+            self.hits[namespace] += 1
+        return path
+
+    def _store(self, namespace, key, write):
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)  # atomic, so readers never see partial entries
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scanSize()
+            else:
+                self._size += os.path.getsize(path) - previous_size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def has(self, namespace, key):
+        """Whether an entry exists (counts as a use, like a read)"""
+        return self._lookup(namespace, key) is not None
+
+    def getBytes(self, namespace, key):
+        path = self._lookup(namespace, key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def putBytes(self, namespace, key, data):
+        self._store(namespace, key, lambda f: f.write(data))
+
+    def getJson(self, namespace, key):
+        data = self.getBytes(namespace, key)
+        return None if data is None else json.loads(data)
+
+    def putJson(self, namespace, key, value):
+        self.putBytes(namespace, key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def getFile(self, namespace, key, dest_path):
+        """Copy a cached file to dest_path. Returns True on a hit."""
+        path = self._lookup(namespace, key)
+        if path is None:
+            return False
+        shutil.copyfile(path, dest_path)
+        return True
+
+    def putFile(self, namespace, key, src_path):
+        with open(src_path, "rb") as src:
+            self._store(namespace, key, lambda f: shutil.copyfileobj(src, f))
+
+    def _entries(self):
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _scanSize(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+            self._size = total
+
+    def stats(self):
+        with self._lock:
+            namespaces = set(self.hits) | set(self.misses)
+            return {namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]} for namespace in sorted(namespaces)}
+
+    def __getstate__(self):
+        # Worker processes get their own lock and counters
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"], state["max_bytes"])
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def getCache():
+    """Process-wide cache instance, or None when KITTY_CACHE=off"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ArtifactCache()
+        return _cache
@@ -0,0 +1,259 @@
+"""
+Page-level text extraction for PDF and PowerPoint uploads.
+
+Small documents are extracted in-process, page by page. Large ones are
+fanned out to a pool of long-lived worker processes and yielded back in
+order as they finish, so large course packs use every core and never have
+to be held in memory as a whole. There each page has a time budget: a page
+that takes longer is reported as timed out and skipped, and its worker
+replaced, instead of stalling the job.
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import wait
+from typing import NamedTuple, Optional
+
+EXTRACT_WORKERS = int(os.getenv("KITTY_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PAGE_TIMEOUT_SECONDS = float(os.getenv("KITTY_PAGE_TIMEOUT", "10"))
+# Below this many pages a worker process costs more than it saves
+PARALLEL_MIN_PAGES = 16
+
+
+class Page(NamedTuple):
+    number: int  # 1-based page or slide number
+    text: str
+    error: Optional[str] = None
+
+
+def _openPdf(file_bytes):
+    import PyPDF2
+    return PyPDF2.PdfReader(io.BytesIO(file_bytes))
+
+
+def _openPptx(file_bytes):
+    from pptx import Presentation
+    return Presentation(io.BytesIO(file_bytes))
+
+
+def _pdfPageText(document, index):
+    return document.pages[index].extract_text() or ""
+
+
+def _slideText(document, index):
+    slide = document.slides[index]
+    return "\n".join(shape.text.strip() for shape in slide.shapes if hasattr(shape, "text") and shape.text.strip())
+
+
+FORMATS = {
+    "pdf": (_openPdf, lambda document: len(document.pages), _pdfPageText),
+    "pptx": (_openPptx, lambda document: len(document.slides), _slideText),
+}
+
+
+_CLOSE = "close"  # tells a worker it is done with its document
+
+
+def _workerLoop(connection):
+    """Body of an extraction worker: parse each document it is sent, then
+    extract that document's pages as it is asked, until it gets None"""
+    document = extract = None
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return  # the parent went away
+        if message is None:
+            return
+        if message == _CLOSE:
+            document = extract = None  # don't hold it while idle
+            continue
+        if isinstance(message, tuple):
+            kind, file_bytes = message
+            document, extract = FORMATS[kind][0](file_bytes), FORMATS[kind][2]
+            connection.send(None)  # ready
+            continue
+        try:
+            connection.send(Page(message + 1, extract(document, message)))
+        except Exception as e:
+            connection.send(Page(message + 1, "", str(e)))
+
+
+class _Worker:
+    """One extraction process, with its own pipe so a page that runs over its
+    budget can be killed without disturbing the other workers"""
+
+    def __init__(self):
+        # spawn, not fork: this runs inside the multi-threaded LangGraph server
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_workerLoop, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+        self.index = None  # page being extracted
+        self.deadline = None
+
+    def open(self, kind, file_bytes):
+        self.ready = False
+        self.connection.send((kind, file_bytes))
+
+    def extract(self, index, page_timeout):
+        self.index, self.deadline = index, time.monotonic() + page_timeout
+        self.connection.send(index)
+
+    def idle(self):
+        """Nothing in flight, so it can take another document"""
+        return self.ready and self.index is None and self.process.is_alive()
+
+    def stop(self, kill=False):
+        if not kill:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """Extraction processes kept alive between documents (started on first
+    use), each lent to one iterPages call at a time"""
+
+    def __init__(self, size=EXTRACT_WORKERS):
+        self.size = max(1, size)
+        self._idle = []
+        self._lent = 0
+        self._condition = threading.Condition()
+
+    def borrow(self, n):
+        """Up to `n` workers, at least one: waits while all are lent out"""
+        with self._condition:
+            while not self._idle and self._lent >= self.size:
+                self._condition.wait()
+            n = min(n, len(self._idle) + self.size - self._lent)
+            workers, self._idle = self._idle[:n], self._idle[n:]
+            n_new = n - len(workers)
+            self._lent += n
+        try:
+            # Outside the lock: starting a process takes a while
+            workers += [_Worker() for _ in range(n_new)]
+        except BaseException:
+            self.giveBack(workers, n)
+            raise
+        return workers
+
+    def giveBack(self, workers, n=None):
+        """Return borrowed workers (`n` of them were lent, if not all): the
+        busy ones are stopped, the rest wait for the next document"""
+        idle = []
+        for worker in workers:
+            if worker.idle():
+                worker.connection.send(_CLOSE)
+                idle.append(worker)
+            else:
+                worker.stop(kill=True)
+        with self._condition:
+            self._idle.extend(idle)
+            self._lent -= len(workers) if n is None else n
+            self._condition.notify_all()
+
+    def shutdown(self):
+        with self._condition:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def getWorkerPool():
+    """Process-wide extraction worker pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
+
+
+def iterPages(kind, file_bytes, workers=EXTRACT_WORKERS, page_timeout=PAGE_TIMEOUT_SECONDS):
+    """Yield a Page for every page of a 'pdf' or 'pptx' document, in order.
+
+    Documents under PARALLEL_MIN_PAGES pages are extracted in-process, where
+    a page can't be interrupted. Larger ones go to up to `workers` processes
+    of the shared pool, one page at a time each: a page still running after
+    `page_timeout` seconds is reported as timed out, and its worker is
+    killed and replaced at once.
+    """
+    open_document, count, extract = FORMATS[kind]
+    document = open_document(file_bytes)
+    n_pages = count(document)
+    if n_pages < PARALLEL_MIN_PAGES:
+        for index in range(n_pages):
+            try:
+                yield Page(index + 1, extract(document, index))
+            except Exception as e:
+                yield Page(index + 1, "", str(e))
+        return
+    del document  # the workers parse their own copies
+
+    pool = getWorkerPool()
+    lent = pool.borrow(min(max(1, workers), n_pages))
+    for worker in lent:
+        worker.open(kind, file_bytes)
+    # Keep a bounded window of pages in flight so results stream in order
+    # without queueing the whole document at once
+    window = 2 * len(lent)
+    done = {}  # index -> Page, until it is its turn
+    next_index = next_yield = 0
+    try:
+        while next_yield < n_pages:
+            if next_yield in done:
+                yield done.pop(next_yield)
+                next_yield += 1
+                continue
+
+            for worker in lent:
+                if worker.ready and worker.index is None and next_index < min(n_pages, next_yield + window):
+                    worker.extract(next_index, page_timeout)
+                    next_index += 1
+
+            deadlines = [worker.deadline for worker in lent if worker.index is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            for connection in wait([worker.connection for worker in lent], timeout):
+                position, worker = next((i, worker) for i, worker in enumerate(lent) if worker.connection is connection)
+                try:
+                    page = connection.recv()
+                except EOFError:
+                    # The worker died (e.g. a crash in the PDF library)
+                    worker.stop(kill=True)
+                    if worker.index is None:
+                        raise RuntimeError(f"{kind} extraction worker exited with code {worker.process.exitcode}")
+                    page = Page(worker.index + 1, "", f"extraction worker exited with code {worker.process.exitcode}")
+                    lent[position] = worker = _Worker()
+                    worker.open(kind, file_bytes)
+                if page is None:
+                    worker.ready = True
+                    continue
+                done[page.number - 1] = page
+                worker.index = None
+
+            now = time.monotonic()
+            for position, worker in enumerate(lent):
+                if worker.index is not None and worker.deadline <= now:
+                    done[worker.index] = Page(worker.index + 1, "", f"timed out after {page_timeout:g}s")
+                    worker.stop(kill=True)
+                    lent[position] = _Worker()
+                    lent[position].open(kind, file_bytes)
+    finally:
+        # Workers still busy (the caller stopped early) are stopped, the rest
+        # go back to the pool
+        pool.giveBack(lent)
@@ -8,23 +8,27 @@ import { Client } from "@langchain/langgraph-sdk";
 type AppState = "INPUT" | "LOADING" | "RESULT";
 type DurationOption = "30s" | "60s" | "90s";
 
+const VIDEO_SERVER_URL = "http://localhost:2025";
+
 export default function App() {
   const [step, setStep] = useState<AppState>("INPUT");
   const [videoUrl, setVideoUrl] = useState<string | null>(null);
   const client = new Client({ apiUrl: "http://localhost:2024" });
   const [pipelineCount, setPipelineCount] = useState(0);
+  const [scriptPreview, setScriptPreview] = useState("");
 
-  // Convert file to base64
-  const fileToBase64 = (file: File): Promise<string> => {
-    return new Promise((resolve, reject) => {
-      const reader = new FileReader();
-      reader.readAsDataURL(file);
-      reader.onload = () => {
-        const base64 = (reader.result as string).split(",")[1]; // Remove data:*/*;base64, prefix
-        resolve(base64);
-      };
-      reader.onerror = reject;
+  // Upload the raw file once; the pipeline input only carries its ref
+  const uploadFile = async (file: File): Promise<string> => {
+    const res = await fetch(`${VIDEO_SERVER_URL}/upload`, {
+      method: "POST",
+      headers: { "Content-Type": "application/octet-stream" },
+      body: file,
     });
+    if (!res.ok) {
+      throw new Error(`Upload failed: ${res.status} ${await res.text()}`);
+    }
+    const { file_ref } = await res.json();
+    return file_ref;
   };
 
   // Unified generation method
@@ -33,30 +37,41 @@ export default function App() {
 
     let input: any = {
       notes: notes || "",
-      file_data: "",
+      file_ref: "",
       file_type: "text",
       duration,
     };
 
-    // If file is provided, convert to base64
+    // If file is provided, upload it first
     if (file) {
       const fileExtension = file.name.split(".").pop()?.toLowerCase() || "";
-      const base64Data = await fileToBase64(file);
+      const fileRef = await uploadFile(file);
 
       input = {
         notes: "",
-        file_data: base64Data,
+        file_ref: fileRef,
         file_type: fileExtension,
         duration,
       };
     }
 
+    // "custom" events carry the narration while the script is still being written
     const stream = client.runs.stream(thread.thread_id, "kitty_educator", {
       input,
-      streamMode: "updates",
+      streamMode: ["updates", "custom"],
     });
 
     for await (const event of stream) {
+      if (event.event === "custom") {
+        const data = event.data as { pure_script_delta?: string; pure_script?: string };
+        if (data.pure_script !== undefined) {
+          setScriptPreview(data.pure_script);
+        } else if (data.pure_script_delta) {
+          setScriptPreview(preview => preview + data.pure_script_delta);
+        }
+        continue;
+      }
+      if (event.event !== "updates") continue;
       console.log(Object.keys(event.data)?.[0]);
       setPipelineCount(count => count + 1);
     }
@@ -67,9 +82,11 @@ export default function App() {
 
   const onGenerate = async (notes: string, duration: DurationOption, file?: File) => {
     try {
+      setScriptPreview("");
       setStep("LOADING");
-      const res = await generateKittyVideo(notes, duration, file);
+      const res: any = await generateKittyVideo(notes, duration, file);
       console.log(res);
+      setVideoUrl(res?.run_id ? `${VIDEO_SERVER_URL}/video/${res.run_id}` : `${VIDEO_SERVER_URL}/video`);
       setStep("RESULT");
       setPipelineCount(0);
     } catch (error) {
@@ -103,7 +120,9 @@ export default function App() {
       )}
 
       {step === "INPUT" && <TextInput onGenerate={onGenerate} />}
-      {step === "LOADING" && <LoadingState pipelineCount={pipelineCount} />}
+      {step === "LOADING" && (
+        <LoadingState pipelineCount={pipelineCount} scriptPreview={scriptPreview} />
+      )}
       {step === "RESULT" && (
         <ResultView videoUrl={videoUrl ?? ""} onReset={resetApp} />
       )}
@@ -16,8 +16,8 @@ function TextInput({
       const file = e.target.files[0];
       const extension = file.name.split('.').pop()?.toLowerCase();
       
-      if (!['pdf', 'pptx', 'ppt'].includes(extension || '')) {
-        alert('Please upload a PDF or PowerPoint file');
+      if (!['pdf', 'pptx'].includes(extension || '')) {
+        alert('Please upload a PDF or PowerPoint (.pptx) file');
         return;
       }
       
@@ -90,7 +90,7 @@ function TextInput({
         }}>
           <input
             type="file"
-            accept=".pdf,.pptx,.ppt"
+            accept=".pdf,.pptx"
             onChange={handleFileChange}
             style={{ display: "none" }}
           />
@@ -10,7 +10,13 @@ const loadingStates = [
   "Almost done!",
 ];
 
-function LoadingState({ pipelineCount }: { pipelineCount: number }) {
+function LoadingState({
+  pipelineCount,
+  scriptPreview = "",
+}: {
+  pipelineCount: number;
+  scriptPreview?: string;
+}) {
   const loadingBarPercentage = (pipelineCount / 7) * 100;
 
   return (
@@ -50,6 +56,19 @@ function LoadingState({ pipelineCount }: { pipelineCount: number }) {
       <div style={{ color: "var(--clr-accent-400)" }}>
         {loadingStates[pipelineCount]}
       </div>
+      {scriptPreview.trim() && (
+        <p
+          style={{
+            width: "500px",
+            maxHeight: "12rem",
+            overflowY: "auto",
+            whiteSpace: "pre-wrap",
+            color: "var(--clr-neutral-300)",
+          }}
+        >
+          {scriptPreview.trim()}
+        </p>
+      )}
     </section>
   );
 }
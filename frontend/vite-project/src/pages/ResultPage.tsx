@@ -1,5 +1,5 @@
-function ResultView({ onReset }: { videoUrl: string; onReset: () => void; }) {
-  const VIDEO_PATH = "http://localhost:2025/video";
+function ResultView({ videoUrl, onReset }: { videoUrl: string; onReset: () => void; }) {
+  const VIDEO_PATH = videoUrl || "http://localhost:2025/video";
 
   return (
     <section
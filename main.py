@@ -4,61 +4,132 @@ Converts lecture notes into educational videos with a kitten narrator
 """
 
 import os
+import asyncio
 import base64
-import io
-from typing import TypedDict
-from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+import functools
+import inspect
+import json
+import multiprocessing
+import operator
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Annotated, TypedDict
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_stream_writer
+from langgraph.graph import StateGraph, START, END
 from dotenv import load_dotenv
-import PyPDF2
-from pptx import Presentation
 
-# Import existing voiceover function
-from voiceover.voiceover import generateSpeech
-from video.video import generateVideo
-
-# Load environment variables
+# Load environment variables before the local modules read their settings
 load_dotenv()
 
+# Import existing voiceover function
+from voiceover.voiceover import (
+    generateSpeech, generateSpeechChunked, generateSpeechWithTimestamps,
+    generateSpeechAsync, generateSpeechChunkedAsync, generateSpeechWithTimestampsAsync,
+    VOICE_ID, MODEL_ID, OUTPUT_FORMAT, VOICE_SETTINGS, TTS_CHUNKED, TTS_FAKE,
+)
+from blobstore.blobstore import getBlobStore
+from cache.cache import ArtifactCache, getCache, hashFile, makeKey
+from metrics.metrics import TRACE_ENABLED, addBytes, measure
+from providers.providers import getChatModel
+from script.summarize import MAP_REDUCE_MIN_TOKENS, condenseNotes, condenseNotesAsync, countTokens
+from script.streaming import ScriptStreamParser, splitScript, streamLLM, streamLLMAsync
+from video.video import (
+    generateVideo, prerenderSegments, warmUpRenderWorker, ALIGNMENT_MODE, ALIGN_ENERGY, ALIGN_TTS, ALIGN_WHISPER, HLS_OUTPUT,
+    WHISPER_WARMUP,
+)
+from extraction.extraction import iterPages
+from scheduler.scheduler import getScheduler, QueueFullError
+from workspace.workspace import (
+    createWorkspace, workspaceFile, VOICEOVER_FILE, ALIGNMENT_FILE, CUES_FILE, SCRIPT_FILE,
+    SCRIPT_WITH_SCENES_FILE, VIDEO_FILE, OUTPUT_FILE, HLS_DIR, TRACE_FILE, SEGMENTS_DIR,
+    workspaceDir, loadStageMarker, saveStageMarker,
+)
+
 # Configure API keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Script generation model settings (also part of the script cache key)
+LLM_MODEL = "gpt-4o"
+LLM_TEMPERATURE = 0.7
+# Model for chunk summaries of long notes; a smaller one cuts the map cost
+SUMMARY_MODEL = os.getenv("KITTY_SUMMARY_MODEL", LLM_MODEL)
+# Offline fake model (script/fake_llm.py) for local runs and benchmarks
+LLM_FAKE = os.getenv("KITTY_FAKE_LLM", "").lower() in ("1", "true", "yes")
+# run_batch: videos in flight at once
+BATCH_CONCURRENCY = int(os.getenv("KITTY_BATCH_CONCURRENCY", "4"))
+# Voice and render sentence by sentence, reusing the sentences a run has done before
+INCREMENTAL_RENDER = os.getenv("KITTY_INCREMENTAL", "on").lower() not in ("0", "off", "false", "no")
+# A run retried with the same run_id skips the stages whose inputs are unchanged
+RESUME_ENABLED = os.getenv("KITTY_RESUME", "on").lower() not in ("0", "off", "false", "no")
+
 # Create output directory
 os.makedirs("output", exist_ok=True)
 
+# Cat images used for every video
+CLOSED_PNG = "video/cat-closed.png"
+OPEN_PNG = "video/cat-open.png"
+
+# Render workers decode the images and load Whisper once, when they start
+# (transcription only happens there, so this process never loads it)
+getScheduler().setWorkerInitializer(warmUpRenderWorker, (CLOSED_PNG, OPEN_PNG))
+
+# ...and, with WHISPER_WARMUP on, they start when the graph is loaded (server
+# start) rather than on the first run. Not in spawned children, which import
+# this module again when it is the main script.
+if WHISPER_WARMUP and multiprocessing.current_process().name == "MainProcess":
+    getScheduler().startRenderWorkers(wait=False)
+
+
+def merge_errors(left: str, right: str) -> str:
+    """Reducer for State.error: parallel branches may both report a failure"""
+    if left and right and left != right:
+        return f"{left}; {right}"
+    return right or left
+
 
 class State(TypedDict):
     """State for the LangGraph pipeline"""
     notes: str
-    file_data: str  # base64 encoded file
+    file_ref: str  # blob store ref of the uploaded file (see video_server's /upload)
+    file_data: str  # legacy: base64 encoded file, moved into the blob store by parse_notes
     file_type: str  # 'pdf', 'pptx', or 'text'
     duration: str
-    pure_script: str  # Pure narration only (for voiceover)
+    pure_script: str  # Pure narration only (for voiceover); on input, an edited script to use instead of generating one
     script_with_scenes: str  # Full script with scenes
     audio_path: str
     video_path: str
-    error: str
+    hls_path: str  # HLS playlist of the video, when KITTY_HLS is on
+    whisper_model: str  # optional Whisper size override, e.g. 'tiny' for lower latency
+    alignment_mode: str  # 'whisper', 'tts' or 'energy' (see video.video)
+    alignment_path: str  # TTS character timestamps, when alignment_mode is 'tts'
+    cues_path: str  # sentence start/end times from chunked TTS, used for subtitles
+    run_id: str  # optional on input; identifies the run's workspace
+    workspace: str  # per-run directory holding every file this run writes
+    script_stats: dict  # per-call token counts and latency of generate_script
+    trace: Annotated[list, operator.add]  # metrics.measure spans of the run, when KITTY_TRACE is on
+    error: Annotated[str, merge_errors]
 
 
 def extract_text_from_pdf_bytes(file_bytes: bytes) -> str:
     """Extract text from PDF bytes"""
     try:
         text = []
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+        n_pages = 0
         
-        print(f"   PDF has {len(pdf_reader.pages)} pages")
+        # Pages are extracted in parallel and streamed back in order
+        for page in iterPages("pdf", file_bytes):
+            n_pages += 1
+            if page.error:
+                print(f"   ⚠️ Error extracting page {page.number}: {page.error}")
+            elif page.text.strip():
+                text.append(f"--- Page {page.number} ---\n{page.text.strip()}")
         
-        for page_num, page in enumerate(pdf_reader.pages, 1):
-            try:
-                page_text = page.extract_text()
-                if page_text and page_text.strip():
-                    text.append(f"--- Page {page_num} ---\n{page_text.strip()}")
-                    print(f"   Extracted {len(page_text)} chars from page {page_num}")
-                else:
-                    print(f"   ⚠️ Page {page_num} has no extractable text (might be image-based)")
-            except Exception as e:
-                print(f"   ⚠️ Error extracting page {page_num}: {e}")
+        print(f"   PDF has {n_pages} pages, {len(text)} with extractable text")
+        if len(text) < n_pages:
+            print(f"   ⚠️ {n_pages - len(text)} page(s) had no extractable text (might be image-based)")
         
         result = "\n\n".join(text)
         
@@ -77,18 +148,16 @@ def extract_text_from_pptx_bytes(file_bytes: bytes) -> str:
     """Extract text from PowerPoint bytes"""
     try:
         text = []
-        prs = Presentation(io.BytesIO(file_bytes))
+        n_slides = 0
         
-        print(f"   PowerPoint has {len(prs.slides)} slides")
+        for slide in iterPages("pptx", file_bytes):
+            n_slides += 1
+            if slide.error:
+                print(f"   ⚠️ Error extracting slide {slide.number}: {slide.error}")
+            elif slide.text:  # Only add if there's text beyond the header
+                text.append(f"--- Slide {slide.number} ---\n{slide.text}")
         
-        for slide_num, slide in enumerate(prs.slides, 1):
-            slide_text = [f"--- Slide {slide_num} ---"]
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    slide_text.append(shape.text.strip())
-            if len(slide_text) > 1:  # Only add if there's text beyond the header
-                text.append("\n".join(slide_text))
-                print(f"   Extracted text from slide {slide_num}")
+        print(f"   PowerPoint has {n_slides} slides, {len(text)} with text")
         
         result = "\n\n".join(text)
         
@@ -103,6 +172,19 @@ def extract_text_from_pptx_bytes(file_bytes: bytes) -> str:
         return f"ERROR: Failed to extract PowerPoint content: {str(e)}"
 
 
+def run_file(state: State, name: str) -> str:
+    """Path of `name` inside this run's workspace"""
+    if not state.get("workspace"):
+        state["run_id"], state["workspace"] = createWorkspace(state.get("run_id") or None)
+    return workspaceFile(state["workspace"], name)
+
+
+def segment_cache(state: State):
+    """This run's store of sentence audio, alignments and video segments,
+    when KITTY_INCREMENTAL is on"""
+    return ArtifactCache(run_file(state, SEGMENTS_DIR)) if INCREMENTAL_RENDER else None
+
+
 def parse_notes(state: State) -> State:
     """Node 1: Parse and validate lecture notes OR extract from file"""
     print("📝 Parsing lecture notes...")
@@ -111,8 +193,12 @@ def parse_notes(state: State) -> State:
         return state
     
     try:
-        # Check if file data is provided
-        if state.get("file_data") and state.get("file_type"):
+        # Every run writes into its own workspace so concurrent runs can't collide
+        state["run_id"], state["workspace"] = createWorkspace(state.get("run_id") or None)
+        print(f"   Run {state['run_id']} → {state['workspace']}")
+
+        # Check if a file is provided
+        if (state.get("file_ref") or state.get("file_data")) and state.get("file_type"):
             file_type = state["file_type"].lower()
             
             # Skip processing if file_type is 'text' (meaning no file uploaded)
@@ -124,21 +210,33 @@ def parse_notes(state: State) -> State:
                 print(f"✅ Notes loaded: {len(notes)} characters")
                 return state
             
-            # Decode base64 file
             print(f"📄 Processing {file_type} file...")
-            file_bytes = base64.b64decode(state["file_data"])
+            if state.get("file_ref"):
+                try:
+                    file_bytes = getBlobStore().read(state["file_ref"])
+                except (FileNotFoundError, ValueError):
+                    state["error"] = "Uploaded file not found, please upload it again"
+                    return state
+            else:
+                # Old clients send the file inline. Store it and drop the base64
+                # so the rest of the run doesn't carry it in every checkpoint.
+                file_bytes = base64.b64decode(state["file_data"])
+                state["file_ref"] = getBlobStore().put(file_bytes)
+                state["file_data"] = ""
             print(f"   File size: {len(file_bytes)} bytes")
+            addBytes(bytes_in=len(file_bytes))
             
             # Extract text based on file type
             if file_type == "pdf":
                 notes = extract_text_from_pdf_bytes(file_bytes)
-            elif file_type in ["pptx", "ppt"]:
+            elif file_type == "pptx":
                 notes = extract_text_from_pptx_bytes(file_bytes)
             else:
                 state["error"] = f"Unsupported file type: {file_type}"
                 return state
             
             state["notes"] = notes
+            addBytes(bytes_out=len(notes.encode("utf-8")))
             print(f"✅ Extracted text from {file_type}: {len(notes)} characters")
             print(f"   Preview: {notes[:200]}...")
         else:
@@ -147,6 +245,7 @@ def parse_notes(state: State) -> State:
             if not notes or len(notes.strip()) < 10:
                 state["error"] = "Notes are too short or empty"
                 return state
+            addBytes(bytes_in=len(notes.encode("utf-8")))
             print(f"✅ Notes loaded: {len(notes)} characters")
         
     except Exception as e:
@@ -158,32 +257,53 @@ def parse_notes(state: State) -> State:
     return state
 
 
-def generate_script(state: State) -> State:
-    """Node 2: Generate educational script with kitten narrator (following script.py style)"""
-    print("🎬 Generating script with OpenAI...")
-    
-    if state.get("error"):
-        return state
-    
-    if state.get("duration"):
-        notes = state.get("notes")
-        number_of_words = ""
-
-        match state.get("duration"):
-            case "30s":
-                number_of_words = "150 words"
-            case "60s":
-                number_of_words = "300 words"
-            case "90s":
-                number_of_words = "450 words"
-            case _:
-                number_of_words = "150 words"
-        
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.7, api_key=OPENAI_API_KEY)
-        
-        # Updated prompt to generate both pure script and script with scenes
-        # Use a template variable to avoid f-string issues with curly braces
-        user_prompt = f"""
+def stream_writer():
+    """LangGraph's writer for custom stream events, or a no-op outside a graph run"""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+# Voiceovers that generate_script starts as soon as the pure script is
+# complete, picked up by generate_voiceover. Keyed by workspace.
+_early_voiceovers = {}
+_early_voiceovers_lock = threading.Lock()
+_early_voiceover_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="early-voiceover")
+
+
+def start_early_voiceover(state: State, pure_script: str, asynchronous: bool = False):
+    run_file(state, VOICEOVER_FILE)  # make sure there is a workspace to key on
+    if completed_stage("generate_voiceover", {**state, "pure_script": pure_script}) is not None:
+        return  # an earlier attempt of this run already voiced this script
+    if asynchronous:
+        # From generate_script_async: a task on the run's event loop
+        future = asyncio.ensure_future(synthesize_voiceover_async(dict(state), pure_script))
+    else:
+        future = _early_voiceover_pool.submit(synthesize_voiceover, dict(state), pure_script)
+    with _early_voiceovers_lock:
+        _early_voiceovers[state["workspace"]] = (pure_script, future)
+
+
+def take_early_voiceover(state: State):
+    """(pure_script, future or task) started for this run, if any"""
+    with _early_voiceovers_lock:
+        return _early_voiceovers.pop(state.get("workspace"), None)
+
+
+def make_llm(model: str = LLM_MODEL, temperature: float = LLM_TEMPERATURE):
+    """Chat model used for script generation, shared by every run (and on
+    pooled, rate-limited connections, see providers.providers)"""
+    if LLM_FAKE:
+        from script.fake_llm import FakeChatModel
+        return FakeChatModel()
+    return getChatModel(model, temperature, OPENAI_API_KEY)
+
+
+def build_script_prompt(notes: str, number_of_words: str) -> str:
+    """The Kitty script prompt for `notes` at the given length"""
+    # Prompt for both the pure script and the script with scenes
+    return f"""
             Write a script for a 'Kitty Explains' video on the following topic: {notes}
 
             IMPORTANT - The script MUST start with a question followed by "explained by kitties":
@@ -237,75 +357,479 @@ def generate_script(state: State) -> State:
 
             etc.
             """
+
+
+def script_needed(state: State) -> bool:
+    """Whether generate_script has a script to write. It doesn't after an
+    earlier error, when the input already has one, or without a duration."""
+    if state.get("error"):
+        return False
+
+    if state.get("pure_script"):
+        # An edited script, e.g. a teacher's changes to an earlier run's: use it as given
+        state["script_with_scenes"] = state.get("script_with_scenes") or state["pure_script"]
+        print(f"✅ Using the given script ({len(state['pure_script'])} characters)")
+        return False
+
+    if not state.get("duration"):
+        state["error"] = "Script generation failed: no duration given"
+        print(f"❌ {state['error']}")
+        return False
+    return True
+
+
+def script_words(duration: str) -> str:
+    """Target length of the script of a video of `duration`"""
+    match duration:
+        case "30s":
+            return "150 words"
+        case "60s":
+            return "300 words"
+        case "90s":
+            return "450 words"
+        case _:
+            return "150 words"
+
+
+def script_cache(user_prompt: str):
+    """(cache, key) of the script for `user_prompt`. Same notes, duration and
+    model settings give the same prompt. Fake model output must never be
+    served as a real script, so there is no cache with KITTY_FAKE_LLM."""
+    return None if LLM_FAKE else getCache(), makeKey(user_prompt, LLM_MODEL, LLM_TEMPERATURE)
+
+
+def load_cached_script(state: State, cache, cache_key) -> bool:
+    cached = cache.getJson("script", cache_key) if cache else None
+    if not cached:
+        return False
+    state["pure_script"] = cached["pure_script"]
+    state["script_with_scenes"] = cached["script_with_scenes"]
+    print(f"✅ Script loaded from cache")
+    return True
+
+
+def notes_too_long(notes: str) -> bool:
+    """Too long for one prompt: summarise chunks concurrently (map), then
+    write the script from the summaries (reduce)"""
+    notes_tokens = countTokens(notes, LLM_MODEL)
+    if notes_tokens <= MAP_REDUCE_MIN_TOKENS:
+        return False
+    print(f"   Notes are ~{notes_tokens} tokens, summarising them in chunks first...")
+    return True
+
+
+class ScriptStream:
+    """on_token for streamLLM: the narration is shown (and voiced) as soon
+    as it is complete, while the scene descriptions are still coming"""
+
+    def __init__(self, state: State, asynchronous: bool = False):
+        self.state = state
+        self.asynchronous = asynchronous
+        self.parser = ScriptStreamParser()
+        self.write = stream_writer()
+        self.start = time.perf_counter()
+        self.pure_script_seconds = None
+
+    def on_token(self, token):
+        delta, pure_script = self.parser.feed(token)
+        if delta:
+            self.write({"pure_script_delta": delta})
+        if pure_script is not None:
+            self.pure_script_seconds = time.perf_counter() - self.start
+            self.write({"pure_script": pure_script})
+            start_early_voiceover(self.state, pure_script, self.asynchronous)
+
+
+def finish_script(state: State, script: str, calls: list, stream: ScriptStream, start: float, user_prompt: str,
+                  cache, cache_key):
+    """Put a generated script and its stats into the state (and the cache)"""
+    script_call = calls[-1]
+    addBytes(bytes_in=len(user_prompt.encode("utf-8")), bytes_out=len(script.encode("utf-8")))
+    state["script_stats"] = {
+        "calls": calls,
+        "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+        "completion_tokens": sum(call["completion_tokens"] for call in calls),
+        "seconds": time.perf_counter() - start,
+        "first_token_seconds": script_call["first_token_seconds"],
+        "pure_script_seconds": stream.pure_script_seconds,
+    }
+    
+    if not script:
+        state["error"] = "Script generation returned empty result"
+        return
+    
+    # Parse the two versions from the LLM response
+    state["pure_script"], state["script_with_scenes"] = splitScript(script)
+
+    if cache:
+        cache.putJson("script", cache_key, {
+            "pure_script": state["pure_script"],
+            "script_with_scenes": state["script_with_scenes"],
+        })
+    
+    print(f"✅ Script generated in {state['script_stats']['seconds']:.2f}s "
+          f"({len(calls)} LLM call(s), {state['script_stats']['prompt_tokens']} prompt + "
+          f"{state['script_stats']['completion_tokens']} completion tokens)")
+    if stream.pure_script_seconds is not None:
+        print(f"   First token after {script_call['first_token_seconds']:.2f}s, "
+              f"pure script after {stream.pure_script_seconds:.2f}s (voiceover started)")
+    print(f"   Pure script: {len(state['pure_script'])} characters")
+    print(f"   Script with scenes: {len(state['script_with_scenes'])} characters")
+
+
+def generate_script(state: State) -> State:
+    """Node 2: Generate educational script with kitten narrator (following script.py style)"""
+    print("🎬 Generating script with OpenAI...")
+    
+    if not script_needed(state):
+        return state
+
+    notes = state.get("notes")
+    number_of_words = script_words(state.get("duration"))
+    llm = make_llm()
+    user_prompt = build_script_prompt(notes, number_of_words)
+    
+    try:
+        cache, cache_key = script_cache(user_prompt)
+        if load_cached_script(state, cache, cache_key):
+            return state
+
+        start = time.perf_counter()
+        calls = []
+        if notes_too_long(notes):
+            notes, calls = condenseNotes(make_llm(SUMMARY_MODEL, temperature=0), notes, model=SUMMARY_MODEL)
+            print(f"   {len(calls)} chunk summaries → ~{countTokens(notes, LLM_MODEL)} tokens")
+            user_prompt = build_script_prompt(notes, number_of_words)
+
+        with getScheduler().stage("llm"):
+            stream = ScriptStream(state)
+            script, script_call = streamLLM(llm, user_prompt, "script", LLM_MODEL, on_token=stream.on_token)
+        finish_script(state, script, calls + [script_call], stream, start, user_prompt, cache, cache_key)
         
-        try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("user", user_prompt)
-            ])
-            
-            chain = prompt | llm
-            response = chain.invoke({"notes": state['notes']})
-            
-            script = response.content
-            
-            if not script:
-                state["error"] = "Script generation returned empty result"
-                return state
-            
-            # Parse the two versions from the LLM response
-            if "---PURE SCRIPT---" in script and "---SCRIPT WITH SCENES---" in script:
-                parts = script.split("---SCRIPT WITH SCENES---")
-                state["pure_script"] = parts[0].replace("---PURE SCRIPT---", "").strip()
-                state["script_with_scenes"] = parts[1].strip()
-            else:
-                # Fallback: if format not followed, use the whole thing for both
-                state["pure_script"] = script
-                state["script_with_scenes"] = script
-            
-            print(f"✅ Script generated")
-            print(f"   Pure script: {len(state['pure_script'])} characters")
-            print(f"   Script with scenes: {len(state['script_with_scenes'])} characters")
-            
-        except Exception as e:
-            state["error"] = f"Script generation failed: {e}"
-            print(f"❌ {state['error']}")
+    except Exception as e:
+        state["error"] = f"Script generation failed: {e}"
+        print(f"❌ {state['error']}")
+        early = take_early_voiceover(state)
+        if early:
+            # Nothing will wait for it now
+            early[1].cancel()
+
+    return state
+
+
+async def generate_script_async(state: State) -> State:
+    """generate_script for async graph runs (the LangGraph server): the run
+    holds no thread while it waits for the model"""
+    print("🎬 Generating script with OpenAI...")
     
-    else:
+    if not script_needed(state):
+        return state
+
+    notes = state.get("notes")
+    number_of_words = script_words(state.get("duration"))
+    llm = make_llm()
+    user_prompt = build_script_prompt(notes, number_of_words)
+    
+    try:
+        cache, cache_key = script_cache(user_prompt)
+        if load_cached_script(state, cache, cache_key):
+            return state
+
+        start = time.perf_counter()
+        calls = []
+        if notes_too_long(notes):
+            notes, calls = await condenseNotesAsync(make_llm(SUMMARY_MODEL, temperature=0), notes, model=SUMMARY_MODEL)
+            print(f"   {len(calls)} chunk summaries → ~{countTokens(notes, LLM_MODEL)} tokens")
+            user_prompt = build_script_prompt(notes, number_of_words)
+
+        async with getScheduler().stageAsync("llm"):
+            stream = ScriptStream(state, asynchronous=True)
+            script, script_call = await streamLLMAsync(llm, user_prompt, "script", LLM_MODEL, on_token=stream.on_token)
+        finish_script(state, script, calls + [script_call], stream, start, user_prompt, cache, cache_key)
+        
+    except Exception as e:
         state["error"] = f"Script generation failed: {e}"
         print(f"❌ {state['error']}")
+        early = take_early_voiceover(state)
+        if early:
+            # Nothing will wait for it now
+            early[1].cancel()
 
     return state
 
 
+class VoiceoverJob:
+    """Everything synthesize_voiceover does around the TTS call: the run's
+    file paths, the voiceover cache, and saving the alignment or cues"""
+
+    def __init__(self, state: State, pure_script: str):
+        self.pure_script = pure_script
+        # Stream the audio straight into the output folder
+        self.audio_path = run_file(state, VOICEOVER_FILE)
+        self.alignment_path = run_file(state, ALIGNMENT_FILE)
+        self.cues_path = run_file(state, CUES_FILE)
+        self.alignment_mode = state.get("alignment_mode") or ALIGNMENT_MODE
+        self.segment_cache = segment_cache(state)
+        self.updates = {}
+
+        # Fake audio must never be served as a real voiceover
+        self.cache = None if TTS_FAKE else getCache()
+        self.cache_key = makeKey(pure_script, VOICE_ID, MODEL_ID, OUTPUT_FORMAT, VOICE_SETTINGS)
+
+    def load_cached(self) -> bool:
+        if not (self.cache and self.cache.getFile("voiceover", self.cache_key, self.audio_path)):
+            return False
+        print(f"   Voiceover loaded from cache")
+        if self.alignment_mode == ALIGN_TTS and self.cache.getFile("voiceover_alignment", self.cache_key, self.alignment_path):
+            self.updates["alignment_path"] = self.alignment_path
+        if self.cache.getFile("voiceover_cues", self.cache_key, self.cues_path):
+            self.updates["cues_path"] = self.cues_path
+        return True
+
+    def save_alignment(self, alignment):
+        """After generateSpeechWithTimestamps"""
+        if alignment:
+            with open(self.alignment_path, "w", encoding="utf-8") as f:
+                json.dump(alignment, f)
+            self.updates["alignment_path"] = self.alignment_path
+            if self.cache:
+                self.cache.putFile("voiceover_alignment", self.cache_key, self.alignment_path)
+        if self.cache and os.path.exists(self.audio_path):
+            self.cache.putFile("voiceover", self.cache_key, self.audio_path)
+
+    def save_speech(self, speech_stats):
+        """After generateSpeech(Chunked)"""
+        if not speech_stats["bytes"]:
+            return
+        print(f"   First audio after {speech_stats['first_chunk_seconds']:.2f}s, "
+              f"{speech_stats['bytes']} bytes in {speech_stats['seconds']:.2f}s "
+              f"({speech_stats.get('requests', 1)} request(s), {speech_stats.get('reused_sentences', 0)} sentence(s) reused)")
+        if speech_stats.get("cues"):
+            with open(self.cues_path, "w", encoding="utf-8") as f:
+                json.dump(speech_stats["cues"], f)
+            self.updates["cues_path"] = self.cues_path
+        if self.cache:
+            self.cache.putFile("voiceover", self.cache_key, self.audio_path)
+            if speech_stats.get("cues"):
+                self.cache.putFile("voiceover_cues", self.cache_key, self.cues_path)
+
+    def finish(self, steps) -> dict:
+        """The state updates; call it inside the measure block that fills `steps`"""
+        if os.path.exists(self.audio_path):
+            addBytes(bytes_in=len(self.pure_script.encode("utf-8")), bytes_out=os.path.getsize(self.audio_path))
+        if TRACE_ENABLED:
+            # Runs in the background during generate_script: keep it in the trace
+            self.updates["trace"] = steps
+        return self.updates
+
+
+# Sentence segments encoded on the render workers while the voiceover is
+# still being voiced (see SegmentPrerender)
+_prerender_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prerender")
+
+
+class SegmentPrerender:
+    """on_sentence for generateSpeechChunked: aligns and encodes each
+    sentence's video segment into the run's segment cache as soon as its
+    audio is written, so generate_video only joins the segments. One batch
+    at a time per run, so a run never holds more than one render slot.
+    Best effort: whatever is not done here, generate_video encodes."""
+
+    def __init__(self, state: State, job: VoiceoverJob):
+        self.alignment_mode = job.alignment_mode
+        self.whisper_model = state.get("whisper_model") or None
+        self.segment_cache = job.segment_cache
+        self.pending = []
+        self.future = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def wanted(job: VoiceoverJob) -> bool:
+        """Segments are only rendered per sentence from chunked TTS cues, and
+        with TTS timestamps the alignment comes from the whole narration"""
+        return TTS_CHUNKED and job.segment_cache is not None and job.alignment_mode in (ALIGN_WHISPER, ALIGN_ENERGY)
+
+    def add(self, cue, audio):
+        with self.lock:
+            if self.closed:
+                return
+            self.pending.append((cue, audio))
+            if self.future is None:
+                self.future = _prerender_pool.submit(self.drain)
+
+    def drain(self):
+        while True:
+            with self.lock:
+                batch, self.pending = self.pending, []
+                if not batch or self.closed:
+                    self.future = None
+                    return
+            try:
+                getScheduler().render(
+                    prerenderSegments, CLOSED_PNG, OPEN_PNG, batch,
+                    alignment_mode=self.alignment_mode,
+                    whisper_model=self.whisper_model,
+                    segment_cache=self.segment_cache,
+                )
+            except Exception as e:
+                print(f"⚠️ Pre-rendering segments stopped, generate_video encodes the rest: {e}")
+                with self.lock:
+                    self.closed = True
+
+    def finish(self, wait: bool = True):
+        """Wait for the segments of the sentences voiced so far, or (on a
+        failed voiceover) drop the ones not started yet"""
+        if not wait:
+            with self.lock:
+                self.closed = True
+        while True:
+            with self.lock:
+                future = self.future
+            if future is None:
+                return
+            future.result()
+
+
+def synthesize_voiceover(state: State, pure_script: str) -> dict:
+    """Voice `pure_script` into the run's workspace (or copy it from the
+    cache). Returns the state updates besides audio_path."""
+    steps = []
+    with measure("synthesize_voiceover", steps):
+        job = VoiceoverJob(state, pure_script)
+        if job.load_cached():
+            return job.finish(steps)
+        if job.alignment_mode == ALIGN_TTS:
+            with getScheduler().stage("tts"):
+                alignment = generateSpeechWithTimestamps(pure_script, job.audio_path)
+            job.save_alignment(alignment)
+        else:
+            prerender = SegmentPrerender(state, job) if SegmentPrerender.wanted(job) else None
+            try:
+                with getScheduler().stage("tts"):
+                    if TTS_CHUNKED:
+                        speech_stats = generateSpeechChunked(pure_script, job.audio_path, segment_cache=job.segment_cache,
+                                                             on_sentence=prerender and prerender.add)
+                    else:
+                        speech_stats = generateSpeech(pure_script, job.audio_path)
+            except BaseException:
+                if prerender:
+                    prerender.finish(wait=False)
+                raise
+            # Outside the tts slot: the last segments are encoded after the last sentence
+            if prerender:
+                prerender.finish()
+            job.save_speech(speech_stats)
+        return job.finish(steps)
+
+
+async def synthesize_voiceover_async(state: State, pure_script: str) -> dict:
+    """synthesize_voiceover on the async ElevenLabs client"""
+    steps = []
+    with measure("synthesize_voiceover", steps):
+        job = VoiceoverJob(state, pure_script)
+        if job.load_cached():
+            return job.finish(steps)
+        if job.alignment_mode == ALIGN_TTS:
+            async with getScheduler().stageAsync("tts"):
+                alignment = await generateSpeechWithTimestampsAsync(pure_script, job.audio_path)
+            job.save_alignment(alignment)
+        else:
+            prerender = SegmentPrerender(state, job) if SegmentPrerender.wanted(job) else None
+            try:
+                async with getScheduler().stageAsync("tts"):
+                    if TTS_CHUNKED:
+                        speech_stats = await generateSpeechChunkedAsync(pure_script, job.audio_path,
+                                                                        segment_cache=job.segment_cache,
+                                                                        on_sentence=prerender and prerender.add)
+                    else:
+                        speech_stats = await generateSpeechAsync(pure_script, job.audio_path)
+            except BaseException:
+                if prerender:
+                    prerender.finish(wait=False)
+                raise
+            if prerender:
+                await asyncio.to_thread(prerender.finish)
+            job.save_speech(speech_stats)
+        return job.finish(steps)
+
+
+def voiceover_to_generate(state: State):
+    """The pure script generate_voiceover should voice, or None if there is nothing to do"""
+    if state.get("error"):
+        return None
+    # Use ONLY the pure script for voiceover (no scene descriptions)
+    pure_script = state.get("pure_script", "")
+    if not pure_script:
+        print("⚠️ No pure script available")
+        state["audio_path"] = None
+    return pure_script or None
+
+
+def set_audio_path(state: State, pure_script: str, updates: dict):
+    state.update(updates)
+    audio_path = run_file(state, VOICEOVER_FILE)
+
+    if os.path.exists(audio_path) and os.path.getsize(audio_path) > 0:
+        state["audio_path"] = audio_path
+        addBytes(bytes_in=len(pure_script.encode("utf-8")), bytes_out=os.path.getsize(audio_path))
+        print(f"✅ Audio saved: {audio_path}")
+    else:
+        state["audio_path"] = None
+        print("⚠️ Audio file not generated")
+
+
 def generate_voiceover(state: State) -> State:
     """Node 3: Generate audio using voiceover.py"""
     print("🎤 Generating voiceover using voiceover.py...")
     
-    if state.get("error"):
+    pure_script = voiceover_to_generate(state)
+    if pure_script is None:
         return state
     
     try:
-        # Use ONLY the pure script for voiceover (no scene descriptions)
-        pure_script = state.get("pure_script", "")
-        if not pure_script:
-            print("⚠️ No pure script available")
-            state["audio_path"] = None
-            return state
-            
-        generateSpeech(pure_script)
+        early = take_early_voiceover(state)
+        if early and early[0] == pure_script:
+            # generate_script started it while the scenes were being written
+            print("   Waiting for the voiceover started during script generation...")
+            updates = early[1].result()
+        else:
+            if early:
+                # Started for a different script, but it writes the same file
+                early[1].exception()
+            updates = synthesize_voiceover(state, pure_script)
+        set_audio_path(state, pure_script, updates)
         
-        # The function saves to "output.mp3" by default, let's move it to our output folder
-        if os.path.exists("output.mp3"):
-            audio_path = "output/voiceover.mp3"
-            # Remove existing file if it exists
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-            os.rename("output.mp3", audio_path)
-            state["audio_path"] = audio_path
-            print(f"✅ Audio saved: {audio_path}")
+    except Exception as e:
+        print(f"⚠️ Audio generation failed: {e}")
+        state["audio_path"] = None
+    
+    return state
+
+
+async def generate_voiceover_async(state: State) -> State:
+    """generate_voiceover for async graph runs: the sentences are voiced as
+    tasks on the event loop instead of on threads"""
+    print("🎤 Generating voiceover using voiceover.py...")
+    
+    pure_script = voiceover_to_generate(state)
+    if pure_script is None:
+        return state
+    
+    try:
+        early = take_early_voiceover(state)
+        if early:
+            # A task when generate_script_async started it, a thread's future otherwise
+            started = asyncio.wrap_future(early[1]) if isinstance(early[1], Future) else early[1]
+        if early and early[0] == pure_script:
+            print("   Waiting for the voiceover started during script generation...")
+            updates = await started
         else:
-            state["audio_path"] = None
-            print("⚠️ Audio file not generated")
+            if early:
+                # Started for a different script, but it writes the same file
+                await asyncio.gather(started, return_exceptions=True)
+            updates = await synthesize_voiceover_async(state, pure_script)
+        set_audio_path(state, pure_script, updates)
         
     except Exception as e:
         print(f"⚠️ Audio generation failed: {e}")
@@ -331,20 +855,21 @@ def save_script_to_file(state: State) -> State:
             return state
         
         # Save pure script (narration only)
-        pure_script_path = "output/script.txt"
+        pure_script_path = run_file(state, SCRIPT_FILE)
         with open(pure_script_path, "w", encoding="utf-8") as f:
             f.write(pure_script)
         
         print(f"✅ Pure script saved: {pure_script_path}")
         
         # Save full script with scenes
-        full_script_path = "output/script_with_scenes.txt"
+        full_script_path = run_file(state, SCRIPT_WITH_SCENES_FILE)
         with open(full_script_path, "w", encoding="utf-8") as f:
             f.write("🐱 KITTY EXPLAINS - FULL SCRIPT WITH SCENES\n")
             f.write("=" * 50 + "\n\n")
             f.write(script_with_scenes)
         
         print(f"✅ Script with scenes saved: {full_script_path}")
+        addBytes(bytes_out=os.path.getsize(pure_script_path) + os.path.getsize(full_script_path))
         
     except Exception as e:
         state["error"] = f"Script save failed: {e}"
@@ -367,28 +892,39 @@ def generate_video(state: State) -> State:
             print(f"❌ {state['error']}")
             return state
         
-        CLOSED_PNG = "video/cat-closed.png"
-        OPEN_PNG = "video/cat-open.png"
-        VIDEO_FILE = "output/kitty.mp4"
-        OUTPUT_FILE = "output/kitty_explains.mp4"
+        video_file = run_file(state, VIDEO_FILE)
+        output_file = run_file(state, OUTPUT_FILE)
 
-        generateVideo(CLOSED_PNG, OPEN_PNG, VIDEO_FILE, OUTPUT_FILE, audio_path)
-        
-        # The function saves to "output.mp3" by default, let's move it to our output folder
-        state["video_path"] = OUTPUT_FILE
-        print(f"✅ Video saved: {OUTPUT_FILE}")
+        # Rendering is CPU-bound: run it on the scheduler's worker processes
+        stats = getScheduler().render(
+            generateVideo,
+            CLOSED_PNG, OPEN_PNG, video_file, output_file, audio_path,
+            whisper_model=state.get("whisper_model") or None,
+            alignment_mode=state.get("alignment_mode") or None,
+            script=state.get("pure_script"),
+            alignment_path=state.get("alignment_path") or None,
+            cache=getCache(),
+            cues_path=state.get("cues_path") or None,
+            hls_dir=run_file(state, HLS_DIR) if HLS_OUTPUT else None,
+            segment_cache=segment_cache(state),
+        )
+        state["hls_path"] = (stats or {}).get("hls_path")
+        if TRACE_ENABLED:
+            # The steps were measured in the render worker
+            state["trace"] = (stats or {}).get("steps", [])
 
-        if os.path.exists(VIDEO_FILE):
-            os.remove(VIDEO_FILE)
-            os.rename(VIDEO_FILE, OUTPUT_FILE)
-        
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
-            
+        if os.path.exists(output_file):
+            state["video_path"] = output_file
+            addBytes(bytes_in=os.path.getsize(audio_path), bytes_out=os.path.getsize(output_file))
+            print(f"✅ Video saved: {output_file}")
         else:
             state["video_path"] = None
             print("⚠️ Video file not generated")
 
+    except QueueFullError as e:
+        state["error"] = str(e)
+        print(f"❌ {state['error']}")
+
     except Exception as e:
         state["error"] = f"Video generation failed: {e}"
         print(f"❌ {state['error']}")
@@ -409,60 +945,379 @@ def output_result(state: State) -> State:
         if state.get("audio_path"):
             print(f"\n🎵 Audio: {state['audio_path']}")
         if state.get("video_path"):
-            print(f"\n📝 Scripts saved to output folder")
+            print(f"\n🎬 Video: {state['video_path']}")
+            if state.get("hls_path"):
+                print(f"\n📺 HLS: {state['hls_path']}")
+            print(f"\n📝 Scripts saved to {state.get('workspace')}")
+
+    cache = getCache()
+    if cache:
+        print(f"\n🗃️ Cache: {cache.stats()}")
+
+    if TRACE_ENABLED and state.get("workspace"):
+        trace_path = run_file(state, TRACE_FILE)
+        spans = sorted(state.get("trace") or [], key=lambda span: span["start"])
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump({"run_id": state.get("run_id"), "spans": spans}, f, indent=2)
+        print(f"\n⏱️ Trace: {trace_path}")
+        for span in sorted(spans, key=lambda span: -span["wall_seconds"])[:5]:
+            print(f"   {span['stage']:<28} {span['wall_seconds']:>7.2f}s wall {span['cpu_seconds']:>7.2f}s CPU")
     
     print("="*50 + "\n")
     return state
 
 
+def prepare_assets(state: State) -> State:
+    """Node 0: Start the render workers (image decoding, Whisper load) while the script is written"""
+    print("🧰 Preparing render workers...")
+
+    try:
+        # Don't wait: the graph moves in supersteps, so blocking here would hold
+        # up generate_script. Renders queue behind the warm-up instead.
+        getScheduler().startRenderWorkers(wait=False)
+        print("✅ Render workers starting")
+    except Exception as e:
+        # Not fatal: workers will start on the first render instead
+        print(f"⚠️ Render worker warm-up failed: {e}")
+
+    return state
+
+
+def stage_name(node) -> str:
+    """Name a node's metrics and completion markers go under; a node's
+    async version (generate_script_async) shares the sync one's"""
+    return node.__name__.removesuffix("_async")
+
+
+def only_changes(node):
+    """Wrap a node that mutates and returns the whole state so LangGraph only
+    receives the keys it changed; parallel branches then never overwrite each
+    other's fields with stale values."""
+    def changes(before, after):
+        return {key: value for key, value in after.items() if key not in before or before[key] != value}
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: State) -> dict:
+            return changes(dict(state), await node(dict(state)))
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: State) -> dict:
+        return changes(dict(state), node(dict(state)))
+    return wrapper
+
+
+def instrumented(node):
+    """Measure every call of `node` under its name (see metrics.metrics); with
+    KITTY_TRACE on, the span is also added to the run's trace"""
+    def traced(update, span):
+        if TRACE_ENABLED:
+            update = {**update, "trace": update.get("trace", []) + [span]}
+        return update
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: State) -> dict:
+            # CPU time is the event loop thread's, so it includes other runs' work
+            with measure(stage_name(node)) as span:
+                update = await node(state)
+            return traced(update, span)
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: State) -> dict:
+        with measure(stage_name(node)) as span:
+            update = node(state)
+        return traced(update, span)
+    return wrapper
+
+
+def admitted(node):
+    """Turn the job away before `node` if the render queue is already full,
+    rather than after paying for the LLM and TTS"""
+    @functools.wraps(node)
+    def wrapper(state: State) -> dict:
+        if not state.get("error"):
+            try:
+                getScheduler().admit()
+            except QueueFullError as e:
+                print(f"❌ {e}")
+                return {"error": str(e)}
+        return node(state)
+    return wrapper
+
+
+def with_async(node, async_node):
+    """One graph node from a sync node function and its async version:
+    invoke/stream run the first, ainvoke/astream (the LangGraph server) the
+    second, so a run waiting on the network holds no server thread"""
+    return RunnableLambda(node, afunc=async_node, name=stage_name(node))
+
+
+def file_digest(path):
+    return hashFile(path) if path and os.path.exists(path) else None
+
+
+# Stages a retried run can skip. For each: what its artifacts depend on,
+# the state keys it must have set to count as finished, and the workspace
+# files it writes besides the paths it returns.
+RESUMABLE_STAGES = {
+    "parse_notes": (
+        lambda state: [state.get("notes"), state.get("file_ref"), state.get("file_data"), state.get("file_type")],
+        ("notes",), (),
+    ),
+    "generate_script": (
+        lambda state: [state.get("notes"), state.get("duration"), state.get("pure_script"), state.get("script_with_scenes"),
+                       LLM_MODEL, LLM_TEMPERATURE, SUMMARY_MODEL, LLM_FAKE],
+        ("pure_script", "script_with_scenes"), (),
+    ),
+    "generate_voiceover": (
+        lambda state: [state.get("pure_script"), state.get("alignment_mode") or ALIGNMENT_MODE,
+                       VOICE_ID, MODEL_ID, OUTPUT_FORMAT, VOICE_SETTINGS, TTS_CHUNKED, TTS_FAKE],
+        ("audio_path",), (),
+    ),
+    "save_script_to_file": (
+        lambda state: [state.get("pure_script"), state.get("script_with_scenes")],
+        (), (SCRIPT_FILE, SCRIPT_WITH_SCENES_FILE),
+    ),
+    "generate_video": (
+        lambda state: [file_digest(state.get("audio_path")), file_digest(state.get("alignment_path")),
+                       file_digest(state.get("cues_path")), state.get("pure_script"), state.get("whisper_model"),
+                       state.get("alignment_mode") or ALIGNMENT_MODE, HLS_OUTPUT, INCREMENTAL_RENDER],
+        ("video_path",), (),
+    ),
+}
+
+
+def run_workspace(state: State):
+    """The run's workspace, if it has one yet (a retried run's is named by its run_id)"""
+    if state.get("workspace"):
+        return state["workspace"]
+    try:
+        return workspaceDir(state["run_id"]) if state.get("run_id") else None
+    except ValueError:
+        return None  # parse_notes reports it
+
+
+def completed_stage(stage: str, state: State):
+    """State updates `stage` made in an earlier attempt of this run, if its
+    inputs and artifacts are unchanged since"""
+    workspace = run_workspace(state)
+    if not RESUME_ENABLED or not workspace:
+        return None
+    inputs, _, _ = RESUMABLE_STAGES[stage]
+    return loadStageMarker(workspace, stage, makeKey(*inputs(state)))
+
+
+def resumable(node):
+    """Skip `node` when an earlier attempt of the run (same run_id) finished
+    it for the same inputs, returning what it returned then. Otherwise run it
+    and, if it succeeds, record its updates and artifacts in the workspace."""
+    stage = stage_name(node)
+    inputs, required, files = RESUMABLE_STAGES[stage]
+
+    def earlier_outputs(state: State):
+        """(inputs key, what an earlier attempt returned or None)"""
+        inputs_key = makeKey(*inputs(state))
+        workspace = run_workspace(state)
+        outputs = loadStageMarker(workspace, stage, inputs_key) if workspace else None
+        if outputs is not None:
+            print(f"⏩ {stage}: done by an earlier attempt of this run, reusing it")
+        return inputs_key, outputs
+
+    def record(state: State, inputs_key: str, update: dict):
+        after = {**state, **update}
+        if after.get("error") or not all(after.get(key) for key in required):
+            return
+        workspace = after["workspace"]
+        paths = [value for value in update.values()
+                 if isinstance(value, str) and value.startswith(workspace + os.sep) and os.path.isfile(value)]
+        paths += [workspaceFile(workspace, name) for name in files]
+        try:
+            saveStageMarker(workspace, stage, inputs_key, {key: value for key, value in update.items() if key != "trace"}, paths)
+        except OSError as e:
+            print(f"⚠️ Could not record {stage} as done: {e}")
+
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def async_wrapper(state: State) -> dict:
+            if state.get("error") or not RESUME_ENABLED:
+                return await node(state)
+            inputs_key, outputs = earlier_outputs(state)
+            if outputs is not None:
+                return outputs
+            update = await node(state)
+            record(state, inputs_key, update)
+            return update
+        return async_wrapper
+
+    @functools.wraps(node)
+    def wrapper(state: State) -> dict:
+        if state.get("error") or not RESUME_ENABLED:
+            return node(state)
+        inputs_key, outputs = earlier_outputs(state)
+        if outputs is not None:
+            return outputs
+        update = node(state)
+        record(state, inputs_key, update)
+        return update
+    return wrapper
+
+
 # Build the LangGraph pipeline
-def create_pipeline():
-    """Create the LangGraph state machine"""
+def create_pipeline(parallel: bool = True, checkpointer=None):
+    """Create the LangGraph state machine.
+
+    parse_notes → generate_script, then voiceover and script saving run side
+    by side, joining with prepare_assets (started at the very beginning)
+    before generate_video. parallel=False builds the original linear chain.
+    Every stage but prepare_assets and output_result records a completion
+    marker, so invoking the graph again with a failed run's run_id continues
+    from the first stage that didn't finish (see resumable).
+    generate_script and generate_voiceover also have async versions, which
+    graph.ainvoke/astream (and so the LangGraph server) run instead.
+    The LangGraph server supplies its own checkpointer; pass one to persist
+    runs elsewhere.
+    """
     workflow = StateGraph(State)
     
     # Add nodes
-    workflow.add_node("parse_notes", parse_notes)
-    workflow.add_node("generate_script", generate_script)
-    workflow.add_node("generate_voiceover", generate_voiceover)
-    workflow.add_node("save_script_to_file", save_script_to_file)
-    workflow.add_node("generate_video", generate_video)
-    workflow.add_node("output_result", output_result)
+    workflow.add_node("parse_notes", instrumented(admitted(resumable(only_changes(parse_notes)))))
+    workflow.add_node("generate_script", with_async(
+        instrumented(resumable(only_changes(generate_script))),
+        instrumented(resumable(only_changes(generate_script_async))),
+    ))
+    workflow.add_node("generate_voiceover", with_async(
+        instrumented(resumable(only_changes(generate_voiceover))),
+        instrumented(resumable(only_changes(generate_voiceover_async))),
+    ))
+    workflow.add_node("save_script_to_file", instrumented(resumable(only_changes(save_script_to_file))))
+    workflow.add_node("generate_video", instrumented(resumable(only_changes(generate_video))))
+    workflow.add_node("output_result", instrumented(only_changes(output_result)))
     
     # Define edges
-    workflow.set_entry_point("parse_notes")
-    workflow.add_edge("parse_notes", "generate_script")
-    workflow.add_edge("generate_script", "generate_voiceover")
-    workflow.add_edge("generate_voiceover", "save_script_to_file")
-    workflow.add_edge("save_script_to_file", "generate_video")
+    if parallel:
+        workflow.add_node("prepare_assets", instrumented(only_changes(prepare_assets)))
+        workflow.add_edge(START, "parse_notes")
+        workflow.add_edge(START, "prepare_assets")
+        workflow.add_edge("parse_notes", "generate_script")
+        workflow.add_edge("generate_script", "generate_voiceover")
+        workflow.add_edge("generate_script", "save_script_to_file")
+        workflow.add_edge(["generate_voiceover", "save_script_to_file", "prepare_assets"], "generate_video")
+    else:
+        workflow.set_entry_point("parse_notes")
+        workflow.add_edge("parse_notes", "generate_script")
+        workflow.add_edge("generate_script", "generate_voiceover")
+        workflow.add_edge("generate_voiceover", "save_script_to_file")
+        workflow.add_edge("save_script_to_file", "generate_video")
     workflow.add_edge("generate_video", "output_result")
     workflow.add_edge("output_result", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
 # Create the graph instance for LangGraph Studio
 graph = create_pipeline()
 
 
-def run_pipeline(lecture_notes: str):
-    """Run the complete pipeline"""
-    print("🚀 Starting Kitty Educator Pipeline...\n")
-    
-    # Run pipeline
-    result = graph.invoke({
+def pipeline_input(lecture_notes: str, run_id: str = "", duration: str = "30s", pure_script: str = "") -> dict:
+    return {
+        "run_id": run_id,
+        "duration": duration,
         "notes": lecture_notes,
+        "file_ref": "",
         "file_data": "",
         "file_type": "text",
-        "pure_script": "",
+        "pure_script": pure_script,
         "script_with_scenes": "",
         "audio_path": "",
         "video_path": "",
         "error": ""
-    })
+    }
+
+
+def run_pipeline(lecture_notes: str, run_id: str = "", duration: str = "30s", pure_script: str = ""):
+    """Run the complete pipeline. Pass an earlier run's run_id with an edited
+    pure_script to redo only the sentences that changed."""
+    print("🚀 Starting Kitty Educator Pipeline...\n")
+    
+    # Run pipeline
+    result = graph.invoke(pipeline_input(lecture_notes, run_id, duration, pure_script))
     
     return result
 
 
+async def run_pipeline_async(lecture_notes: str, run_id: str = "", duration: str = "30s", pure_script: str = ""):
+    """run_pipeline for async code, with the async script and voiceover
+    nodes: many runs can wait on OpenAI and ElevenLabs in one event loop"""
+    print("🚀 Starting Kitty Educator Pipeline...\n")
+    return await graph.ainvoke(pipeline_input(lecture_notes, run_id, duration, pure_script))
+
+
+# File extensions run_batch accepts, by the file_type parse_notes expects
+# (legacy .ppt files are not zip-based, so python-pptx cannot read them)
+BATCH_FILE_TYPES = {".pdf": "pdf", ".pptx": "pptx", ".txt": "text", ".md": "text"}
+
+
+def batch_input(item, duration: str = "30s") -> dict:
+    """Graph input for one run_batch item: lecture notes, the path of a
+    PDF/PPTX/text file, or a dict of State fields (optionally with "path").
+    A string ending in one of BATCH_FILE_TYPES is always a path, so a missing
+    file is an error rather than a video about its name."""
+    if isinstance(item, str):
+        item = {"path": item} if os.path.splitext(item)[1].lower() in BATCH_FILE_TYPES else {"notes": item}
+    inputs = {"duration": duration, "file_type": "text", "error": "", **item}
+    path = inputs.pop("path", None)
+    if path:
+        file_type = BATCH_FILE_TYPES.get(os.path.splitext(path)[1].lower())
+        if file_type is None:
+            raise ValueError(f"Unsupported file: {path}")
+        if file_type == "text":
+            with open(path, encoding="utf-8") as f:
+                inputs["notes"] = f.read()
+        else:
+            # Same path as an upload: the graph state only carries the ref
+            with open(path, "rb") as f:
+                inputs["file_ref"] = getBlobStore().putStream(iter(lambda: f.read(1024 * 1024), b""))
+        inputs["file_type"] = file_type
+    return inputs
+
+
+def run_batch(items, duration: str = "30s", concurrency: int = BATCH_CONCURRENCY):
+    """Make a video for every item (see batch_input) in this process.
+
+    Up to `concurrency` items run at once, so one item's LLM and TTS calls
+    overlap another's rendering, and they all share the render workers with
+    their decoded cat frames and loaded Whisper model. A failing item doesn't
+    stop the others: results come back in order, each the final state, or
+    {"error": ...} if the item never got that far.
+    """
+    print(f"📦 Starting batch of {len(items)} video(s), {concurrency} at a time...\n")
+    start = time.perf_counter()
+    getScheduler().startRenderWorkers(wait=False)
+
+    results = [None] * len(items)
+    inputs = []
+    for index, item in enumerate(items):
+        try:
+            inputs.append((index, batch_input(item, duration)))
+        except (OSError, ValueError) as e:
+            results[index] = {"error": f"Invalid batch item: {e}"}
+
+    # Never admit more runs than the render queue holds, or parse_notes turns them away
+    concurrency = max(1, min(concurrency, getScheduler().render_queue_size))
+    outputs = graph.batch([item for _, item in inputs], config={"max_concurrency": concurrency}, return_exceptions=True)
+    for (index, _), output in zip(inputs, outputs):
+        results[index] = {"error": f"Pipeline failed: {output}"} if isinstance(output, Exception) else output
+
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for result in results if result.get("video_path") and not result.get("error"))
+    print(f"📦 Batch finished: {succeeded}/{len(items)} video(s) in {elapsed:.1f}s "
+          f"({succeeded / elapsed * 3600:.0f} videos/hour)")
+    return results
+
+
 if __name__ == "__main__":
     # Example lecture notes
     sample_notes = """
@@ -482,5 +1337,11 @@ if __name__ == "__main__":
     - Example: Finding a word in a dictionary
     """
     
-    # Run the pipeline
-    result = run_pipeline(sample_notes)
+    # Run the pipeline, or a batch: python main.py notes.pdf slides.pptx ...
+    if len(sys.argv) > 1:
+        # Arguments are always files, never notes
+        results = run_batch([{"path": path} for path in sys.argv[1:]])
+        for item, result in zip(sys.argv[1:], results):
+            print(f"   {item}: {result.get('error') or result.get('video_path')}")
+    else:
+        result = run_pipeline(sample_notes)
@@ -0,0 +1,332 @@
+"""
+Per-stage instrumentation for the pipeline.
+
+measure(stage) records one span for a block of work: wall-clock and CPU
+seconds and the bytes read and written (reported from inside the block with
+addBytes). Spans go into process-wide histograms labelled by stage: every
+LangGraph node, and every step of generateVideo. Peak RSS is a high-water
+mark of the whole process, not of a stage (several runs' stages overlap in
+one process), so it is kept per process instead.
+
+The LangGraph server and the render workers are separate processes from
+video_server.py, so each process saves its histograms and peak RSS as a
+JSON snapshot under METRICS_DIR (in the background, at most once every
+FLUSH_SECONDS, and at exit) and video_server merges them into its
+Prometheus /metrics endpoint. The snapshot of the process running the
+graph also carries its scheduler's queue depths, waits and rejections.
+"""
+
+import contextvars
+import json
+import multiprocessing.util
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, so no peak RSS or child CPU
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_DIR = os.path.join(BASE_DIR, os.getenv("KITTY_METRICS_DIR", os.path.join("output", "metrics")))  # relative: to BASE_DIR
+METRICS_ENABLED = os.getenv("KITTY_METRICS", "on").lower() not in ("0", "off", "false", "no")
+# Also keep every span of a run and write them to the run's workspace
+TRACE_ENABLED = os.getenv("KITTY_TRACE", "off").lower() in ("1", "on", "true", "yes")
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("KITTY_METRICS_MAX_AGE", str(7 * 24 * 3600)))
+FLUSH_SECONDS = 1.0
+
+SECONDS_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600]
+BYTES_BUCKETS = [10 ** power for power in range(2, 11)]
+
+# What a span measures: (histogram buckets, Prometheus help text)
+MEASURES = {
+    "wall_seconds": (SECONDS_BUCKETS, "Wall-clock time per pipeline stage"),
+    "cpu_seconds": (SECONDS_BUCKETS, "CPU time per pipeline stage (calling thread, plus child processes in render workers)"),
+    "bytes_in": (BYTES_BUCKETS, "Bytes read per pipeline stage"),
+    "bytes_out": (BYTES_BUCKETS, "Bytes written per pipeline stage"),
+}
+
+# JobScheduler.metrics() values per stage (llm, tts, render): (Prometheus type, help text)
+SCHEDULER_METRICS = {
+    "queue_depth": ("gauge", "Jobs waiting for a slot, per scheduler stage"),
+    "running": ("gauge", "Jobs holding a slot, per scheduler stage"),
+    "completed": ("counter", "Jobs finished, per scheduler stage"),
+    "failed": ("counter", "Jobs that raised, per scheduler stage"),
+    "rejected": ("counter", "Jobs turned away because the render queue was full"),
+    "wait_seconds_total": ("counter", "Seconds jobs spent waiting for a slot, per scheduler stage"),
+    "wait_seconds_max": ("gauge", "Longest wait for a slot so far, per scheduler stage"),
+    "run_seconds_total": ("counter", "Seconds jobs held a slot, per scheduler stage"),
+}
+
+_current_span = contextvars.ContextVar("kitty_metrics_span", default=None)
+
+
+def childCpuSeconds():
+    """CPU time of finished child processes (ffmpeg), in worker processes
+    only. getrusage(RUSAGE_CHILDREN) is process-wide: a render or
+    extraction worker runs one job at a time, so there it is that job's,
+    but in the process running the graph, overlapping runs would add
+    each other's children to their spans."""
+    if resource is None or multiprocessing.parent_process() is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def peakRssBytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Histogram:
+    """Prometheus-style histogram (counts per bucket are kept non-cumulative)"""
+
+    def __init__(self, buckets, counts=None, total=0.0):
+        self.buckets = list(buckets)
+        self.counts = list(counts) if counts else [0] * (len(self.buckets) + 1)  # last: +Inf
+        self.sum = total
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+
+    def merge(self, other):
+        if other.buckets != self.buckets:
+            return  # a snapshot written with different buckets
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+    def toJson(self):
+        return {"buckets": self.buckets, "counts": self.counts, "sum": self.sum}
+
+    @classmethod
+    def fromJson(cls, data):
+        return cls(data["buckets"], data["counts"], data["sum"])
+
+
+def addBytes(bytes_in=0, bytes_out=0):
+    """Count bytes read/written towards the stage being measured, if any"""
+    span = _current_span.get()
+    if span is not None:
+        span["bytes_in"] += bytes_in
+        span["bytes_out"] += bytes_out
+
+
+@contextmanager
+def measure(stage, spans=None):
+    """Measure the enclosed block as `stage`. Yields the span (a dict), which
+    is complete once the block exits; it is also appended to `spans`."""
+    span = {"stage": stage, "start": time.time(), "bytes_in": 0, "bytes_out": 0, "failed": False}
+    token = _current_span.set(span)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time() + childCpuSeconds()
+    try:
+        yield span
+    except BaseException:
+        span["failed"] = True
+        raise
+    finally:
+        _current_span.reset(token)
+        span["wall_seconds"] = time.perf_counter() - wall_start
+        span["cpu_seconds"] = time.thread_time() + childCpuSeconds() - cpu_start
+        span["process_peak_rss_bytes"] = peakRssBytes()  # of the process so far, for traces
+        if spans is not None:
+            spans.append(span)
+        if METRICS_ENABLED:
+            getMetrics().observe(span)
+
+
+class Metrics:
+    """Histograms of every span measured in this process. observe() only
+    marks them changed; a background thread saves them to `directory` at
+    most once every FLUSH_SECONDS, and once more when the process exits."""
+
+    def __init__(self, directory=METRICS_DIR):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.path = os.path.join(directory, f"{self.pid}.json")
+        self._histograms = {}  # (measure, stage) -> Histogram
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one save at a time, so an older snapshot never wins
+        self._dirty = threading.Event()
+        self._flusher = None
+        self._sources = {}  # snapshot key -> function returning its current (JSON) value
+
+    def addSource(self, key, read):
+        """Save read() under `key` in every snapshot. Call changed() when it
+        would return something new."""
+        with self._lock:
+            self._sources[key] = read
+
+    def changed(self):
+        """Save a new snapshot soon, even without new spans"""
+        with self._lock:
+            self._markDirty()
+
+    def _markDirty(self):
+        # Caller holds self._lock
+        self._dirty.set()
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flushLoop, name="kitty-metrics-flush", daemon=True)
+            self._flusher.start()
+            # Run by multiprocessing's exit handler, which (unlike atexit)
+            # also runs in render worker processes
+            multiprocessing.util.Finalize(None, self.flush, exitpriority=10)
+
+    def observe(self, span):
+        with self._lock:
+            for name, (buckets, _) in MEASURES.items():
+                value = span.get(name)
+                if value is None:
+                    continue
+                histogram = self._histograms.get((name, span["stage"]))
+                if histogram is None:
+                    histogram = self._histograms[(name, span["stage"])] = Histogram(buckets)
+                histogram.observe(value)
+            self._markDirty()
+
+    def _flushLoop(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self):
+        """Save the snapshot now, if anything changed since the last save"""
+        if os.getpid() != self.pid:
+            return  # inherited by a forked child: the snapshot isn't its own
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty.is_set():
+                    return
+                self._dirty.clear()
+                snapshot = self._snapshot()
+            self._readSources(snapshot)
+            try:
+                self._save(snapshot)
+            except OSError as e:
+                print(f"⚠️ Could not save metrics: {e}")
+
+    def _snapshot(self):
+        return {
+            "pid": self.pid,
+            "peak_rss_bytes": peakRssBytes(),
+            "histograms": [{"measure": name, "stage": stage, **histogram.toJson()}
+                           for (name, stage), histogram in self._histograms.items()],
+        }
+
+    def _readSources(self, snapshot):
+        # Outside self._lock: a source takes its own lock, and calls changed() holding none
+        with self._lock:
+            sources = dict(self._sources)
+        for key, read in sources.items():
+            snapshot[key] = read()
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = self._snapshot()
+        self._readSources(snapshot)
+        return snapshot
+
+    def _save(self, snapshot):
+        # Write-then-rename so video_server never reads half a file
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+
+def collectSnapshots(directory=METRICS_DIR, max_age_seconds=SNAPSHOT_MAX_AGE_SECONDS):
+    """Merge the snapshots of every process into ({(measure, stage): Histogram},
+    {pid: peak RSS bytes}, {pid: scheduler metrics per stage}). Snapshots of
+    processes idle for longer than max_age_seconds are removed."""
+    merged = {}
+    peak_rss = {}
+    scheduler = {}
+    if not os.path.isdir(directory):
+        return merged, peak_rss, scheduler
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                continue
+            with open(entry.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue  # removed or replaced while reading
+        if isinstance(snapshot, list):
+            snapshot = {"histograms": snapshot}  # written before peak RSS moved out of the histograms
+        if snapshot.get("peak_rss_bytes"):
+            peak_rss[str(snapshot["pid"])] = snapshot["peak_rss_bytes"]
+        if snapshot.get("scheduler"):
+            scheduler[str(snapshot["pid"])] = snapshot["scheduler"]
+        for item in snapshot["histograms"]:
+            if item["measure"] not in MEASURES:
+                continue
+            histogram = Histogram.fromJson(item)
+            key = (item["measure"], item["stage"])
+            if key in merged:
+                merged[key].merge(histogram)
+            else:
+                merged[key] = histogram
+    return merged, peak_rss, scheduler
+
+
+def prometheusText(histograms, peak_rss=None, scheduler=None):
+    """Prometheus text exposition format for collectSnapshots' result"""
+    lines = [
+        "# HELP kitty_process_peak_rss_bytes Peak resident memory of each pipeline process (LangGraph server, render workers)",
+        "# TYPE kitty_process_peak_rss_bytes gauge",
+        *(f'kitty_process_peak_rss_bytes{{pid="{pid}"}} {peak}' for pid, peak in sorted((peak_rss or {}).items())),
+    ]
+    for name, (kind, help_text) in SCHEDULER_METRICS.items():
+        metric = f"kitty_scheduler_{name}"
+        if kind == "counter" and not name.endswith("_total"):
+            metric += "_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for pid, stages in sorted((scheduler or {}).items()):
+            for stage, values in sorted(stages.items()):
+                if name in values:
+                    lines.append(f'{metric}{{pid="{pid}",stage="{stage}"}} {values[name]}')
+    for name, (_, help_text) in MEASURES.items():
+        metric = f"kitty_stage_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for (measure, stage), histogram in sorted(histograms.items()):
+            if measure != name:
+                continue
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{label}"}} {histogram.sum}')
+            lines.append(f'{metric}_count{{stage="{label}"}} {cumulative}')
+    return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def getMetrics():
+    """Process-wide Metrics instance"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None or _metrics.path != os.path.join(_metrics.directory, f"{os.getpid()}.json"):
+            # (re)created after a fork, so every process saves its own snapshot
+            _metrics = Metrics()
+        return _metrics
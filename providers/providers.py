@@ -0,0 +1,265 @@
+"""
+Shared HTTP clients for the model providers (OpenAI and ElevenLabs).
+
+Every provider gets one connection-pooled httpx client per process, plus one
+async client per event loop, instead of a new client (and new TLS
+connections) per call. Their transport retries 429s, 5xx responses and
+network errors with exponential backoff and full jitter (honouring
+Retry-After), and waits for the provider's rate limiter before every
+attempt, so all calls to a provider share one request budget whether they
+come from sync or async nodes. The SDKs' own retries are turned off where
+these clients are used, so this is the only retry policy.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("KITTY_HTTP_TIMEOUT", "120"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("KITTY_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("KITTY_HTTP_MAX_CONNECTIONS", "64"))  # per provider and client
+HTTP_RETRIES = int(os.getenv("KITTY_HTTP_RETRIES", "4"))
+RETRY_BASE_SECONDS = float(os.getenv("KITTY_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_SECONDS = float(os.getenv("KITTY_RETRY_MAX_SECONDS", "20"))
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+OPENAI = "openai"
+ELEVENLABS = "elevenlabs"
+# Requests per second to each provider, across every run in the process (0: no limit)
+RATE_LIMITS = {
+    OPENAI: float(os.getenv("KITTY_OPENAI_RPS", "8")),
+    ELEVENLABS: float(os.getenv("KITTY_ELEVENLABS_RPS", "10")),
+}
+# Point a provider at another endpoint (a proxy, or a mock server in benchmarks)
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL") or None
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second on average, bursts of up to
+    `burst`. Callers reserve a token and wait until it is theirs, so waiting
+    callers are served in order, sync and async alike."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns how many seconds to wait before using it"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquireAsync(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class ProviderStats:
+    def __init__(self):
+        self.attempts = 0
+        self.retries = 0
+        self.rate_limited = 0  # 429 responses
+        self.errors = 0  # network errors and timeouts
+        self.wait_seconds = 0.0  # spent in the rate limiter
+        self.backoff_seconds = 0.0
+
+    def snapshot(self):
+        return dict(vars(self))
+
+
+_limiters = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def getRateLimiter(provider):
+    """Process-wide rate limiter of `provider`"""
+    with _stats_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(RATE_LIMITS.get(provider, 0.0))
+            _stats[provider] = ProviderStats()
+        return _limiters[provider]
+
+
+def providerStats():
+    """{provider: attempts, retries, 429s, errors, limiter wait and backoff seconds}"""
+    with _stats_lock:
+        return {provider: stats.snapshot() for provider, stats in _stats.items()}
+
+
+def retryDelay(attempt, response=None):
+    """Seconds before retry number `attempt` (0-based): what the provider's
+    Retry-After asks for, else exponential backoff with full jitter"""
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_MAX_SECONDS, float(retry_after)) + random.uniform(0, RETRY_BASE_SECONDS)
+        except ValueError:
+            pass  # an HTTP date: back off as usual
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+class _Attempts:
+    """Bookkeeping shared by the sync and async transports"""
+
+    def __init__(self, provider, retries):
+        self.limiter = getRateLimiter(provider)
+        with _stats_lock:
+            self.stats = _stats[provider]
+        self.retries = retries
+
+    def started(self, waited):
+        with _stats_lock:
+            self.stats.attempts += 1
+            self.stats.wait_seconds += waited
+
+    def retry(self, attempt, response=None, error=None):
+        """Seconds to back off before another attempt, or None to give up"""
+        if attempt >= self.retries:
+            return None
+        delay = retryDelay(attempt, response)
+        with _stats_lock:
+            self.stats.retries += 1
+            self.stats.rate_limited += response is not None and response.status_code == 429
+            self.stats.errors += error is not None
+            self.stats.backoff_seconds += delay
+        return delay
+
+
+class RetryTransport(httpx.BaseTransport):
+    """httpx transport that rate-limits and retries every request to a provider"""
+
+    def __init__(self, provider, transport=None, retries=HTTP_RETRIES):
+        self.transport = transport or httpx.HTTPTransport(limits=_limits())
+        self.attempts = _Attempts(provider, retries)
+
+    def handle_request(self, request):
+        attempt = 0
+        while True:
+            self.attempts.started(self.attempts.limiter.acquire())
+            try:
+                response = self.transport.handle_request(request)
+            except RETRY_ERRORS as e:
+                delay = self.attempts.retry(attempt, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self.attempts.retry(attempt, response) if response.status_code in RETRY_STATUSES else None
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """RetryTransport for httpx.AsyncClient: waits without blocking the event loop"""
+
+    def __init__(self, provider, transport=None, retries=HTTP_RETRIES):
+        self.transport = transport or httpx.AsyncHTTPTransport(limits=_limits())
+        self.attempts = _Attempts(provider, retries)
+
+    async def handle_async_request(self, request):
+        attempt = 0
+        while True:
+            self.attempts.started(await self.attempts.limiter.acquireAsync())
+            try:
+                response = await self.transport.handle_async_request(request)
+            except RETRY_ERRORS as e:
+                delay = self.attempts.retry(attempt, error=e)
+                if delay is None:
+                    raise
+            else:
+                delay = self.attempts.retry(attempt, response) if response.status_code in RETRY_STATUSES else None
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _limits():
+    return httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS)
+
+
+def httpTimeout():
+    return httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+_clients = {}
+# An AsyncClient's connections belong to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()  # loop -> {provider: httpx.AsyncClient}
+_clients_lock = threading.Lock()
+
+
+def getHttpClient(provider):
+    """Process-wide pooled, rate-limited and retrying httpx.Client for `provider`"""
+    with _clients_lock:
+        if provider not in _clients:
+            _clients[provider] = httpx.Client(transport=RetryTransport(provider), timeout=httpTimeout())
+        return _clients[provider]
+
+
+def getAsyncHttpClient(provider):
+    """getHttpClient for async code: one httpx.AsyncClient per provider and
+    event loop, sharing the provider's rate limiter with the sync client"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if provider not in clients:
+            clients[provider] = httpx.AsyncClient(transport=AsyncRetryTransport(provider), timeout=httpTimeout())
+        return clients[provider]
+
+
+_chat_models = {}
+_async_chat_models = weakref.WeakKeyDictionary()  # loop -> {(model, temperature, api_key): ChatOpenAI}
+_chat_models_lock = threading.Lock()
+
+
+def getChatModel(model, temperature, api_key=None):
+    """Shared ChatOpenAI for (model, temperature) on the pooled clients.
+    Called from a coroutine, its async calls use that event loop's client."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    key = (model, temperature, api_key)
+    with _chat_models_lock:
+        models = _chat_models if loop is None else _async_chat_models.setdefault(loop, {})
+        if key not in models:
+            # Imported here: langchain_openai is the slowest import of the pipeline
+            from langchain_openai import ChatOpenAI
+            models[key] = ChatOpenAI(
+                model=model, temperature=temperature, api_key=api_key, stream_usage=True,
+                timeout=httpTimeout(), max_retries=0,
+                http_client=getHttpClient(OPENAI),
+                http_async_client=getAsyncHttpClient(OPENAI) if loop else None,
+            )
+        return models[key]
@@ -0,0 +1,359 @@
+"""
+Job scheduling for the kitty_educator graph.
+
+CPU-bound rendering (Whisper + x264) runs on a bounded process pool, and the
+network-bound stages (LLM, TTS) get their own concurrency limits, so a burst
+of uploads queues up instead of fighting over the CPU. When too many renders
+are already waiting, new work is rejected with QueueFullError.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+from metrics.metrics import METRICS_ENABLED, getMetrics
+
+RENDER_WORKERS = int(os.getenv("KITTY_RENDER_WORKERS", "2"))
+RENDER_QUEUE_SIZE = int(os.getenv("KITTY_RENDER_QUEUE_SIZE", "8"))  # renders running + waiting
+STAGE_LIMITS = {
+    "llm": int(os.getenv("KITTY_LLM_CONCURRENCY", "8")),
+    "tts": int(os.getenv("KITTY_TTS_CONCURRENCY", "4")),
+}
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the render queue is full and a job can't be admitted"""
+
+
+def _timedCall(fn, args, kwargs):
+    # Runs in the worker: report when the job actually started so the
+    # parent can tell queueing time from run time
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+def _noop():
+    pass
+
+
+def _grant(future):
+    # On the waiter's event loop; it may have given up in the meantime
+    if not future.done():
+        future.set_result(None)
+
+
+class StageSlots:
+    """Counting semaphore shared by threads and event loops that hands out
+    slots first come, first served. release() passes its slot straight to
+    the oldest waiter: a threading.Event for a thread, or a future on its
+    loop (set with call_soon_threadsafe) for a coroutine."""
+
+    def __init__(self, limit):
+        self._lock = threading.Lock()
+        self._free = limit
+        self._waiters = deque()
+
+    def _take(self, waiter):
+        """Take a free slot (True), or queue `waiter` for one (False)"""
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def _abandon(self, waiter):
+        """Leave the queue after an interrupted wait"""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return
+            except ValueError:
+                pass
+        # The slot was already handed over: pass it on
+        self.release()
+
+    def acquire(self):
+        event = threading.Event()
+        if self._take(event):
+            return
+        try:
+            event.wait()
+        except BaseException:
+            self._abandon(event)
+            raise
+
+    async def acquireAsync(self):
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        if self._take(waiter):
+            return
+        try:
+            await waiter[1]
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                    return
+                except RuntimeError:
+                    continue  # its event loop is closed, so nobody is waiting
+            self._free += 1
+
+
+class StageMetrics:
+    def __init__(self):
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def recordWait(self, wait_seconds):
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self):
+        finished = self.completed + self.failed
+        return {
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_seconds_avg": self.wait_seconds_total / finished if finished else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+            "run_seconds_avg": self.run_seconds_total / finished if finished else 0.0,
+            "wait_seconds_total": self.wait_seconds_total,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+
+class JobScheduler:
+    def __init__(self, render_workers=RENDER_WORKERS, render_queue_size=RENDER_QUEUE_SIZE,
+                 stage_limits=None, worker_initializer=None, worker_initargs=()):
+        self.render_workers = render_workers
+        self.render_queue_size = render_queue_size
+        self.worker_initializer = worker_initializer
+        self.worker_initargs = worker_initargs
+        self._lock = threading.Lock()
+        self._pool = None
+        self._inline_render = threading.Semaphore(1)
+        self._inline_warmed = False
+        self._slots = {name: StageSlots(limit) for name, limit in (stage_limits or STAGE_LIMITS).items()}
+        self._metrics = {name: StageMetrics() for name in [*self._slots, "render"]}
+        self.on_change = None  # called after the stage metrics change
+
+    def _renderPool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn, not fork: the LangGraph server process is multi-threaded
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.render_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.worker_initializer,
+                    initargs=self.worker_initargs,
+                )
+            return self._pool
+
+    def setWorkerInitializer(self, initializer, initargs=()):
+        """Function each render worker runs once at start (e.g. to load models).
+        Only affects workers started after the call."""
+        with self._lock:
+            self.worker_initializer = initializer
+            self.worker_initargs = initargs
+
+    def startRenderWorkers(self, wait=True):
+        """Start (and warm up) every render worker now instead of on the first
+        render. Without worker processes the initializer runs in-process.
+        With wait=False this returns immediately and renders simply queue
+        behind the warm-up."""
+        if self.render_workers > 0:
+            pool = self._renderPool()
+            # Workers are spawned on demand, so give each one a job
+            futures = [pool.submit(_noop) for _ in range(self.render_workers)]
+            if wait:
+                for future in futures:
+                    future.result()
+            return
+
+        with self._lock:
+            if self.worker_initializer is None or self._inline_warmed:
+                return
+            self._inline_warmed = True
+        if wait:
+            self.worker_initializer(*self.worker_initargs)
+        else:
+            threading.Thread(target=self.worker_initializer, args=self.worker_initargs, daemon=True).start()
+
+    @contextmanager
+    def _updating(self):
+        """Hold self._lock to change the stage metrics, then tell on_change"""
+        try:
+            with self._lock:
+                yield
+        finally:
+            if self.on_change is not None:
+                self.on_change()
+
+    def _checkRenderQueue(self):
+        # Caller holds self._lock
+        metrics = self._metrics["render"]
+        if metrics.waiting + metrics.running >= self.render_queue_size:
+            metrics.rejected += 1
+            raise QueueFullError(f"Render queue is full ({self.render_queue_size} jobs), try again later")
+
+    def admit(self):
+        """Reject a new job up front if the render queue is already full"""
+        with self._updating():
+            self._checkRenderQueue()
+
+    @contextmanager
+    def stage(self, name):
+        """Limit how many calls of a network-bound stage run at once"""
+        metrics = self._metrics[name]
+        slots = self._slots[name]
+        with self._updating():
+            metrics.waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            slots.acquire()
+        except BaseException:
+            with self._updating():
+                metrics.waiting -= 1
+            raise
+        try:
+            started_at = time.perf_counter()
+            with self._updating():
+                metrics.waiting -= 1
+                metrics.running += 1
+                metrics.recordWait(started_at - queued_at)
+            try:
+                yield
+            except BaseException:
+                self._finish(metrics, started_at, failed=True)
+                raise
+            self._finish(metrics, started_at, failed=False)
+        finally:
+            slots.release()
+
+    @asynccontextmanager
+    async def stageAsync(self, name):
+        """stage() for async nodes: waits for a slot without blocking the
+        event loop. Threads and coroutines share the slots and queue for
+        them in one line, in arrival order."""
+        metrics = self._metrics[name]
+        slots = self._slots[name]
+        with self._updating():
+            metrics.waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            await slots.acquireAsync()
+        except BaseException:
+            with self._updating():
+                metrics.waiting -= 1
+            raise
+        try:
+            started_at = time.perf_counter()
+            with self._updating():
+                metrics.waiting -= 1
+                metrics.running += 1
+                metrics.recordWait(started_at - queued_at)
+            try:
+                yield
+            except BaseException:
+                self._finish(metrics, started_at, failed=True)
+                raise
+            self._finish(metrics, started_at, failed=False)
+        finally:
+            slots.release()
+
+    def _finish(self, metrics, started_at, failed):
+        with self._updating():
+            metrics.running -= 1
+            metrics.run_seconds_total += time.perf_counter() - started_at
+            if failed:
+                metrics.failed += 1
+            else:
+                metrics.completed += 1
+
+    def render(self, fn, *args, **kwargs):
+        """Run `fn` on the render pool and wait for its result.
+        Raises QueueFullError when the render queue is full."""
+        metrics = self._metrics["render"]
+        with self._updating():
+            self._checkRenderQueue()
+            metrics.waiting += 1
+        queued_at = time.time()
+
+        try:
+            if self.render_workers > 0:
+                started_at, result = self._renderPool().submit(_timedCall, fn, args, kwargs).result()
+            else:
+                with self._inline_render:
+                    started_at, result = _timedCall(fn, args, kwargs)
+        except BaseException:
+            with self._updating():
+                metrics.waiting -= 1
+                metrics.failed += 1
+                metrics.run_seconds_total += time.time() - queued_at
+            raise
+
+        with self._updating():
+            metrics.waiting -= 1
+            metrics.completed += 1
+            metrics.recordWait(max(0.0, started_at - queued_at))
+            metrics.run_seconds_total += time.time() - started_at
+        return result
+
+    def metrics(self):
+        with self._lock:
+            snapshot = {name: stage.snapshot() for name, stage in self._metrics.items()}
+        # Render jobs count as waiting until their result comes back, so split
+        # them into running (one per worker) and queued here
+        render = snapshot["render"]
+        in_system = render["queue_depth"]
+        render["running"] = min(in_system, max(self.render_workers, 1))
+        render["queue_depth"] = in_system - render["running"]
+        return snapshot
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def getScheduler():
+    """Process-wide scheduler shared by every graph run"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+            if METRICS_ENABLED:
+                # Queue depths, waits and rejections go out with this process's metrics snapshot
+                metrics = getMetrics()
+                metrics.addSource("scheduler", _scheduler.metrics)
+                _scheduler.on_change = metrics.changed
+        return _scheduler
@@ -0,0 +1,118 @@
+"""
+Offline stand-in for ChatOpenAI, for benchmarks and local runs.
+
+FakeChatModel is a LangChain chat model, so it works anywhere the pipeline
+uses ChatOpenAI (llm.invoke, llm.stream, their async versions, prompt | llm).
+It waits like a real model (first token latency, prompt processing and
+per-output-token time), reports usage_metadata like the OpenAI integration,
+and answers with a correctly formatted Kitty script for script prompts or a short summary otherwise.
+Set KITTY_FAKE_LLM=1 to run the pipeline with it.
+"""
+
+import asyncio
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from script.summarize import SUMMARY_WORDS, countTokens
+
+KITTY_LINES = [
+    "Kitty stretches, yawns and points a paw at the first idea.",
+    "Kitty knocks a pencil off the desk to show what happens next.",
+    "Then Kitty curls up on the keyboard and explains it again, slower.",
+    "Kitty is very proud of this part.",
+    "Even a sleepy kitten can follow along.",
+]
+
+
+class FakeChatModel(BaseChatModel):
+    first_token_delay: float = 0.5
+    seconds_per_prompt_token: float = 0.00002
+    seconds_per_token: float = 0.01
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _respond(self, prompt):
+        if "---PURE SCRIPT---" in prompt:
+            return self._script(prompt)
+        notes = prompt.split("NOTES:", 1)[-1].split()
+        return " ".join(notes[:SUMMARY_WORDS])
+
+    def _script(self, prompt):
+        match = re.search(r"around (\d+) words", prompt)
+        n_words = int(match.group(1)) if match else 150
+        topic = " ".join(prompt.split("topic:", 1)[-1].split()[:3]).strip(" -:.,") or "this"
+
+        words = f"What is {topic} explained by kitties?".split()
+        line = 0
+        while len(words) < n_words:
+            words += KITTY_LINES[line % len(KITTY_LINES)].split()
+            line += 1
+        pure_script = " ".join(words[:n_words])
+
+        sentences = re.split(r"(?<=[.?!])\s+", pure_script)
+        scenes = [
+            f"[Scene {i}: Kitty on a sunny desk, ears up, surrounded by sticky notes]\nKitty: {sentence}"
+            for i, sentence in enumerate(sentences, 1)
+        ]
+        return f"---PURE SCRIPT---\n{pure_script}\n\n---SCRIPT WITH SCENES---\n" + "\n\n".join(scenes)
+
+    def _reply(self, messages):
+        """(reply text, usage_metadata, seconds before the first token, seconds per reply character)"""
+        prompt = "\n".join(message.content for message in messages if isinstance(message.content, str))
+        text = self._respond(prompt)
+        input_tokens, output_tokens = countTokens(prompt), countTokens(text)
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        first_token_seconds = self.first_token_delay + input_tokens * self.seconds_per_prompt_token
+        return text, usage, first_token_seconds, output_tokens * self.seconds_per_token / max(1, len(text))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text, usage, first_token_seconds, seconds_per_char = self._reply(messages)
+        time.sleep(first_token_seconds + len(text) * seconds_per_char)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        text, usage, first_token_seconds, seconds_per_char = self._reply(messages)
+        await asyncio.sleep(first_token_seconds + len(text) * seconds_per_char)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, usage, first_token_seconds, seconds_per_char = self._reply(messages)
+        time.sleep(first_token_seconds)
+
+        # One chunk per word, paced by its share of the reply's tokens
+        deadline = time.perf_counter()
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            # Sleep to a deadline so per-chunk overhead doesn't add up
+            deadline += len(piece) * seconds_per_char
+            time.sleep(max(0.0, deadline - time.perf_counter()))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text, usage, first_token_seconds, seconds_per_char = self._reply(messages)
+        await asyncio.sleep(first_token_seconds)
+
+        deadline = time.perf_counter()
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            deadline += len(piece) * seconds_per_char
+            await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
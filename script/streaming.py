@@ -0,0 +1,104 @@
+"""
+Streaming script generation.
+
+streamLLM streams a chat model's reply token by token, and
+ScriptStreamParser picks the ---PURE SCRIPT--- section out of the partial
+reply as it grows, so the narration can be shown (and voiced) as soon as
+it is complete instead of after the scene descriptions have been written.
+streamLLMAsync is the same for async nodes.
+"""
+
+import time
+
+from script.summarize import countTokens
+
+PURE_MARKER = "---PURE SCRIPT---"
+SCENES_MARKER = "---SCRIPT WITH SCENES---"
+
+
+def splitScript(script):
+    """(pure_script, script_with_scenes) from a complete reply"""
+    if PURE_MARKER in script and SCENES_MARKER in script:
+        parts = script.split(SCENES_MARKER)
+        return parts[0].replace(PURE_MARKER, "").strip(), parts[1].strip()
+    # Fallback: if format not followed, use the whole thing for both
+    return script, script
+
+
+class ScriptStreamParser:
+    """Feed it tokens; it reports new narration text and, once the scenes
+    marker arrives, the finished pure script (identical to splitScript's)"""
+
+    def __init__(self):
+        self.text = ""
+        self.pure_script = None
+        self._emitted = 0  # end of the narration already reported
+        self._searched = 0  # everything before this has no scenes marker
+
+    def feed(self, token):
+        """Returns (new narration text, pure script if it was just completed)"""
+        self.text += token
+        if self.pure_script is not None:
+            return "", None
+
+        pure_start = self.text.find(PURE_MARKER)
+        if pure_start < 0:
+            return "", None
+        pure_start += len(PURE_MARKER)
+
+        end = self.text.find(SCENES_MARKER, max(pure_start, self._searched))
+        if end >= 0:
+            delta = self.text[max(self._emitted, pure_start):end]
+            self.pure_script = splitScript(self.text[:end] + SCENES_MARKER)[0]
+            return delta, self.pure_script
+
+        # Hold back a tail that might be the start of the scenes marker
+        self._searched = max(pure_start, len(self.text) - len(SCENES_MARKER) + 1)
+        safe_end = self._searched
+        delta = self.text[max(self._emitted, pure_start):safe_end]
+        self._emitted = max(self._emitted, safe_end)
+        return delta, None
+
+
+def streamLLM(llm, prompt, name, model="gpt-4o", on_token=None):
+    """Like summarize.callLLM, but streams the reply and calls on_token(text)
+    for every token. The stats also hold the time to first token."""
+    start = time.perf_counter()
+    first_token_seconds = None
+    response = None
+    for chunk in llm.stream(prompt):
+        response = chunk if response is None else response + chunk
+        if chunk.content:
+            if first_token_seconds is None:
+                first_token_seconds = time.perf_counter() - start
+            if on_token:
+                on_token(chunk.content)
+    return streamResult(response, prompt, name, model, time.perf_counter() - start, first_token_seconds)
+
+
+async def streamLLMAsync(llm, prompt, name, model="gpt-4o", on_token=None):
+    """streamLLM for async code (llm.astream)"""
+    start = time.perf_counter()
+    first_token_seconds = None
+    response = None
+    async for chunk in llm.astream(prompt):
+        response = chunk if response is None else response + chunk
+        if chunk.content:
+            if first_token_seconds is None:
+                first_token_seconds = time.perf_counter() - start
+            if on_token:
+                on_token(chunk.content)
+    return streamResult(response, prompt, name, model, time.perf_counter() - start, first_token_seconds)
+
+
+def streamResult(response, prompt, name, model, seconds, first_token_seconds):
+    """(text, call stats) of a streamed reply"""
+    text = (response.content if response is not None else "") or ""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return text, {
+        "call": name,
+        "prompt_tokens": usage.get("input_tokens") or countTokens(prompt, model),
+        "completion_tokens": usage.get("output_tokens") or countTokens(text, model),
+        "seconds": seconds,
+        "first_token_seconds": first_token_seconds,
+    }
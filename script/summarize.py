@@ -0,0 +1,181 @@
+"""
+Map-reduce condensing of long lecture notes before script generation.
+
+Notes too long for one comfortable prompt are split on their page/slide
+markers into chunks of at most CHUNK_TOKENS, the chunks are summarised
+concurrently (map) and the summaries stand in for the notes in the final
+script prompt (reduce). Every LLM call's token counts and latency are
+recorded so the cost of each mode can be compared. The *Async variants do
+the same from async nodes, with the chunk summaries as tasks on the event
+loop instead of threads.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler.scheduler import getScheduler
+
+# Notes longer than this (in tokens) go through map-reduce. Below it one
+# prompt is faster; well above it the model loses detail (or the context).
+MAP_REDUCE_MIN_TOKENS = int(os.getenv("KITTY_MAP_REDUCE_TOKENS", "32000"))
+CHUNK_TOKENS = int(os.getenv("KITTY_CHUNK_TOKENS", "3000"))
+SUMMARY_CONCURRENCY = int(os.getenv("KITTY_SUMMARY_CONCURRENCY", "8"))
+SUMMARY_WORDS = 120
+MAX_ROUNDS = 3
+
+PAGE_MARKER = re.compile(r"^--- (?:Page|Slide|Part) \d+ ---$", re.MULTILINE)
+
+SUMMARY_PROMPT = """Summarise this part of a set of lecture notes in at most {words} words.
+Keep the key concepts, definitions and examples a short explainer video would need.
+Reply with the summary only.
+
+NOTES:
+{chunk}"""
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model):
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception:
+                # No tiktoken, an unknown model, or no network to fetch the encoding
+                _encodings[model] = None
+        return _encodings[model]
+
+
+def countTokens(text, model="gpt-4o"):
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4  # ~4 characters per token for English text
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def splitPages(notes):
+    """Split extracted notes back into their pages/slides (headers kept).
+    Notes without page markers are split into paragraphs."""
+    starts = [match.start() for match in PAGE_MARKER.finditer(notes)]
+    if not starts:
+        return [paragraph.strip() for paragraph in re.split(r"\n\s*\n", notes) if paragraph.strip()]
+    if starts[0] > 0:
+        starts.insert(0, 0)
+    pages = [notes[start:end].strip() for start, end in zip(starts, starts[1:] + [len(notes)])]
+    return [page for page in pages if page]
+
+
+def chunkPages(pages, max_tokens=CHUNK_TOKENS, model="gpt-4o"):
+    """Pack consecutive pages into chunks of at most ~max_tokens"""
+    chunks = []
+    current, current_tokens = [], 0
+    for page in pages:
+        tokens = countTokens(page, model)
+        pieces = [(page, tokens)]
+        if tokens > max_tokens:
+            # One huge page: cut it into roughly equal pieces
+            n_pieces = -(-tokens // max_tokens)
+            step = -(-len(page) // n_pieces)
+            pieces = [(page[i:i + step], countTokens(page[i:i + step], model)) for i in range(0, len(page), step)]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def callLLM(llm, prompt, name, model="gpt-4o"):
+    """Send one user prompt to a chat model. Returns (text, call stats)."""
+    start = time.perf_counter()
+    response = llm.invoke(prompt)
+    seconds = time.perf_counter() - start
+    text = response.content or ""
+    # Real token counts when the provider reports them, estimates otherwise
+    usage = getattr(response, "usage_metadata", None) or {}
+    return text, {
+        "call": name,
+        "prompt_tokens": usage.get("input_tokens") or countTokens(prompt, model),
+        "completion_tokens": usage.get("output_tokens") or countTokens(text, model),
+        "seconds": seconds,
+    }
+
+
+async def callLLMAsync(llm, prompt, name, model="gpt-4o"):
+    """callLLM for async code (llm.ainvoke)"""
+    start = time.perf_counter()
+    response = await llm.ainvoke(prompt)
+    seconds = time.perf_counter() - start
+    text = response.content or ""
+    usage = getattr(response, "usage_metadata", None) or {}
+    return text, {
+        "call": name,
+        "prompt_tokens": usage.get("input_tokens") or countTokens(prompt, model),
+        "completion_tokens": usage.get("output_tokens") or countTokens(text, model),
+        "seconds": seconds,
+    }
+
+
+def summarizeChunks(llm, chunks, concurrency=SUMMARY_CONCURRENCY, model="gpt-4o", label="map"):
+    """Summarise chunks concurrently, at most `concurrency` at a time (and
+    within the scheduler's LLM limit). Returns (summaries in order, call stats)."""
+    def summarize(indexed):
+        index, chunk = indexed
+        with getScheduler().stage("llm"):
+            return callLLM(llm, SUMMARY_PROMPT.format(words=SUMMARY_WORDS, chunk=chunk),
+                           f"{label} {index + 1}/{len(chunks)}", model)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        results = list(pool.map(summarize, enumerate(chunks)))
+    return [text.strip() for text, _ in results], [stats for _, stats in results]
+
+
+async def summarizeChunksAsync(llm, chunks, concurrency=SUMMARY_CONCURRENCY, model="gpt-4o", label="map"):
+    """summarizeChunks for async code"""
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def summarize(index, chunk):
+        async with limit, getScheduler().stageAsync("llm"):
+            return await callLLMAsync(llm, SUMMARY_PROMPT.format(words=SUMMARY_WORDS, chunk=chunk),
+                                      f"{label} {index + 1}/{len(chunks)}", model)
+
+    results = await asyncio.gather(*(summarize(index, chunk) for index, chunk in enumerate(chunks)))
+    return [text.strip() for text, _ in results], [stats for _, stats in results]
+
+
+def condenseNotes(llm, notes, max_tokens=MAP_REDUCE_MIN_TOKENS, chunk_tokens=CHUNK_TOKENS,
+                  concurrency=SUMMARY_CONCURRENCY, model="gpt-4o"):
+    """Summarise `notes` chunk by chunk until they fit in max_tokens (or
+    MAX_ROUNDS is reached). Returns (condensed notes, call stats)."""
+    calls = []
+    for round_number in range(1, MAX_ROUNDS + 1):
+        chunks = chunkPages(splitPages(notes), chunk_tokens, model)
+        summaries, round_calls = summarizeChunks(llm, chunks, concurrency, model, label=f"map r{round_number}")
+        calls.extend(round_calls)
+        notes = "\n\n".join(f"--- Part {i} ---\n{summary}" for i, summary in enumerate(summaries, 1))
+        if len(chunks) == 1 or countTokens(notes, model) <= max_tokens:
+            break
+    return notes, calls
+
+
+async def condenseNotesAsync(llm, notes, max_tokens=MAP_REDUCE_MIN_TOKENS, chunk_tokens=CHUNK_TOKENS,
+                             concurrency=SUMMARY_CONCURRENCY, model="gpt-4o"):
+    """condenseNotes for async code"""
+    calls = []
+    for round_number in range(1, MAX_ROUNDS + 1):
+        chunks = chunkPages(splitPages(notes), chunk_tokens, model)
+        summaries, round_calls = await summarizeChunksAsync(llm, chunks, concurrency, model, label=f"map r{round_number}")
+        calls.extend(round_calls)
+        notes = "\n\n".join(f"--- Part {i} ---\n{summary}" for i, summary in enumerate(summaries, 1))
+        if len(chunks) == 1 or countTokens(notes, model) <= max_tokens:
+            break
+    return notes, calls
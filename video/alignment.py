@@ -0,0 +1,165 @@
+"""
+Forced alignment of the known narration text, used instead of Whisper ASR.
+
+Both aligners return a Whisper-shaped transcription
+({"text", "segments": [{"start", "end", "text", "words": [...]}]}) so the
+result can go straight into parseWithWhisper(alignment=...), which turns
+it into a WordTimeline.
+"""
+
+import re
+import subprocess
+import numpy as np
+from imageio_ffmpeg import get_ffmpeg_exe
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02       # energy analysis window
+MIN_PAUSE_SECONDS = 0.15   # shorter dips in energy are treated as speech
+MIN_SPEECH_SECONDS = 0.05  # shorter bursts are treated as noise
+
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*$")
+
+
+def splitWords(text):
+    return text.split()
+
+
+def buildTranscription(words):
+    """Group (word, start, end) triples into sentence segments, Whisper style"""
+    segments = []
+    current = []
+    for word, start, end in words:
+        current.append({"word": f" {word}", "start": float(start), "end": float(end)})
+        if SENTENCE_END.search(word):
+            segments.append(current)
+            current = []
+    if current:
+        segments.append(current)
+
+    transcription_segments = [{
+        "start": segment_words[0]["start"],
+        "end": segment_words[-1]["end"],
+        "text": "".join(w["word"] for w in segment_words),
+        "words": segment_words,
+    } for segment_words in segments]
+
+    return {
+        "text": "".join(segment["text"] for segment in transcription_segments),
+        "segments": transcription_segments,
+    }
+
+
+def alignFromCharacters(characters, start_times, end_times):
+    """Word timings from TTS character-level timestamps (e.g. ElevenLabs
+    convert_with_timestamps alignment)"""
+    words = []
+    word_chars, word_start, word_end = [], None, None
+    for char, start, end in zip(characters, start_times, end_times):
+        if char.isspace():
+            if word_chars:
+                words.append(("".join(word_chars), word_start, word_end))
+            word_chars, word_start = [], None
+            continue
+        if word_start is None:
+            word_start = start
+        word_chars.append(char)
+        word_end = end
+    if word_chars:
+        words.append(("".join(word_chars), word_start, word_end))
+
+    return buildTranscription(words)
+
+
+def loadSamples(path, sample_rate=SAMPLE_RATE):
+    """Decode any audio file to mono float32 samples with ffmpeg"""
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-loglevel", "error",
+        "-i", path,
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "s16le",
+        "-"
+    ]
+    raw = subprocess.run(ffmpeg_cmd, check=True, capture_output=True).stdout
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def voicedRegions(samples, sample_rate=SAMPLE_RATE):
+    """Find (start, end) regions of speech from short-time energy"""
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    n_frames = len(samples) // frame_length
+    if n_frames == 0:
+        return []
+
+    frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+    # Threshold sits between the noise floor and typical speech level
+    noise_floor, speech_level = np.percentile(energy_db, [10, 95])
+    voiced = energy_db > noise_floor + 0.3 * (speech_level - noise_floor)
+    if speech_level - noise_floor < 6:  # no real dynamics: treat as one region
+        voiced[:] = True
+
+    regions = []
+    change_points = np.flatnonzero(np.diff(voiced.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], change_points, [n_frames]))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if not voiced[start]:
+            continue
+        start_time, end_time = start * FRAME_SECONDS, end * FRAME_SECONDS
+        if regions and start_time - regions[-1][1] < MIN_PAUSE_SECONDS:
+            regions[-1] = (regions[-1][0], end_time)
+        else:
+            regions.append((start_time, end_time))
+
+    return [(start, end) for start, end in regions if end - start >= MIN_SPEECH_SECONDS]
+
+
+def alignSamples(samples, text, sample_rate=SAMPLE_RATE):
+    """Spread the words of `text` over the voiced regions of `samples`,
+    proportionally to their length in characters"""
+    words = splitWords(text)
+    regions = voicedRegions(samples, sample_rate)
+    if not words:
+        return buildTranscription([])
+    if not regions:
+        regions = [(0.0, len(samples) / sample_rate)]
+
+    region_starts = np.array([start for start, _ in regions])
+    region_lengths = np.array([end - start for start, end in regions])
+    speech_offsets = np.concatenate(([0.0], np.cumsum(region_lengths)))
+
+    weights = np.array([len(word) + 1 for word in words], dtype=np.float64)
+    word_bounds = np.concatenate(([0.0], np.cumsum(weights))) / weights.sum() * speech_offsets[-1]
+
+    aligned = []
+    for i, word in enumerate(words):
+        speech_start, speech_end = word_bounds[i], word_bounds[i + 1]
+        # Keep each word inside the region holding its midpoint so it never spans a pause
+        region = min(np.searchsorted(speech_offsets, (speech_start + speech_end) / 2, side="right") - 1, len(regions) - 1)
+        local_start = max(speech_start, speech_offsets[region]) - speech_offsets[region]
+        local_end = min(speech_end, speech_offsets[region + 1]) - speech_offsets[region]
+        aligned.append((word, region_starts[region] + local_start, region_starts[region] + local_end))
+
+    return buildTranscription(aligned)
+
+
+def alignCues(samples, cues, sample_rate=SAMPLE_RATE):
+    """Align each cue's text inside its own time window ([{"start", "end",
+    "text"}], e.g. the sentence offsets from chunked TTS), so a timing error
+    in one sentence can't drift into the next"""
+    words = []
+    for cue in cues:
+        window = samples[int(cue["start"] * sample_rate):int(cue["end"] * sample_rate)]
+        for segment in alignSamples(window, cue["text"], sample_rate)["segments"]:
+            words.extend((word["word"].strip(), cue["start"] + word["start"], cue["start"] + word["end"])
+                         for word in segment["words"])
+    return buildTranscription(words)
+
+
+def alignWithEnergy(path, text, cues=None):
+    """Align the known narration to an audio file without speech recognition"""
+    if cues:
+        return alignCues(loadSamples(path), cues)
+    return alignSamples(loadSamples(path), text)
@@ -1,56 +1,253 @@
 import os
-import whisper
+import functools
+from array import array
+import hashlib
+import json
+import numpy as np
 import subprocess
+import tempfile
+import threading
+import time
 import shutil
 from imageio_ffmpeg import get_ffmpeg_exe
+from PIL import Image
+
+from cache.cache import hashFile, makeKey
+from metrics.metrics import addBytes, measure
+from workspace.workspace import HLS_PLAYLIST, HLS_SEGMENT_PATTERN
+from video.alignment import SAMPLE_RATE, alignFromCharacters, alignSamples, alignWithEnergy, loadSamples
+from voiceover.mp3 import splitMp3
+
+FPS = 24
+FLAP_INTERVAL = 0.1  # seconds per mouth open/close while speaking
+
+# Render modes for generateVideo
+RENDER_TWO_PASS = "two_pass"        # MoviePy encode, then re-encode to burn subtitles
+RENDER_SINGLE_PASS = "single_pass"  # stream frames into one ffmpeg that burns subtitles
+RENDER_SEGMENTS = "segments"        # encode each sentence on its own and join them by stream copy
+
+# Renderers for generateVideo
+RENDERER_FFMPEG = "ffmpeg"    # ffmpeg composites the two PNGs from a concat list
+RENDERER_MOVIEPY = "moviepy"  # per-frame Python callback (fallback)
+
+# How word timings are obtained for generateVideo
+ALIGN_WHISPER = "whisper"  # speech recognition on the voiceover
+ALIGN_TTS = "tts"          # character timestamps returned by the TTS provider
+ALIGN_ENERGY = "energy"    # spread the known script over voiced regions of the audio
+ALIGNMENT_MODE = os.getenv("ALIGNMENT_MODE", ALIGN_WHISPER)
+
+# Whisper model size, overridable per call (e.g. "tiny" for lower latency)
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+# Render workers load the model when they start rather than on their first video
+WHISPER_WARMUP = os.getenv("WHISPER_WARMUP", "on").lower() not in ("0", "off", "false", "no")
+
+# Progressive playback: the final MP4 always carries its index (moov atom)
+# up front and a keyframe every HLS_SEGMENT_SECONDS, so it can also be cut
+# into HLS segments without re-encoding. HLS output is optional.
+HLS_OUTPUT = os.getenv("KITTY_HLS", "off").lower() in ("1", "on", "true", "yes")
+HLS_SEGMENT_SECONDS = int(os.getenv("KITTY_HLS_SEGMENT_SECONDS", "4"))
+
+SUBTITLE_STYLE = "FontName=Comic Sans MS,FontSize=16,PrimaryColour=&H000000&,MarginV=200,Outline=0,Shadow=0"
+
+# Whisper (and torch) and MoviePy are slow to import, so they are imported on
+# first use rather than with this module; both need setupFfmpeg() first
+_ffmpeg_ready = False
+_ffmpeg_lock = threading.Lock()
+
+
+def setupFfmpeg():
+    """Make the bundled imageio-ffmpeg binary visible to Whisper and MoviePy.
+    Runs once per process. Returns the ffmpeg path."""
+    global _ffmpeg_ready
+    ffmpeg_path = get_ffmpeg_exe()
+    with _ffmpeg_lock:
+        if _ffmpeg_ready:
+            return ffmpeg_path
+        ffmpeg_dir = os.path.dirname(ffmpeg_path)
+
+        # Whisper expects 'ffmpeg' command, but imageio-ffmpeg has a versioned name
+        # Create a copy with the standard name if it doesn't exist
+        standard_ffmpeg = os.path.join(ffmpeg_dir, "ffmpeg.exe" if os.name == "nt" else "ffmpeg")
+        if not os.path.exists(standard_ffmpeg):
+            try:
+                shutil.copy2(ffmpeg_path, standard_ffmpeg)
+            except OSError as e:
+                print(f"⚠️ Could not create {standard_ffmpeg} ({e}); Whisper needs ffmpeg on PATH")
+
+        # Add FFmpeg directory to PATH so Whisper can find it
+        if ffmpeg_dir not in os.environ.get("PATH", "").split(os.pathsep):
+            os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ.get("PATH", "")
+
+        # Configure MoviePy to use imageio-ffmpeg (read when moviepy is imported)
+        os.environ["IMAGEIO_FFMPEG_EXE"] = ffmpeg_path
+        _ffmpeg_ready = True
+    return ffmpeg_path
 
-# Get the FFmpeg executable path from imageio-ffmpeg
-ffmpeg_path = get_ffmpeg_exe()
-ffmpeg_dir = os.path.dirname(ffmpeg_path)
-
-# Whisper expects 'ffmpeg' command, but imageio-ffmpeg has a versioned name
-# Create a copy with the standard name if it doesn't exist
-standard_ffmpeg = os.path.join(ffmpeg_dir, "ffmpeg.exe")
-if not os.path.exists(standard_ffmpeg):
-    shutil.copy2(ffmpeg_path, standard_ffmpeg)
-
-# Add FFmpeg directory to PATH so Whisper can find it
-if ffmpeg_dir not in os.environ.get("PATH", ""):
-    os.environ["PATH"] = ffmpeg_dir + os.pathsep + os.environ.get("PATH", "")
-
-# Configure MoviePy to use imageio-ffmpeg
-os.environ["IMAGEIO_FFMPEG_EXE"] = ffmpeg_path
-
-from moviepy.editor import VideoClip, ImageClip, AudioFileClip
 
 def processAudioFile(path):
+    setupFfmpeg()
+    from moviepy.editor import AudioFileClip
     audio_clip = AudioFileClip(path)
     duration = audio_clip.duration
     return audio_clip, duration
 
 
-def parseWithWhisper(path):
-    model = whisper.load_model("base")
-    result = model.transcribe(path, word_timestamps=True)
-
-    # Flatten words into (start, end) times
-    word_times = []
-    for segment in result["segments"]:
-        for word_info in segment.get("words", []):
-            word_times.append((word_info["start"], word_info["end"]))
+# Process-wide Whisper models, loaded lazily and shared across videos.
+# Load time and transcription latency are recorded as metrics.measure spans
+# ("whisper.load.<size>", "whisper.transcribe.<size>"), so they show up in
+# video_server's /metrics along with the render steps.
+_whisper_models = {}
+_whisper_model_locks = {}
+_whisper_registry_lock = threading.Lock()
+
+
+def getWhisperModel(model_size=None):
+    """Return the shared Whisper model for `model_size`, loading it on first use"""
+    model_size = model_size or WHISPER_MODEL_SIZE
+    model = _whisper_models.get(model_size)
+    if model is not None:
+        return model
+
+    with _whisper_registry_lock:
+        if model_size not in _whisper_models:
+            with measure(f"whisper.load.{model_size}") as span:
+                setupFfmpeg()
+                import whisper
+                model = whisper.load_model(model_size)
+            # The lock must exist before the model is visible to the lock-free path above
+            _whisper_model_locks[model_size] = threading.Lock()
+            _whisper_models[model_size] = model
+            print(f"  Loaded Whisper '{model_size}' in {span['wall_seconds']:.2f}s")
+        return _whisper_models[model_size]
+
+
+def warmUpWhisper(model_size=None):
+    """Load the Whisper model ahead of the first request (call at server start)"""
+    getWhisperModel(model_size)
+
+
+def compactTranscription(result):
+    """Keep only what the SRT and mouth timing need from a Whisper result"""
+    return {
+        "text": result.get("text", ""),
+        "segments": [{
+            "start": float(segment["start"]),
+            "end": float(segment["end"]),
+            "text": segment["text"],
+            "words": [{"word": w["word"], "start": float(w["start"]), "end": float(w["end"])} for w in segment.get("words", [])],
+        } for segment in result["segments"]],
+    }
+
+
+def transcribeWithWhisper(path, model_size):
+    """Whisper result for an audio file (or 16 kHz mono float32 samples)"""
+    model_size = model_size or WHISPER_MODEL_SIZE
+    model = getWhisperModel(model_size)
+
+    # transcribe() installs hooks on the model, so calls on one model can't overlap
+    with _whisper_model_locks[model_size]:
+        with measure(f"whisper.transcribe.{model_size}"):
+            return model.transcribe(path, word_timestamps=True)
+
+
+def subtitleCues(segments):
+    """(start, end, text) of every segment with text, ready for writeToSrtFile"""
+    return [(float(segment["start"]), float(segment["end"]), segment["text"].strip())
+            for segment in segments if segment["text"].strip()]
+
+
+class WordTimeline:
+    """Compact word timings of a narration: the speaking intervals (words
+    less than MINIMUM_GAP apart merged) as float64 arrays, plus the subtitle
+    cues. This is all rendering needs, so it replaces the Whisper-shaped
+    transcription (a dict per segment and per word) as soon as alignment is
+    done. Iterates as (start, end) pairs, like the old combined_times list."""
 
     MINIMUM_GAP = 0.05
-    combined_times = []
-    for start, end in word_times:
-        if combined_times and start - combined_times[-1][1] <= MINIMUM_GAP:
-            combined_times[-1] = (combined_times[-1][0], end)
-        else:
-            combined_times.append((start, end))
-
-    return result, combined_times
-
-
+    __slots__ = ("starts", "ends", "cues")
+
+    def __init__(self, starts, ends, cues=()):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.cues = list(cues)
+
+    @classmethod
+    def fromTranscription(cls, transcription, cues=None):
+        """Timeline of a Whisper-shaped transcription. Subtitles come from
+        sentence `cues` ({"start", "end", "text"}) when given, else from the
+        transcription's segments."""
+        starts, ends = array("d"), array("d")
+        for segment in transcription["segments"]:
+            for word_info in segment.get("words", []):
+                if starts and word_info["start"] - ends[-1] <= cls.MINIMUM_GAP:
+                    ends[-1] = word_info["end"]
+                else:
+                    starts.append(word_info["start"])
+                    ends.append(word_info["end"])
+        return cls(starts, ends, subtitleCues(cues or transcription["segments"]))
+
+    @classmethod
+    def fromIntervals(cls, intervals):
+        """Timeline of (start, end) pairs that are already sorted and merged"""
+        intervals = np.array(list(intervals), dtype=np.float64).reshape(-1, 2)
+        return cls(intervals[:, 0].copy(), intervals[:, 1].copy())
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts.tolist(), self.ends.tolist())
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes + self.ends.nbytes
+
+
+def parseWithWhisper(path, model_size=None, alignment=None, cache=None, cues=None):
+    """WordTimeline for `path`. When an `alignment` from video.alignment is
+    given it is used as the transcription and Whisper is not run at all.
+    With a `cache`, transcriptions are keyed on the audio bytes and model size.
+    Sentence `cues`, if any, become the subtitles. The transcription itself
+    is dropped once converted, so it isn't held while the video renders."""
+    if alignment is not None:
+        result = alignment
+    else:
+        model_size = model_size or WHISPER_MODEL_SIZE
+        cache_key = makeKey(hashFile(path), model_size) if cache else None
+        result = cache.getJson("transcription", cache_key) if cache else None
+        if result is None:
+            result = compactTranscription(transcribeWithWhisper(path, model_size))
+            if cache:
+                cache.putJson("transcription", cache_key, result)
+    return WordTimeline.fromTranscription(result, cues)
+
+
+def alignNarration(path, alignment_mode, script=None, alignment_path=None, whisper_model=None, cache=None, cues=None):
+    """WordTimeline of the voiceover, using the known narration text (and
+    sentence `cues`, if any) instead of ASR when the alignment mode allows
+    it. The cues are also the subtitles."""
+    if alignment_mode == ALIGN_TTS and alignment_path and os.path.exists(alignment_path):
+        with open(alignment_path, encoding="utf-8") as f:
+            characters = json.load(f)
+        alignment = alignFromCharacters(
+            characters["characters"],
+            characters["character_start_times_seconds"],
+            characters["character_end_times_seconds"],
+        )
+        return parseWithWhisper(path, alignment=alignment, cues=cues)
+
+    if alignment_mode in (ALIGN_TTS, ALIGN_ENERGY) and (script or cues):
+        return parseWithWhisper(path, alignment=alignWithEnergy(path, script, cues), cues=cues)
+
+    if alignment_mode not in (ALIGN_WHISPER, ALIGN_TTS, ALIGN_ENERGY):
+        raise ValueError(f"Unknown alignment mode: {alignment_mode}")
+    return parseWithWhisper(path, whisper_model, cache=cache, cues=cues)
+
+
+@functools.lru_cache(maxsize=8)
 def fetchStaticImages(closed_png, open_png):
+    setupFfmpeg()
+    from moviepy.editor import ImageClip
     cat_closed = ImageClip(closed_png)
     cat_open   = ImageClip(open_png)
     frame_closed = cat_closed.get_frame(0)
@@ -59,9 +256,22 @@ def fetchStaticImages(closed_png, open_png):
     if frame_closed.shape != frame_open.shape:
         raise ValueError("Cat images must have the same shape!")
 
+    # Decoded once per process and shared by every video, so keep them read-only
+    frame_closed.setflags(write=False)
+    frame_open.setflags(write=False)
     return frame_closed, frame_open
 
 
+def warmUpRenderWorker(closed_png, open_png, whisper_model=None):
+    """Decode the cat images and, if Whisper alignment is in use (and
+    WHISPER_WARMUP is on), load the model. Used as the render worker
+    initializer so this happens off the critical path, while the script and
+    voiceover are still being generated."""
+    fetchStaticImages(closed_png, open_png)
+    if ALIGNMENT_MODE == ALIGN_WHISPER and WHISPER_WARMUP:
+        warmUpWhisper(whisper_model)
+
+
 def make_frame(frame_closed, frame_open, flap_interval, combined_times, t):
     for start, end in combined_times:
         if start <= t <= end:
@@ -71,6 +281,37 @@ def make_frame(frame_closed, frame_open, flap_interval, combined_times, t):
     return frame_closed
 
 
+def buildMouthTimeline(combined_times, flap_interval, duration, fps):
+    """Precompute the open/closed mouth state for every frame.
+
+    Returns a boolean array indexed by frame number (True = mouth open) that
+    matches what make_frame would pick at t = frame / fps. `combined_times`
+    is a WordTimeline or a list of (start, end) pairs.
+    """
+    n_frames = int(np.ceil(duration * fps)) + 1
+    t = np.arange(n_frames) / fps
+    if not isinstance(combined_times, WordTimeline):
+        combined_times = WordTimeline.fromIntervals(combined_times)
+    if not len(combined_times):
+        return np.zeros(n_frames, dtype=bool)
+
+    starts, ends = combined_times.starts, combined_times.ends
+
+    # Intervals are sorted and non-overlapping once combined, so the only
+    # candidate for each frame is the last interval starting at or before it
+    idx = np.searchsorted(starts, t, side="right") - 1
+    safe_idx = np.clip(idx, 0, None)
+    speaking = (idx >= 0) & (t <= ends[safe_idx])
+    phase = ((t - starts[safe_idx]) / flap_interval).astype(np.int64)
+
+    return speaking & (phase % 2 == 0)
+
+
+def make_frame_from_timeline(frame_closed, frame_open, timeline, fps, t):
+    index = min(int(round(t * fps)), len(timeline) - 1)
+    return frame_open if timeline[index] else frame_closed
+
+
 def seconds_to_srt_time(seconds):
     h = int(seconds // 3600)
     m = int((seconds % 3600) // 60)
@@ -80,8 +321,6 @@ def seconds_to_srt_time(seconds):
 
 
 def saveWithMoviePy(video, audio_clip, video_file):
-    FPS = 24
-
     video = video.set_audio(audio_clip)
     
     video.write_videofile(
@@ -92,73 +331,570 @@ def saveWithMoviePy(video, audio_clip, video_file):
     )
 
 
-def writeToSrtFile(srt_file, transcription):
+def writeToSrtFile(srt_file, cues):
+    """Write (start, end, text) cues (see subtitleCues) as an SRT file"""
     with open(srt_file, "w", encoding="utf-8") as f:
-        counter = 1
-        for segment in transcription["segments"]:
-            start = segment["start"]
-            end = segment["end"]
-            text = segment["text"].strip()
-            if not text:
-                continue
+        for counter, (start, end, text) in enumerate(cues, 1):
             f.write(f"{counter}\n")
             f.write(f"{seconds_to_srt_time(start)} --> {seconds_to_srt_time(end)}\n")
             f.write(text + "\n\n")
-            counter += 1
     
 
+def subtitleFilter(srt_file):
+    # Workspace paths may be absolute: escape ':' for the option parser and
+    # quote the whole path for the filtergraph parser
+    filter_path = srt_file.replace("\\", "/").replace(":", "\\:")
+    return f"subtitles='{filter_path}':force_style='{SUBTITLE_STYLE}'"
+
+
+def streamingArgs():
+    """Output options shared by every final encode: keyframes on segment
+    boundaries and the moov atom at the front of the file (faststart)"""
+    return [
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-movflags", "+faststart",
+    ]
+
+
+def writeHls(video_file, hls_dir, segment_seconds=HLS_SEGMENT_SECONDS):
+    """Cut the finished MP4 into MPEG-TS segments plus a VOD playlist. Only
+    remuxes (-c copy): the segments start on the keyframes streamingArgs put
+    in. Returns the playlist path."""
+    shutil.rmtree(hls_dir, ignore_errors=True)  # segments of an earlier render
+    os.makedirs(hls_dir)
+    playlist = os.path.join(hls_dir, HLS_PLAYLIST)
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel", "error",
+        "-i", video_file,
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(hls_dir, HLS_SEGMENT_PATTERN),
+        playlist
+    ]
+    subprocess.run(ffmpeg_cmd, check=True)
+    print(f"HLS playlist saved to {playlist}")
+    return playlist
+
+
 def saveWithFFMPEG(video_file, srt_file, output_file):
     ffmpeg_exe = get_ffmpeg_exe()  # Use the bundled FFmpeg from imageio-ffmpeg
     ffmpeg_cmd = [
         ffmpeg_exe,
         "-y",  # overwrite output if exists
         "-i", video_file,
-        "-vf", f"subtitles={srt_file}:force_style='FontName=Comic Sans MS,FontSize=16,PrimaryColour=&H000000&,MarginV=200,Outline=0,Shadow=0'",
+        "-vf", subtitleFilter(srt_file),
         "-c:a", "copy",  # keep original audio
+        *streamingArgs(),
+        output_file
+    ]
+    subprocess.run(ffmpeg_cmd, check=True)
+    print(f"Final video saved to {output_file}")
+
+
+def saveSinglePass(video, audio_path, srt_file, output_file):
+    """Stream rendered frames into a single ffmpeg process that muxes the audio
+    and burns the subtitles, so the video is only encoded once."""
+    width, height = video.size
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel", "error",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "-s", f"{width}x{height}",
+        "-r", str(FPS),
+        "-i", "-",  # frames arrive on stdin
+        "-i", audio_path,
+        "-vf", subtitleFilter(srt_file),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-shortest",
+        *streamingArgs(),
+        output_file
+    ]
+    process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE)
+    try:
+        for frame in video.iter_frames(fps=FPS, dtype="uint8"):
+            process.stdin.write(frame.tobytes())
+    finally:
+        process.stdin.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise subprocess.CalledProcessError(return_code, ffmpeg_cmd)
+    print(f"Final video saved to {output_file}")
+
+
+def timelineSegments(timeline):
+    """Run-length encode a per-frame timeline into (is_open, n_frames) pairs"""
+    if len(timeline) == 0:
+        return []
+    change_points = np.flatnonzero(np.diff(timeline.astype(np.int8))) + 1
+    bounds = np.concatenate(([0], change_points, [len(timeline)]))
+    return [(bool(timeline[start]), int(end - start)) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def writeStillFrames(frame_closed, frame_open, directory):
+    """Write the decoded frames as uncompressed PPM stills for the compositor.
+    The concat demuxer decodes an image per segment, and PPM is a plain copy
+    where PNG needs inflating; it also keeps pixels identical to MoviePy's."""
+    paths = []
+    for name, frame in (("closed", frame_closed), ("open", frame_open)):
+        still_path = os.path.join(directory, f"cat-{name}.ppm")
+        Image.fromarray(np.ascontiguousarray(frame, dtype=np.uint8)).save(still_path)
+        paths.append(still_path)
+    return paths
+
+
+def writeConcatList(list_file, closed_still, open_still, timeline):
+    """Describe the video as an ffmpeg concat list of the two still images"""
+    closed_path = os.path.abspath(closed_still).replace("'", "'\\''")
+    open_path = os.path.abspath(open_still).replace("'", "'\\''")
+    segments = timelineSegments(timeline)
+    with open(list_file, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for is_open, n_frames in segments:
+            f.write(f"file '{open_path if is_open else closed_path}'\n")
+            f.write(f"duration {n_frames / FPS:.6f}\n")
+        # The concat demuxer ignores the duration of the last entry unless
+        # the file is repeated once more
+        if segments:
+            f.write(f"file '{open_path if segments[-1][0] else closed_path}'\n")
+
+
+def concatInputArgs(list_file):
+    return ["-f", "concat", "-safe", "0", "-i", list_file]
+
+
+def saveWithCompositor(list_file, n_frames, audio_path, srt_file, output_file):
+    """Let ffmpeg build the video from the concat list, mux the audio and burn
+    the subtitles in a single encode - no per-frame Python work."""
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel", "error",
+        *concatInputArgs(list_file),
+        "-i", audio_path,
+        "-map", "0:v",
+        "-map", "1:a",
+        "-vf", f"fps={FPS},{subtitleFilter(srt_file)}",
+        "-frames:v", str(n_frames),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-shortest",
+        *streamingArgs(),
+        output_file
+    ]
+    subprocess.run(ffmpeg_cmd, check=True)
+    print(f"Final video saved to {output_file}")
+
+
+def compositorFrameHashes(list_file, n_frames):
+    """MD5 of every RGB frame the compositor produces, before encoding"""
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-loglevel", "error",
+        *concatInputArgs(list_file),
+        "-vf", f"fps={FPS}",
+        "-frames:v", str(n_frames),
+        "-pix_fmt", "rgb24",
+        "-f", "framemd5",
+        "-"
+    ]
+    output = subprocess.run(ffmpeg_cmd, check=True, capture_output=True, text=True).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in output.splitlines() if line and not line.startswith("#")]
+
+
+def verifyCompositor(closed_png, open_png, timeline, duration, work_dir):
+    """Check the ffmpeg compositor against the MoviePy callback frame for frame.
+    Returns the indices of frames that differ (empty when they match)."""
+    frame_closed, frame_open = fetchStaticImages(closed_png, open_png)
+    n_frames = int(duration * FPS)
+    still_paths = writeStillFrames(frame_closed, frame_open, work_dir)
+    list_file = os.path.join(work_dir, "frames.ffconcat")
+    writeConcatList(list_file, *still_paths, timeline)
+    try:
+        ffmpeg_hashes = compositorFrameHashes(list_file, n_frames)
+    finally:
+        for temp_path in (list_file, *still_paths):
+            os.remove(temp_path)
+
+    mismatches = []
+    for index in range(n_frames):
+        frame = make_frame_from_timeline(frame_closed, frame_open, timeline, FPS, index / FPS)
+        expected = hashlib.md5(np.ascontiguousarray(frame, dtype=np.uint8).tobytes()).hexdigest()
+        if index >= len(ffmpeg_hashes) or ffmpeg_hashes[index] != expected:
+            mismatches.append(index)
+    return mismatches
+
+
+def saveSegment(list_file, n_frames, srt_file, output_file):
+    """Encode one sentence segment: video only, same settings as the full
+    render so segments can be joined without re-encoding"""
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel", "error",
+        *concatInputArgs(list_file),
+        "-vf", f"fps={FPS},{subtitleFilter(srt_file)}",
+        "-frames:v", str(n_frames),
+        "-c:v", "libx264",
+        "-pix_fmt", "yuv420p",
+        "-an",
+        *streamingArgs(),
+        output_file
+    ]
+    subprocess.run(ffmpeg_cmd, check=True)
+
+
+def joinSegments(segment_files, durations, audio_path, list_file, output_file):
+    """Join the encoded segments with stream copy and mux the voiceover.
+    Segments are a whole number of frames, so each is cut to its sentence's
+    exact duration: the next one starts where its audio does, and the video
+    never drifts from the narration."""
+    with open(list_file, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for segment_file, duration in zip(segment_files, durations):
+            f.write(f"file '{os.path.abspath(segment_file)}'\n")
+            f.write(f"duration {duration:.6f}\n")
+    ffmpeg_cmd = [
+        get_ffmpeg_exe(),
+        "-y",
+        "-loglevel", "error",
+        *concatInputArgs(list_file),
+        "-i", audio_path,
+        "-map", "0:v",
+        "-map", "1:a",
+        "-c:v", "copy",
+        "-c:a", "aac",
+        "-shortest",
+        "-movflags", "+faststart",
         output_file
     ]
     subprocess.run(ffmpeg_cmd, check=True)
     print(f"Final video saved to {output_file}")
 
 
-def generateVideo(closed_png, open_png, video_file, output_file, path="voiceover.mp3"):
-    FLAP_INTERVAL = 0.1  # seconds
-    SRT_FILE = "output/subs.srt"
+def alignSegments(path, cues, alignment_mode, whisper_model, segment_cache):
+    """WordTimeline of every cue (sentence), relative to its start. The
+    transcriptions are kept in `segment_cache` by the sentence's audio bytes
+    and text, so only sentences that changed are aligned again."""
+    if alignment_mode not in (ALIGN_WHISPER, ALIGN_ENERGY):
+        raise ValueError(f"No per-sentence alignment for mode: {alignment_mode}")
+    model_size = (whisper_model or WHISPER_MODEL_SIZE) if alignment_mode == ALIGN_WHISPER else None
+    with open(path, "rb") as f:
+        # Chunked TTS joined the sentences frame by frame, so these are the bytes TTS returned
+        sentence_audio = splitMp3(f.read(), [cue["end"] - cue["start"] for cue in cues])
+
+    samples = []  # the whole narration, decoded on the first cache miss
+
+    def loadWindow(cue):
+        if not samples:
+            samples.append(loadSamples(path))
+        return samples[0][int(cue["start"] * SAMPLE_RATE):int(cue["end"] * SAMPLE_RATE)]
+
+    timelines = []
+    for cue, audio in zip(cues, sentence_audio):
+        transcription = sentenceAlignment(audio, cue["text"], alignment_mode, model_size, segment_cache,
+                                          lambda: loadWindow(cue))
+        timelines.append(WordTimeline.fromTranscription(transcription))
+    return timelines
+
+
+def sentenceAlignment(audio, text, alignment_mode, model_size, segment_cache, load_window):
+    """Transcription of one sentence (its MP3 bytes and text), from
+    `segment_cache` if aligned before; `load_window()` gives its samples"""
+    key = makeKey(hashlib.sha256(audio).hexdigest(), text, alignment_mode, model_size)
+    transcription = segment_cache.getJson("segment_alignment", key)
+    if transcription is None:
+        window = load_window()
+        if alignment_mode == ALIGN_WHISPER:
+            transcription = compactTranscription(transcribeWithWhisper(window, model_size))
+        else:
+            transcription = alignSamples(window, text)
+        segment_cache.putJson("segment_alignment", key, transcription)
+    return transcription
+
+
+def imageKey(frame_closed, frame_open):
+    return makeKey(hashlib.sha256(frame_closed.tobytes()).hexdigest(), hashlib.sha256(frame_open.tobytes()).hexdigest())
+
+
+def segmentTimeline(cue, word_timeline, flap_interval):
+    """(mouth timeline, frame count) of one sentence segment"""
+    duration = cue["end"] - cue["start"]
+    n_frames = max(1, int(np.ceil(duration * FPS)))
+    return buildMouthTimeline(word_timeline, flap_interval, duration, FPS)[:n_frames], n_frames
+
+
+def segmentKey(image_key, timeline, n_frames, text):
+    """Cache key of an encoded segment: everything that shows in it"""
+    return makeKey(image_key, np.packbits(timeline).tobytes().hex(), n_frames, text.strip(),
+                   FPS, SUBTITLE_STYLE, HLS_SEGMENT_SECONDS)
 
+
+def encodeSegment(still_paths, timeline, n_frames, text, list_file, srt_file, segment_file):
+    writeConcatList(list_file, *still_paths, timeline)
+    writeToSrtFile(srt_file, subtitleCues([{"start": 0.0, "end": n_frames / FPS, "text": text}]))
+    saveSegment(list_file, n_frames, srt_file, segment_file)
+
+
+def renderSegments(frame_closed, frame_open, path, cues, word_timelines, flap_interval, segment_cache, work_dir, output_file):
+    """Render the video one cue (sentence) at a time and join the segments by
+    stream copy. Encoded segments are kept in `segment_cache` by content (the
+    mouth timeline, subtitle text and images), not by position, so after an
+    edit only the changed sentences are encoded again. Returns the number of
+    segments encoded."""
+    durations = [cue["end"] - cue["start"] for cue in cues]
+    image_key = imageKey(frame_closed, frame_open)
+    list_file = os.path.join(work_dir, "segment.ffconcat")
+    srt_file = os.path.join(work_dir, "segment.srt")
+    join_file = os.path.join(work_dir, "segments.ffconcat")
+    still_paths = []
+    segment_files = []
+    encoded = 0
     try:
-        print(f"  [1/6] Processing audio: {path}")
-        audio_clip, duration = processAudioFile(path)
-        print(f"  ✓ Audio duration: {duration:.2f}s")
+        for index, (cue, word_timeline) in enumerate(zip(cues, word_timelines)):
+            timeline, n_frames = segmentTimeline(cue, word_timeline, flap_interval)
+            key = segmentKey(image_key, timeline, n_frames, cue["text"])
+            segment_file = os.path.join(work_dir, f"segment_{index:04d}.mp4")
+            segment_files.append(segment_file)
+            if segment_cache.getFile("video_segment", key, segment_file):
+                continue
 
-        print(f"  [2/6] Loading images: {closed_png}, {open_png}")
-        frame_closed, frame_open = fetchStaticImages(closed_png, open_png)
-        print(f"  ✓ Images loaded")
+            if not still_paths:
+                still_paths = writeStillFrames(frame_closed, frame_open, work_dir)
+            encodeSegment(still_paths, timeline, n_frames, cue["text"], list_file, srt_file, segment_file)
+            segment_cache.putFile("video_segment", key, segment_file)
+            encoded += 1
+
+        joinSegments(segment_files, durations, path, join_file, output_file)
+        addBytes(bytes_out=sum(fileSize(p) for p in segment_files))
+    finally:
+        for temp_path in (list_file, srt_file, join_file, *still_paths, *segment_files):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return encoded
+
+
+def prerenderSegments(closed_png, open_png, sentences, alignment_mode=None, whisper_model=None, segment_cache=None):
+    """Align and encode the segments of `sentences` ([(cue, MP3 bytes)], as
+    chunked TTS wrote them) into `segment_cache` ahead of generateVideo,
+    whose segmented render then finds them there and only joins them. Run
+    on a render worker while the later sentences are still being voiced.
+    Returns the number of segments encoded."""
+    alignment_mode = alignment_mode or ALIGNMENT_MODE
+    model_size = (whisper_model or WHISPER_MODEL_SIZE) if alignment_mode == ALIGN_WHISPER else None
+    frame_closed, frame_open = fetchStaticImages(closed_png, open_png)
+    image_key = imageKey(frame_closed, frame_open)
+    encoded = 0
+    with measure("video.prerender"), tempfile.TemporaryDirectory(prefix="kitty-prerender-") as work_dir:
+        audio_path = os.path.join(work_dir, "sentence.mp3")
+        list_file = os.path.join(work_dir, "segment.ffconcat")
+        srt_file = os.path.join(work_dir, "segment.srt")
+        segment_file = os.path.join(work_dir, "segment.mp4")
+        still_paths = []
+        for cue, audio in sentences:
+            def loadWindow():
+                with open(audio_path, "wb") as f:
+                    f.write(audio)
+                return loadSamples(audio_path)
+
+            transcription = sentenceAlignment(audio, cue["text"], alignment_mode, model_size, segment_cache, loadWindow)
+            timeline, n_frames = segmentTimeline(cue, WordTimeline.fromTranscription(transcription), FLAP_INTERVAL)
+            key = segmentKey(image_key, timeline, n_frames, cue["text"])
+            if segment_cache.has("video_segment", key):
+                continue
+            if not still_paths:
+                still_paths = writeStillFrames(frame_closed, frame_open, work_dir)
+            encodeSegment(still_paths, timeline, n_frames, cue["text"], list_file, srt_file, segment_file)
+            segment_cache.putFile("video_segment", key, segment_file)
+            addBytes(bytes_in=len(audio), bytes_out=fileSize(segment_file))
+            encoded += 1
+    return encoded
 
-        print(f"  [3/6] Transcribing with Whisper...")
-        transcription, combined_times = parseWithWhisper(path)
-        print(f"  ✓ Transcription complete")
 
-        print(f"  [4/6] Creating video clip...")
-        video = VideoClip(lambda t: make_frame(frame_closed, frame_open, FLAP_INTERVAL, combined_times, t), duration=duration)
-        print(f"  ✓ Video clip created")
-        
-        print(f"  [5/6] Saving video with MoviePy to {video_file}...")
+def fileSize(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def renderWithMoviePy(frame_closed, frame_open, timeline, duration, audio_clip, path, srt_file, video_file, output_file, render_mode):
+    """Render through MoviePy's per-frame callback. Returns intermediate bytes written."""
+    from moviepy.editor import VideoClip
+    video = VideoClip(lambda t: make_frame_from_timeline(frame_closed, frame_open, timeline, FPS, t), duration=duration)
+
+    if render_mode == RENDER_TWO_PASS:
+        print(f"  Saving video with MoviePy to {video_file}...")
         saveWithMoviePy(video, audio_clip, video_file)
+        intermediate_bytes = fileSize(video_file)
         print(f"  ✓ Video saved")
 
-        print(f"  [6/6] Writing subtitle file...")
-        writeToSrtFile(SRT_FILE, transcription)
-        print(f"  ✓ Subtitles written")
-
         print(f"  Adding subtitles with FFmpeg...")
-        saveWithFFMPEG(video_file, SRT_FILE, output_file)
-        print(f"  ✓ Final video complete")
+        saveWithFFMPEG(video_file, srt_file, output_file)
+        return intermediate_bytes
+    if render_mode == RENDER_SINGLE_PASS:
+        print(f"  Rendering and burning subtitles in one pass to {output_file}...")
+        saveSinglePass(video, path, srt_file, output_file)
+        return 0
+    raise ValueError(f"Unknown render mode: {render_mode}")
+
+
+def generateVideo(closed_png, open_png, video_file, output_file, path="voiceover.mp3", render_mode=RENDER_SINGLE_PASS, renderer=RENDERER_FFMPEG, whisper_model=None,
+                  alignment_mode=None, script=None, alignment_path=None, cache=None, cues_path=None, hls_dir=None, segment_cache=None):
+    """Render the talking-kitty video for `path` and return render stats
+    (renderer, mode, wall-clock seconds, bytes written and alignment latency,
+    plus a metrics.measure span per step).
+
+    The ffmpeg compositor is used by default; if it fails the MoviePy
+    renderer is used instead, with `render_mode` picking one or two passes.
+
+    Word timings come from Whisper unless `alignment_mode` is "tts" (provider
+    character timestamps in `alignment_path`) or "energy"; both align the
+    known `script` and skip speech recognition. Whisper results are reused
+    from `cache` (cache.cache.ArtifactCache) when the same audio comes back.
+    Sentence cues from chunked TTS (`cues_path`) give the subtitles exact
+    text and timing. With `hls_dir`, HLS segments and a playlist are written
+    there too.
+
+    With a `segment_cache` (an ArtifactCache for this run) and sentence cues,
+    the video is aligned and encoded sentence by sentence and joined by
+    stream copy (RENDER_SEGMENTS); sentences unchanged since an earlier
+    render reuse their alignment and encoded segment.
+    """
+    alignment_mode = alignment_mode or ALIGNMENT_MODE
+    # Temporary files live next to the output so concurrent runs don't share them
+    work_dir = os.path.dirname(output_file) or "."
+    SRT_FILE = os.path.join(work_dir, "subs.srt")
+    CONCAT_FILE = os.path.join(work_dir, "frames.ffconcat")
+
+    steps = []  # metrics.measure spans of every step, returned in the stats
+
+    try:
+        print(f"  [1/6] Processing audio: {path}")
+        with measure("video.load_audio", steps):
+            addBytes(bytes_in=fileSize(path))
+            audio_clip, duration = processAudioFile(path)
+        print(f"  ✓ Audio duration: {duration:.2f}s")
+
+        print(f"  [2/6] Loading images: {closed_png}, {open_png}")
+        with measure("video.load_images", steps):
+            addBytes(bytes_in=fileSize(closed_png) + fileSize(open_png))
+            frame_closed, frame_open = fetchStaticImages(closed_png, open_png)
+        print(f"  ✓ Images loaded")
+
+        cues = None
+        if cues_path and os.path.exists(cues_path):
+            with open(cues_path, encoding="utf-8") as f:
+                cues = json.load(f)
+
+        segments_encoded = None
+        if segment_cache is not None and cues and renderer == RENDERER_FFMPEG and alignment_mode in (ALIGN_WHISPER, ALIGN_ENERGY):
+            try:
+                print(f"  [3/6] Aligning narration ({alignment_mode}) sentence by sentence...")
+                with measure(f"video.align.{alignment_mode}", steps) as span:
+                    addBytes(bytes_in=fileSize(path) + fileSize(cues_path))
+                    word_timelines = alignSegments(path, cues, alignment_mode, whisper_model, segment_cache)
+                transcribe_seconds = span["wall_seconds"]
+                print(f"  ✓ Alignment complete ({transcribe_seconds:.2f}s)")
+
+                print(f"  [6/6] Rendering {len(cues)} sentence segments...")
+                with measure("video.render.segments", steps):
+                    addBytes(bytes_in=fileSize(path))
+                    render_start = time.perf_counter()
+                    segments_encoded = renderSegments(frame_closed, frame_open, path, cues, word_timelines, FLAP_INTERVAL,
+                                                      segment_cache, work_dir, output_file)
+                    addBytes(bytes_out=fileSize(output_file))
+                render_mode = RENDER_SEGMENTS
+                intermediate_bytes = 0
+                print(f"  ✓ {segments_encoded} of {len(cues)} segment(s) encoded, the rest reused")
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                print(f"  ⚠️ Segmented render failed ({e}), rendering the whole video instead")
+                segments_encoded = None
+
+        if segments_encoded is None:
+            print(f"  [3/6] Aligning narration ({alignment_mode})...")
+            with measure(f"video.align.{alignment_mode}", steps) as span:
+                addBytes(bytes_in=fileSize(path) + (fileSize(cues_path) if cues else 0))
+                word_timeline = alignNarration(path, alignment_mode, script, alignment_path, whisper_model, cache, cues)
+            transcribe_seconds = span["wall_seconds"]
+            print(f"  ✓ Alignment complete ({transcribe_seconds:.2f}s)")
+
+            print(f"  [4/6] Building mouth timeline...")
+            with measure("video.timeline", steps):
+                timeline = buildMouthTimeline(word_timeline, FLAP_INTERVAL, duration, FPS)
+            print(f"  ✓ Timeline built")
+
+            print(f"  [5/6] Writing subtitle file...")
+            with measure("video.subtitles", steps):
+                writeToSrtFile(SRT_FILE, word_timeline.cues)
+                addBytes(bytes_out=fileSize(SRT_FILE))
+            print(f"  ✓ Subtitles written")
+
+            print(f"  [6/6] Rendering video with {renderer}...")
+            with measure(f"video.render.{renderer}", steps) as span:
+                addBytes(bytes_in=fileSize(path))
+                render_start = time.perf_counter()
+                intermediate_bytes = 0
+                if renderer == RENDERER_FFMPEG:
+                    still_paths = []
+                    try:
+                        still_paths = writeStillFrames(frame_closed, frame_open, os.path.dirname(CONCAT_FILE))
+                        writeConcatList(CONCAT_FILE, *still_paths, timeline)
+                        intermediate_bytes = sum(fileSize(p) for p in (CONCAT_FILE, *still_paths))
+                        saveWithCompositor(CONCAT_FILE, int(duration * FPS), path, SRT_FILE, output_file)
+                        render_mode = RENDER_SINGLE_PASS
+                    except (subprocess.CalledProcessError, OSError) as e:
+                        print(f"  ⚠️ ffmpeg compositor failed ({e}), falling back to MoviePy")
+                        renderer = RENDERER_MOVIEPY
+                        span["stage"] = f"video.render.{renderer}"
+                        render_start = time.perf_counter()
+                    finally:
+                        for temp_path in (CONCAT_FILE, *still_paths):
+                            if os.path.exists(temp_path):
+                                os.remove(temp_path)
+
+                if renderer == RENDERER_MOVIEPY:
+                    intermediate_bytes = renderWithMoviePy(frame_closed, frame_open, timeline, duration, audio_clip, path, SRT_FILE, video_file, output_file, render_mode)
+                elif renderer != RENDERER_FFMPEG:
+                    raise ValueError(f"Unknown renderer: {renderer}")
+                addBytes(bytes_out=intermediate_bytes + fileSize(output_file))
+
+        stats = {
+            "renderer": renderer,
+            "mode": render_mode,
+            "seconds": time.perf_counter() - render_start,
+            "bytes_written": intermediate_bytes + fileSize(SRT_FILE) + fileSize(output_file),
+            "transcribe_seconds": transcribe_seconds,
+            "segments": len(cues) if segments_encoded is not None else None,
+            "segments_encoded": segments_encoded,
+            "hls_path": None,
+            "steps": steps,
+        }
+        print(f"  ✓ Final video complete ({stats['renderer']}/{stats['mode']}: {stats['seconds']:.2f}s, {stats['bytes_written']} bytes written)")
+
+        if hls_dir:
+            # The MP4 is complete without it, so a failed remux only loses HLS
+            try:
+                with measure("video.hls", steps):
+                    addBytes(bytes_in=fileSize(output_file))
+                    stats["hls_path"] = writeHls(output_file, hls_dir)
+                    addBytes(bytes_out=sum(fileSize(os.path.join(hls_dir, name)) for name in os.listdir(hls_dir)))
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"  ⚠️ HLS segmenting failed ({e}), serving the MP4 only")
 
         if os.path.exists(video_file):
             os.remove(video_file)
         
         if os.path.exists(SRT_FILE):
             os.remove(SRT_FILE)
+
+        return stats
     except Exception as e:
         print(f"  ✗ Error at step: {str(e)}")
         import traceback
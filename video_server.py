@@ -1,12 +1,34 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import threading
+from dotenv import load_dotenv
 
-app = FastAPI()
+# The local modules below read their KITTY_* settings on import
+load_dotenv()
+
+from blobstore.blobstore import BlobTooLargeError, getBlobStore
+from cache.cache import hashFile
+from metrics.metrics import collectSnapshots, prometheusText
+from workspace.workspace import (
+    HLS_DIR, HLS_PLAYLIST, HLS_SEGMENT_FILE, OUTPUT_FILE, latestOutput, startCleanupThread, workspaceDir,
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Remove stale per-run workspaces in the background while the server runs
+    stop_cleanup = startCleanupThread()
+    stop_blob_cleanup = getBlobStore().startCleanupThread()
+    yield
+    stop_cleanup.set()
+    stop_blob_cleanup.set()
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",  # frontend
@@ -18,14 +40,134 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],  # or ["*"] for all methods
+    allow_methods=["GET", "HEAD", "POST", "OPTIONS"],  # or ["*"] for all methods
     allow_headers=["*"],
+    expose_headers=["Content-Range", "Accept-Ranges", "ETag", "Last-Modified"],
 )
 
-@app.get("/video")
-def get_video():
-    filename = "kitty_explains.mp4"
-    path = os.path.join(OUTPUT_DIR, filename)
+
+class VideoFileResponse(FileResponse):
+    # Bigger reads than the 64 KiB default: fewer event loop round trips per
+    # video. Servers offering the ASGI pathsend extension skip this entirely
+    # and send whole files zero-copy (sendfile).
+    chunk_size = 1024 * 1024
+
+
+# Content hashes of served files, keyed by (path, mtime, size)
+_etags = {}
+_etags_lock = threading.Lock()
+
+
+def file_etag(path, stat_result):
+    """Strong ETag: the sha256 of the file's bytes, computed once per version"""
+    key = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    with _etags_lock:
+        etag = _etags.get(key)
+    if etag is None:
+        etag = f'"{hashFile(path)}"'
+        with _etags_lock:
+            if len(_etags) > 1024:
+                _etags.clear()
+            _etags[key] = etag
+    return etag
+
+
+def is_not_modified(request, etag, stat_result):
+    """Conditional GET (RFC 9110): If-None-Match wins over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def serve_file(request, path, cache_control, media_type="video/mp4", filename=OUTPUT_FILE):
+    """FileResponse with a strong ETag, 304s for conditional requests and
+    Range support (206 Partial Content) for seeking"""
+    stat_result = os.stat(path)
+    etag = file_etag(path, stat_result)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+    if is_not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+    # Starlette handles Range / If-Range (and 416) from here, matching
+    # If-Range against our ETag
+    return VideoFileResponse(path, media_type=media_type, filename=filename, headers=headers, stat_result=stat_result)
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    # The raw file is the request body. It is streamed into the blob store and
+    # the graph input only carries the returned file_ref, never the file itself.
+    writer = getBlobStore().writer()
+    try:
+        async for chunk in request.stream():
+            writer.write(chunk)
+    except BlobTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BaseException:
+        writer.abort()
+        raise
+    if writer.size == 0:
+        writer.abort()
+        raise HTTPException(status_code=400, detail="Empty upload")
+    return {"file_ref": writer.commit(), "size": writer.size}
+
+
+def run_path(run_id, *names):
+    try:
+        return os.path.join(workspaceDir(run_id), *names)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid run id")
+
+
+@app.api_route("/video/{run_id}", methods=["GET", "HEAD"])
+def get_run_video(run_id: str, request: Request):
+    path = run_path(run_id, OUTPUT_FILE)
     if not os.path.exists(path):
-        raise HTTPException(status_code=404, detail=f"Video not found at {path}")
-    return FileResponse(path, media_type="video/mp4", filename=filename)
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=f"Video not found for run {run_id}")
+    # A run's video doesn't change once written; the ETag covers re-renders
+    return serve_file(request, path, "private, max-age=3600")
+
+
+@app.api_route("/video/{run_id}/hls/{name}", methods=["GET", "HEAD"])
+def get_run_hls(run_id: str, name: str, request: Request):
+    # index.m3u8 lists its segments by relative URL, so players fetch them
+    # from this same route one segment at a time (written when KITTY_HLS is on)
+    if name == HLS_PLAYLIST:
+        media_type = "application/vnd.apple.mpegurl"
+    elif HLS_SEGMENT_FILE.match(name):
+        media_type = "video/mp2t"
+    else:
+        raise HTTPException(status_code=404, detail=f"Not an HLS file: {name}")
+    path = run_path(run_id, HLS_DIR, name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"HLS output not found for run {run_id}")
+    return serve_file(request, path, "private, max-age=3600", media_type=media_type, filename=None)
+
+
+@app.api_route("/video", methods=["GET", "HEAD"])
+def get_video(request: Request):
+    # Most recent video across runs, for clients that don't know their run id
+    path = latestOutput()
+    if path is None:
+        raise HTTPException(status_code=404, detail="No video has been generated yet")
+    # Points at a different file after every run: always revalidate
+    return serve_file(request, path, "no-cache")
+
+
+@app.get("/metrics")
+def metrics():
+    # Per-stage histograms and per-process peak RSS recorded by the pipeline
+    # processes (LangGraph server and render workers), merged from their snapshots
+    return PlainTextResponse(prometheusText(*collectSnapshots()), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,158 @@
+"""
+Offline stand-in for the ElevenLabs client, for benchmarks and local runs.
+
+FakeElevenLabs().text_to_speech mirrors the convert / stream /
+convert_with_timestamps calls used by voiceover.py and yields valid
+128 kbps MP3 frames in chunks, with configurable delays, so
+time-to-first-byte and memory use can be measured without network access.
+The audio is speech: the frames of the narration fixture
+(FAKE_TTS_AUDIO), repeated for as long as the text takes to say, so
+alignment downstream works on real speech dynamics. Set
+KITTY_FAKE_TTS_AUDIO=silent for silent frames. FakeAsyncElevenLabs does
+the same for AsyncElevenLabs, waiting with asyncio.sleep.
+"""
+
+import asyncio
+import base64
+import functools
+import os
+import time
+from types import SimpleNamespace
+
+from voiceover.mp3 import audioFrames
+
+WORDS_PER_SECOND = 2.5
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# MP3 (44.1 kHz mono, no bit reservoir) whose frames the fake voices with
+FAKE_TTS_AUDIO = os.getenv("KITTY_FAKE_TTS_AUDIO", os.path.join(BASE_DIR, "benchmarks", "fixtures", "narration.mp3"))
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, mono, no CRC/padding. An all-zero
+# body decodes to 1152 samples of silence.
+MP3_FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0xC4])
+MP3_FRAME_BYTES = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+SILENT_MP3_FRAME = MP3_FRAME_HEADER + bytes(MP3_FRAME_BYTES - len(MP3_FRAME_HEADER))
+
+
+def silentMp3(seconds):
+    """A complete silent MP3 of roughly `seconds` (e.g. for audio fixtures)"""
+    return SILENT_MP3_FRAME * max(1, round(seconds / MP3_FRAME_SECONDS))
+
+
+@functools.lru_cache(maxsize=4)
+def speechFrames(path=FAKE_TTS_AUDIO):
+    """The MP3 frames the fake voices with: those of `path`, or one silent
+    frame if it is "silent" or missing"""
+    if path == "silent" or not os.path.exists(path):
+        return (SILENT_MP3_FRAME,)
+    with open(path, "rb") as f:
+        data = f.read()
+    frames = audioFrames(data)
+    if any(samples / sample_rate != MP3_FRAME_SECONDS for _, _, samples, sample_rate in frames):
+        raise ValueError(f"{path} must be 44.1 kHz MPEG-1 Layer III, like the silent frames")
+    return tuple(data[start:end] for start, end, _, _ in frames)
+
+
+class FakeTextToSpeech:
+    def __init__(self, first_byte_delay, chunk_delay, chunk_size, seconds_per_word, audio_path=FAKE_TTS_AUDIO):
+        self.first_byte_delay = first_byte_delay
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.seconds_per_word = seconds_per_word
+        self.frames = speechFrames(audio_path)
+        self.requests = []
+
+    def frameCount(self, text):
+        return max(1, round(len(text.split()) * self.seconds_per_word / MP3_FRAME_SECONDS))
+
+    def audioBytes(self, text):
+        n_frames = self.frameCount(text)
+        cycles, rest = divmod(n_frames, len(self.frames))
+        return cycles * sum(map(len, self.frames)) + sum(map(len, self.frames[:rest]))
+
+    def audioChunks(self, text, delays):
+        """Yield the MP3 for `text` in chunk_size pieces without ever
+        holding the whole track, sleeping until each chunk's due time"""
+        due = time.perf_counter()
+        pending = bytearray()
+        n_frames = self.frameCount(text)
+        index = 0
+        for frame_index in range(n_frames):
+            pending += self.frames[frame_index % len(self.frames)]
+            while len(pending) >= self.chunk_size or (frame_index == n_frames - 1 and pending):
+                chunk = bytes(pending[:self.chunk_size])
+                del pending[:self.chunk_size]
+                due += delays(index)
+                index += 1
+                pause = due - time.perf_counter()
+                if pause > 0:
+                    time.sleep(pause)
+                yield chunk
+
+    def stream(self, voice_id, *, text, **kwargs):
+        self.requests.append(text)
+        yield from self.audioChunks(text, lambda index: self.first_byte_delay if index == 0 else self.chunk_delay)
+
+    def convertDelays(self, text):
+        """The real convert endpoint only answers once synthesis is finished"""
+        n_chunks = -(-self.audioBytes(text) // self.chunk_size)
+        total_delay = self.first_byte_delay + self.chunk_delay * (n_chunks - 1)
+        return lambda index: total_delay if index == 0 else 0.0
+
+    def convert(self, voice_id, *, text, **kwargs):
+        self.requests.append(text)
+        yield from self.audioChunks(text, self.convertDelays(text))
+
+    def timestampsResponse(self, text, audio):
+        """The whole MP3 (base64) plus character timings spread evenly over it"""
+        seconds = len(audioFrames(audio)) * MP3_FRAME_SECONDS
+        step = seconds / max(1, len(text))
+        return SimpleNamespace(
+            audio_base_64=base64.b64encode(audio).decode("ascii"),
+            alignment=SimpleNamespace(
+                characters=list(text),
+                character_start_times_seconds=[index * step for index in range(len(text))],
+                character_end_times_seconds=[(index + 1) * step for index in range(len(text))],
+            ),
+        )
+
+    def convert_with_timestamps(self, voice_id, *, text, **kwargs):
+        return self.timestampsResponse(text, b"".join(self.convert(voice_id, text=text)))
+
+
+class FakeAsyncTextToSpeech(FakeTextToSpeech):
+    async def audioChunksAsync(self, text, delays):
+        """audioChunks without blocking the event loop"""
+        due = time.perf_counter()
+        for index, chunk in enumerate(self.audioChunks(text, lambda index: 0.0)):
+            due += delays(index)
+            pause = due - time.perf_counter()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            yield chunk
+
+    async def stream(self, voice_id, *, text, **kwargs):
+        self.requests.append(text)
+        async for chunk in self.audioChunksAsync(text, lambda index: self.first_byte_delay if index == 0 else self.chunk_delay):
+            yield chunk
+
+    async def convert(self, voice_id, *, text, **kwargs):
+        self.requests.append(text)
+        async for chunk in self.audioChunksAsync(text, self.convertDelays(text)):
+            yield chunk
+
+    async def convert_with_timestamps(self, voice_id, *, text, **kwargs):
+        return self.timestampsResponse(text, b"".join([chunk async for chunk in self.convert(voice_id, text=text)]))
+
+
+class FakeElevenLabs:
+    def __init__(self, first_byte_delay=0.3, chunk_delay=0.02, chunk_size=4096, seconds_per_word=1 / WORDS_PER_SECOND,
+                 audio_path=FAKE_TTS_AUDIO):
+        self.text_to_speech = FakeTextToSpeech(first_byte_delay, chunk_delay, chunk_size, seconds_per_word, audio_path)
+
+
+class FakeAsyncElevenLabs:
+    def __init__(self, first_byte_delay=0.3, chunk_delay=0.02, chunk_size=4096, seconds_per_word=1 / WORDS_PER_SECOND,
+                 audio_path=FAKE_TTS_AUDIO):
+        self.text_to_speech = FakeAsyncTextToSpeech(first_byte_delay, chunk_delay, chunk_size, seconds_per_word, audio_path)
@@ -0,0 +1,110 @@
+"""
+Minimal MPEG audio (Layer III) frame parser.
+
+Enough to join MP3 files without re-encoding: audioFrames finds the audio
+frames of a file (skipping ID3 tags and the Xing/Info/VBRI header frame,
+which only describe the file it came from), so several files can be
+concatenated frame by frame into one valid stream, and their exact
+durations are known from the frame count. splitMp3 cuts such a stream
+back into its parts.
+"""
+
+# Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5
+BITRATES_MPEG1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+BITRATES_MPEG2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _id3v2Size(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def parseHeader(header):
+    """(frame_bytes, samples, sample_rate, side_info_bytes) for a Layer III
+    frame header, or None if the 4 bytes aren't one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x3
+    layer = (header[1] >> 1) & 0x3
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (header[2] >> 1) & 0x1
+    mono = (header[3] >> 6) == 3
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    if version == 3:
+        bitrate = BITRATES_MPEG1[bitrate_index] * 1000
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate, 17 if mono else 32
+    bitrate = BITRATES_MPEG2[bitrate_index] * 1000
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate, 9 if mono else 17
+
+
+def audioFrames(data):
+    """[(start, end, samples, sample_rate)] for every audio frame in `data`"""
+    frames = []
+    position = _id3v2Size(data)
+    end_of_audio = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+    while position + 4 <= end_of_audio:
+        parsed = parseHeader(data[position:position + 4])
+        if parsed is None:
+            # Not a frame boundary: resynchronise on the next sync word
+            position = data.find(b"\xff", position + 1, end_of_audio)
+            if position < 0:
+                break
+            continue
+        frame_bytes, samples, sample_rate, side_info = parsed
+        frame_end = min(position + frame_bytes, end_of_audio)
+        tag_offset = position + 4 + side_info
+        is_info_frame = not frames and (
+            data[tag_offset:tag_offset + 4] in (b"Xing", b"Info") or data[position + 36:position + 40] == b"VBRI"
+        )
+        if not is_info_frame:
+            frames.append((position, frame_end, samples, sample_rate))
+        position = frame_end
+    if not frames:
+        raise ValueError("No MPEG layer III audio frames found")
+    return frames
+
+
+def duration(frames):
+    return sum(samples / sample_rate for _, _, samples, sample_rate in frames)
+
+
+def concatMp3(parts):
+    """Join MP3 files (as bytes) losslessly. Returns (mp3 bytes, duration of
+    each part in seconds)."""
+    joined = bytearray()
+    durations = []
+    for data in parts:
+        frames = audioFrames(data)
+        for start, end, _, _ in frames:
+            joined += data[start:end]
+        durations.append(duration(frames))
+    return bytes(joined), durations
+
+
+def splitMp3(data, durations):
+    """Cut MP3 bytes (as joined by concatMp3) back into parts of the given
+    durations in seconds, frame by frame; the last part takes the rest"""
+    frames = audioFrames(data)
+    parts = []
+    index = 0
+    elapsed = 0.0
+    end = 0.0
+    for part_duration in durations[:-1]:
+        end += part_duration
+        part = bytearray()
+        # The durations come from whole frames, so only float error needs slack
+        while index < len(frames) and elapsed + frames[index][2] / frames[index][3] <= end + 1e-6:
+            start, stop, samples, sample_rate = frames[index]
+            part += data[start:stop]
+            elapsed += samples / sample_rate
+            index += 1
+        parts.append(bytes(part))
+    parts.append(b"".join(data[start:stop] for start, stop, _, _ in frames[index:]))
+    return parts
@@ -1,13 +1,68 @@
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
 # from elevenlabs.play import play
+import asyncio
+import base64
 import os
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
+# Before the local imports: cache and providers read their settings on import
 load_dotenv()
 
-elevenlabs = ElevenLabs(
-  api_key=os.getenv("ELEVENLABS_API_KEY"),
-)
+from cache.cache import makeKey
+from providers.providers import ELEVENLABS, ELEVENLABS_BASE_URL, HTTP_TIMEOUT_SECONDS, getAsyncHttpClient, getHttpClient
+from voiceover.mp3 import concatMp3
+
+# Offline fake client (voiceover/fake_tts.py) for local runs and benchmarks
+TTS_FAKE = os.getenv("KITTY_FAKE_TTS", "").lower() in ("1", "true", "yes")
+
+# The SDK is imported and the client created on the first request, not
+# when the pipeline is imported. Both clients send their requests through
+# providers.providers' pooled, rate-limited and retrying HTTP clients.
+_elevenlabs = None
+_async_elevenlabs = weakref.WeakKeyDictionary()  # event loop -> AsyncElevenLabs
+_elevenlabs_lock = threading.Lock()
+# providers.providers retries; SDK retries on top would multiply the attempts
+REQUEST_OPTIONS = {"max_retries": 0}
+
+
+def getElevenLabs():
+    """Process-wide ElevenLabs client"""
+    global _elevenlabs
+    with _elevenlabs_lock:
+        if _elevenlabs is None and TTS_FAKE:
+            from voiceover.fake_tts import FakeElevenLabs
+            _elevenlabs = FakeElevenLabs()
+        elif _elevenlabs is None:
+            from elevenlabs.client import ElevenLabs
+            _elevenlabs = ElevenLabs(
+              api_key=os.getenv("ELEVENLABS_API_KEY"),
+              base_url=ELEVENLABS_BASE_URL,
+              timeout=HTTP_TIMEOUT_SECONDS,
+              httpx_client=getHttpClient(ELEVENLABS),
+            )
+        return _elevenlabs
+
+
+def getAsyncElevenLabs():
+    """AsyncElevenLabs client of the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _elevenlabs_lock:
+        if loop not in _async_elevenlabs and TTS_FAKE:
+            from voiceover.fake_tts import FakeAsyncElevenLabs
+            _async_elevenlabs[loop] = FakeAsyncElevenLabs()
+        elif loop not in _async_elevenlabs:
+            from elevenlabs.client import AsyncElevenLabs
+            _async_elevenlabs[loop] = AsyncElevenLabs(
+              api_key=os.getenv("ELEVENLABS_API_KEY"),
+              base_url=ELEVENLABS_BASE_URL,
+              timeout=HTTP_TIMEOUT_SECONDS,
+              httpx_client=getAsyncHttpClient(ELEVENLABS),
+            )
+        return _async_elevenlabs[loop]
 
 text = (
     """
@@ -23,24 +78,276 @@ text = (
     """
 )
 
-def generateSpeech(text):
-    audio = elevenlabs.text_to_speech.convert(
+VOICE_ID = "CwhRBWXzGAHq8TQ4Fs17" # Roger
+MODEL_ID = "eleven_multilingual_v2"
+OUTPUT_FORMAT = "mp3_44100_128"
+VOICE_SETTINGS = {
+    "style": 1.0,
+    "speed": 1.15,
+    "stability": 0.0
+}
+
+# Sentence-chunked synthesis: sentences are voiced concurrently and joined
+TTS_CHUNKED = os.getenv("KITTY_TTS_CHUNKED", "on").lower() not in ("0", "off", "false", "no")
+TTS_CHUNK_CONCURRENCY = int(os.getenv("KITTY_TTS_CHUNK_CONCURRENCY", "4"))
+MIN_CHUNK_CHARS = 60  # shorter sentences are voiced together with the next one
+
+SENTENCE_BREAK = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+")
+
+def speechRequest(text, **extra):
+    """Keyword arguments of a text_to_speech call voicing `text`"""
+    return dict(
         text=text,
-        voice_id="CwhRBWXzGAHq8TQ4Fs17", # Roger
-        model_id="eleven_multilingual_v2",
-        output_format="mp3_44100_128",
-        voice_settings={
-            "style": 1.0,
-            "speed": 1.15,
-            "stability": 0.0
-        }
+        voice_id=VOICE_ID,
+        model_id=MODEL_ID,
+        output_format=OUTPUT_FORMAT,
+        voice_settings=VOICE_SETTINGS,
+        request_options=REQUEST_OPTIONS,
+        **extra
     )
 
-    audio_bytes = b"".join(audio)
 
-    with open("output.mp3", "wb") as f:
-        f.write(audio_bytes)
-    
+def generateSpeech(text, output_path="output.mp3", stream=True, client=None):
+    """Synthesise `text` to `output_path`.
+
+    In streaming mode chunks are written to disk as they arrive, so memory
+    stays flat regardless of script length. Returns timing stats.
+    """
+    client = client or getElevenLabs()
+    start = time.perf_counter()
+    request = speechRequest(text)
+
+    first_chunk_seconds = None
+    bytes_written = 0
+    if stream:
+        with open(output_path, "wb") as f:
+            for chunk in client.text_to_speech.stream(**request):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                bytes_written += len(chunk)
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - start
+    else:
+        audio = client.text_to_speech.convert(**request)
+        audio_bytes = b"".join(audio)
+        first_chunk_seconds = time.perf_counter() - start
+
+        with open(output_path, "wb") as f:
+            f.write(audio_bytes)
+        bytes_written = len(audio_bytes)
+
+    return {
+        "first_chunk_seconds": first_chunk_seconds,
+        "seconds": time.perf_counter() - start,
+        "bytes": bytes_written,
+    }
+
+
+async def generateSpeechAsync(text, output_path="output.mp3", stream=True, client=None):
+    """generateSpeech on the async client: the event loop serves other runs
+    while the audio arrives"""
+    client = client or getAsyncElevenLabs()
+    start = time.perf_counter()
+    request = speechRequest(text)
+
+    first_chunk_seconds = None
+    bytes_written = 0
+    if stream:
+        with open(output_path, "wb") as f:
+            async for chunk in client.text_to_speech.stream(**request):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                bytes_written += len(chunk)
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - start
+    else:
+        audio_bytes = b"".join([chunk async for chunk in client.text_to_speech.convert(**request)])
+        first_chunk_seconds = time.perf_counter() - start
+
+        with open(output_path, "wb") as f:
+            f.write(audio_bytes)
+        bytes_written = len(audio_bytes)
+
+    return {
+        "first_chunk_seconds": first_chunk_seconds,
+        "seconds": time.perf_counter() - start,
+        "bytes": bytes_written,
+    }
+
+
+def splitSentences(text, min_chars=MIN_CHUNK_CHARS):
+    """Split narration at sentence ends, joining very short sentences to the next"""
+    chunks = []
+    pending = ""
+    for sentence in SENTENCE_BREAK.split(" ".join(text.split())):
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+def sentenceKey(sentence):
+    """Content hash of a sentence's audio: its text and the voice settings"""
+    return makeKey(sentence, VOICE_ID, MODEL_ID, OUTPUT_FORMAT, VOICE_SETTINGS)
+
+
+def sentenceRequest(sentences, index):
+    request = speechRequest(sentences[index])
+    # Neighbouring sentences keep the intonation continuous across requests
+    if index > 0:
+        request["previous_text"] = sentences[index - 1]
+    if index + 1 < len(sentences):
+        request["next_text"] = sentences[index + 1]
+    return request
+
+
+class SentenceWriter:
+    """Appends each sentence's MP3 to the output file in order and keeps the
+    cues and stats of generateSpeechChunked"""
+
+    def __init__(self, f, on_sentence):
+        self.f = f
+        self.on_sentence = on_sentence
+        self.start = time.perf_counter()
+        self.first_chunk_seconds = None
+        self.bytes_written = 0
+        self.cues = []
+        self.offset = 0.0
+        self.reused = 0
+
+    def write(self, sentence, sentence_audio, from_cache):
+        self.reused += from_cache
+        audio, (seconds,) = concatMp3([sentence_audio])
+        self.f.write(audio)
+        self.bytes_written += len(audio)
+        cue = {"start": self.offset, "end": self.offset + seconds, "text": sentence}
+        self.cues.append(cue)
+        self.offset += seconds
+        if self.first_chunk_seconds is None:
+            self.first_chunk_seconds = time.perf_counter() - self.start
+        if self.on_sentence:
+            self.on_sentence(cue, audio)
+
+    def stats(self):
+        return {
+            "first_chunk_seconds": self.first_chunk_seconds,
+            "seconds": time.perf_counter() - self.start,
+            "bytes": self.bytes_written,
+            "requests": len(self.cues) - self.reused,
+            "reused_sentences": self.reused,
+            "cues": self.cues,
+        }
+
+
+def generateSpeechChunked(text, output_path="output.mp3", client=None, concurrency=TTS_CHUNK_CONCURRENCY, on_sentence=None,
+                          segment_cache=None):
+    """Like generateSpeech, but voices the narration sentence by sentence,
+    up to `concurrency` requests at a time, so latency no longer grows with
+    script length. The MP3s are joined frame by frame (no re-encoding) and
+    written in order as soon as each is ready. The stats also hold `cues`:
+    [{"start", "end", "text"}] per chunk, ready to use as subtitles.
+
+    `on_sentence(cue, audio)` is called as each sentence is written, with
+    its cue and the MP3 bytes it added to the file, so downstream work on
+    a sentence can start before the later ones are voiced.
+
+    With a `segment_cache` (cache.cache.ArtifactCache), each sentence's
+    audio is kept by sentenceKey and sentences voiced before are not
+    requested again, so editing one sentence of a script only pays for that
+    one. A reused sentence keeps the intonation it got next to its old
+    neighbours."""
+    client = client or getElevenLabs()
+    sentences = splitSentences(text)
+
+    def synthesize(index):
+        """(MP3 bytes, whether they came from segment_cache)"""
+        if segment_cache is not None:
+            audio = segment_cache.getBytes("sentence_audio", sentenceKey(sentences[index]))
+            if audio is not None:
+                return audio, True
+        audio = b"".join(client.text_to_speech.convert(**sentenceRequest(sentences, index)))
+        if segment_cache is not None:
+            segment_cache.putBytes("sentence_audio", sentenceKey(sentences[index]), audio)
+        return audio, False
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(sentences)))) as pool:
+        futures = [pool.submit(synthesize, index) for index in range(len(sentences))]
+        with open(output_path, "wb") as f:
+            writer = SentenceWriter(f, on_sentence)
+            for sentence, future in zip(sentences, futures):
+                writer.write(sentence, *future.result())
+    return writer.stats()
+
+
+async def generateSpeechChunkedAsync(text, output_path="output.mp3", client=None, concurrency=TTS_CHUNK_CONCURRENCY,
+                                     on_sentence=None, segment_cache=None):
+    """generateSpeechChunked on the async client: the sentences are
+    requested as tasks on the event loop instead of from a thread pool"""
+    client = client or getAsyncElevenLabs()
+    sentences = splitSentences(text)
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def synthesize(index):
+        if segment_cache is not None:
+            audio = segment_cache.getBytes("sentence_audio", sentenceKey(sentences[index]))
+            if audio is not None:
+                return audio, True
+        async with limit:
+            audio = b"".join([chunk async for chunk in client.text_to_speech.convert(**sentenceRequest(sentences, index))])
+        if segment_cache is not None:
+            segment_cache.putBytes("sentence_audio", sentenceKey(sentences[index]), audio)
+        return audio, False
+
+    tasks = [asyncio.ensure_future(synthesize(index)) for index in range(len(sentences))]
+    try:
+        with open(output_path, "wb") as f:
+            writer = SentenceWriter(f, on_sentence)
+            for sentence, task in zip(sentences, tasks):
+                writer.write(sentence, *await task)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return writer.stats()
+
+
+def timestampsResult(response, output_path):
+    """Write the audio of a convert_with_timestamps response; returns its alignment"""
+    with open(output_path, "wb") as f:
+        f.write(base64.b64decode(response.audio_base_64))
+
+    if response.alignment is None:
+        return None
+    return {
+        "characters": response.alignment.characters,
+        "character_start_times_seconds": response.alignment.character_start_times_seconds,
+        "character_end_times_seconds": response.alignment.character_end_times_seconds,
+    }
+
+
+def generateSpeechWithTimestamps(text, output_path="output.mp3", client=None):
+    """Like generateSpeech, but also returns the character-level alignment
+    (characters, character_start_times_seconds, character_end_times_seconds)
+    so word timings don't have to be recovered with speech recognition."""
+    client = client or getElevenLabs()
+    response = client.text_to_speech.convert_with_timestamps(**speechRequest(text))
+    return timestampsResult(response, output_path)
+
+
+async def generateSpeechWithTimestampsAsync(text, output_path="output.mp3", client=None):
+    """generateSpeechWithTimestamps on the async client"""
+    client = client or getAsyncElevenLabs()
+    response = await client.text_to_speech.convert_with_timestamps(**speechRequest(text))
+    return timestampsResult(response, output_path)
+
+
 def main():
     generateSpeech(text)
 
@@ -0,0 +1,156 @@
+"""
+Per-run working directories, so concurrent pipeline runs never share files.
+
+Every run gets output/runs/<run_id>/ holding its voiceover, subtitles,
+intermediate and final video, and a completion marker for every stage that
+finished (see saveStageMarker), so a retried run can pick up where it
+failed. Old workspaces are removed by cleanupStaleWorkspaces, which
+video_server.py runs in the background.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from cache.cache import hashFile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Relative to the repository root unless absolute, so the server and the pipeline agree
+WORKSPACE_ROOT = os.path.join(BASE_DIR, os.getenv("KITTY_WORKSPACE_DIR", os.path.join("output", "runs")))
+WORKSPACE_MAX_AGE_SECONDS = int(os.getenv("KITTY_WORKSPACE_MAX_AGE", str(24 * 3600)))
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# File names inside a workspace
+VOICEOVER_FILE = "voiceover.mp3"
+ALIGNMENT_FILE = "alignment.json"
+CUES_FILE = "cues.json"
+TRACE_FILE = "trace.json"  # per-stage metrics of the run, when KITTY_TRACE is on
+SCRIPT_FILE = "script.txt"
+SCRIPT_WITH_SCENES_FILE = "script_with_scenes.txt"
+VIDEO_FILE = "kitty.mp4"
+OUTPUT_FILE = "kitty_explains.mp4"
+HLS_DIR = "hls"  # HLS playlist and segments of OUTPUT_FILE, when enabled
+HLS_PLAYLIST = "index.m3u8"
+HLS_SEGMENT_PATTERN = "segment_%04d.ts"
+HLS_SEGMENT_FILE = re.compile(r"^segment_\d{4,}\.ts$")
+STAGES_DIR = "stages"  # <stage>.json completion markers
+SEGMENTS_DIR = "segments"  # sentence audio, alignments and video segments by content hash
+
+
+def newRunId():
+    return uuid.uuid4().hex
+
+
+def workspaceDir(run_id, root=WORKSPACE_ROOT):
+    # run_id ends up in a filesystem path (and in URLs), so keep it boring
+    if not RUN_ID_PATTERN.match(run_id or ""):
+        raise ValueError(f"Invalid run id: {run_id!r}")
+    return os.path.join(root, run_id)
+
+
+def createWorkspace(run_id=None, root=WORKSPACE_ROOT):
+    """Create (or reuse) the workspace for `run_id`. Returns (run_id, path)."""
+    run_id = run_id or newRunId()
+    path = workspaceDir(run_id, root)
+    os.makedirs(path, exist_ok=True)
+    return run_id, path
+
+
+def workspaceFile(workspace, name):
+    return os.path.join(workspace, name)
+
+
+def stageMarkerPath(workspace, stage):
+    return os.path.join(workspace, STAGES_DIR, f"{stage}.json")
+
+
+def saveStageMarker(workspace, stage, inputs_key, outputs, files=()):
+    """Record that `stage` finished with `outputs` (its state updates) for
+    inputs hashing to inputs_key. `files` are the artifacts it wrote; the
+    marker only counts while they are unchanged."""
+    marker = {
+        "stage": stage,
+        "inputs": inputs_key,
+        "outputs": outputs,
+        "files": {os.path.relpath(path, workspace): hashFile(path) for path in files},
+        "finished_at": time.time(),
+    }
+    path = stageMarkerPath(workspace, stage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written after the artifacts and renamed into place: a crash leaves no
+    # marker rather than half of one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(marker, f)
+    os.replace(tmp_path, path)
+
+
+def loadStageMarker(workspace, stage, inputs_key):
+    """Outputs of `stage` if it finished for the same inputs and its artifacts
+    are still there unchanged, else None"""
+    try:
+        with open(stageMarkerPath(workspace, stage), encoding="utf-8") as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if marker.get("inputs") != inputs_key:
+        return None
+    for name, digest in marker["files"].items():
+        try:
+            if hashFile(os.path.join(workspace, name)) != digest:
+                return None
+        except OSError:
+            return None
+    return marker["outputs"]
+
+
+def cleanupStaleWorkspaces(max_age_seconds=WORKSPACE_MAX_AGE_SECONDS, root=WORKSPACE_ROOT):
+    """Remove workspaces untouched for longer than max_age_seconds"""
+    if not os.path.isdir(root):
+        return []
+    cutoff = time.time() - max_age_seconds
+    removed = []
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            newest = max([entry.stat().st_mtime] + [f.stat().st_mtime for f in os.scandir(entry.path)])
+        except FileNotFoundError:
+            continue
+        if newest < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+def startCleanupThread(interval_seconds=3600, max_age_seconds=WORKSPACE_MAX_AGE_SECONDS, root=WORKSPACE_ROOT):
+    """Periodically clean stale workspaces on a daemon thread"""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                removed = cleanupStaleWorkspaces(max_age_seconds, root)
+                if removed:
+                    print(f"🧹 Removed {len(removed)} stale workspace(s)")
+            except Exception as e:
+                print(f"⚠️ Workspace cleanup failed: {e}")
+            stop.wait(interval_seconds)
+
+    threading.Thread(target=loop, name="workspace-cleanup", daemon=True).start()
+    return stop
+
+
+def latestOutput(root=WORKSPACE_ROOT):
+    """Path of the most recently finished video across all workspaces"""
+    if not os.path.isdir(root):
+        return None
+    candidates = [os.path.join(entry.path, OUTPUT_FILE) for entry in os.scandir(root) if entry.is_dir()]
+    candidates = [path for path in candidates if os.path.exists(path)]
+    return max(candidates, key=os.path.getmtime, default=None)